@@ -0,0 +1,137 @@
+"""
+Benchmark
+
+Decoding of export with 5,000 restreams (2 failover inputs,
+3 outputs with a mixin each) into State.
+
+Compares:
+* reflective converter - walks dataclasses.fields() and type hints per object
+* decode_state - field plans compiled once
+"""
+
+import dataclasses
+import json
+import time
+import typing
+import uuid
+
+from ephyr_control.state import (
+    Endpoint,
+    InputSource,
+    PullSource,
+    State,
+    UuidFailoverInput,
+    UuidInput,
+    UuidMixin,
+    UuidOutputWithMixins,
+    UuidRestream,
+    decode_state,
+)
+
+RESTREAMS = 5000
+
+
+def build_export() -> dict:
+    def failover_input(key: str) -> dict:
+        return {
+            "id": str(uuid.uuid4()),
+            "key": key,
+            "endpoints": [{"kind": "rtmp"}],
+            "src": {"remote_url": f"rtmp://example.com/{key}"},
+            "enabled": True,
+        }
+
+    def output(index: int) -> dict:
+        return {
+            "id": str(uuid.uuid4()),
+            "dst": f"rtmp://example.com/live/{index}",
+            "label": f"Output {index}",
+            "volume": {"level": 100, "muted": False},
+            "mixins": [
+                {
+                    "id": str(uuid.uuid4()),
+                    "src": "ts://example.com/mixin",
+                    "volume": {"level": 80, "muted": False},
+                    "delay": "3s 500ms",
+                    "sidechain": False,
+                }
+            ],
+            "enabled": True,
+        }
+
+    restreams = [
+        {
+            "id": str(uuid.uuid4()),
+            "key": f"restream{index}",
+            "label": f"Restream {index}",
+            "input": {
+                "id": str(uuid.uuid4()),
+                "key": "origin",
+                "endpoints": [{"kind": "rtmp"}, {"kind": "hls"}],
+                "src": {
+                    "failover_inputs": [
+                        failover_input("main"),
+                        failover_input("backup"),
+                    ]
+                },
+                "enabled": True,
+            },
+            "outputs": [output(output_index) for output_index in range(3)],
+        }
+        for index in range(RESTREAMS)
+    ]
+    return {"version": "v1", "restreams": restreams, "settings": {"title": "Bench"}}
+
+
+# hand-written reflective converter, as commonly done without decoder
+_TYPES = {
+    "restreams": UuidRestream,
+    "input": UuidInput,
+    "failover_inputs": UuidFailoverInput,
+    "endpoints": Endpoint,
+    "outputs": UuidOutputWithMixins,
+    "mixins": UuidMixin,
+}
+
+
+def reflective(cls: type, data: dict):
+    kwargs = {}
+    hints = typing.get_type_hints(cls)
+    for field in dataclasses.fields(cls):
+        if field.name not in data:
+            continue
+        value = data[field.name]
+        if field.name in _TYPES and isinstance(value, list):
+            value = [reflective(_TYPES[field.name], item) for item in value]
+        elif field.name in _TYPES:
+            value = reflective(_TYPES[field.name], value)
+        elif field.name == "src" and isinstance(value, dict):
+            if "remote_url" in value:
+                value = reflective(PullSource, value)
+            else:
+                value = reflective(InputSource, value)
+        elif dataclasses.is_dataclass(hints.get(field.name)) and value is not None:
+            value = reflective(hints[field.name], value)
+        elif field.name == "id":
+            value = uuid.UUID(value)
+        kwargs[field.name] = value
+    return cls(**kwargs)
+
+
+def measure(name: str, function):
+    started = time.perf_counter()
+    result = function()
+    print(f"{name:<30} {(time.perf_counter() - started) * 1e3:9.1f} ms")
+    return result
+
+
+def main():
+    raw = json.dumps(build_export())
+    data = measure("json.loads", lambda: json.loads(raw))
+    slow = measure("reflective converter", lambda: reflective(State, data))
+    fast = measure("decode_state", lambda: decode_state(data))
+    assert slow == fast, "decoders disagree"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark
+
+Import time of state model versus whole library.
+Every measurement runs in a fresh interpreter.
+
+Exits with non-zero status if importing state model loads network stack,
+so it can be used to catch regressions.
+"""
+
+import statistics
+import subprocess
+import sys
+
+REPEAT = 5
+
+NETWORK_MODULES = ("gql", "graphql", "requests", "websockets", "aiohttp")
+
+SCENARIOS = {
+    "python itself": "pass",
+    "import ephyr_control (state only)": "import ephyr_control; ephyr_control.State()",
+    "remote control": "import ephyr_control; ephyr_control.RemoteEphyrInstance",
+}
+
+MEASURE = """
+import sys, time
+started = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - started
+loaded = [m for m in {modules!r} if m in sys.modules]
+print(elapsed, ",".join(loaded))
+"""
+
+
+def measure(code: str) -> (float, str):
+    output = subprocess.run(
+        [sys.executable, "-c", MEASURE.format(code=code, modules=NETWORK_MODULES)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.split()
+    return float(output[0]), output[1] if len(output) > 1 else ""
+
+
+def main() -> int:
+    status = 0
+    for name, code in SCENARIOS.items():
+        runs = [measure(code) for _ in range(REPEAT)]
+        median = statistics.median(elapsed for elapsed, _ in runs)
+        loaded = runs[0][1]
+        print(f"{name:<36} {median * 1000:8.1f} ms  network modules: {loaded or '-'}")
+        if "state only" in name and loaded:
+            print("REGRESSION: state model imports network stack")
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Benchmark
+
+Client-side overhead of instrumentation of one tune_volume call, without network.
+HTTP adapter is replaced with one returning canned response,
+as in tune_volume_overhead.py.
+
+Compares AssignedClient.execute:
+* without instrumentation
+* with no-op hooks
+* with MetricsCollector
+"""
+
+import timeit
+import uuid
+from typing import Optional
+from unittest import mock
+
+import requests
+
+from ephyr_control.instance.constants import EphyrApiPaths
+from ephyr_control.instance.instrumentation import Instrumentation, MetricsCollector
+from ephyr_control.instance.protocols import ServerConnectionDetails
+from ephyr_control.instance.queries import mixin_tune_volume
+from ephyr_control.instance.remote import AssignedClient
+
+NUMBER = 5000
+
+VARIABLES = {
+    "restream_id": uuid.uuid4().hex,
+    "output_id": uuid.uuid4().hex,
+    "mixin_id": uuid.uuid4().hex,
+    "level": 80,
+    "muted": False,
+}
+
+
+def canned_send(adapter, request, **kwargs):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = b'{"data":{"tuneVolume":true}}'
+    response.headers["Content-Type"] = "application/json"
+    response.request = request
+    response.url = request.url
+    return response
+
+
+def client_call(instrumentation: Optional[Instrumentation]):
+    client = AssignedClient(EphyrApiPaths.MIXIN, instrumentation=instrumentation)
+    client.rebuild_client(
+        ServerConnectionDetails(scheme="http", host="127.0.0.1", port=80)
+    )
+    return lambda: client.execute(mixin_tune_volume, variable_values=VARIABLES)
+
+
+def report(name: str, seconds: float):
+    print(f"{name:<40} {seconds / NUMBER * 1e6:9.1f} us/call")
+
+
+def main():
+    collector = MetricsCollector()
+    with mock.patch.object(requests.adapters.HTTPAdapter, "send", canned_send):
+        for name, instrumentation in (
+            ("without instrumentation", None),
+            ("no-op hooks", Instrumentation()),
+            ("MetricsCollector", collector),
+        ):
+            call = client_call(instrumentation)
+            call()  # warm up
+            report(name, timeit.timeit(call, number=NUMBER))
+    print(collector.to_text())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark
+
+Size of import spec uploaded by change_state for 300 restreams
+(main and backup failover inputs, 4 outputs with a mixin each),
+decoded from server export, so every entity carries its read-only id.
+
+Compares to_json without cleanup (everything, including nulls, ids and
+server defaults) with cleanup (minimal spec), indented and compact.
+"""
+
+import time
+import uuid
+
+from ephyr_control.state import (
+    Endpoint,
+    InputSource,
+    PullSource,
+    State,
+    UuidFailoverInput,
+    UuidInput,
+    UuidMixin,
+    UuidOutputWithMixins,
+    UuidRestream,
+)
+
+RESTREAMS = 300
+OUTPUTS = 4
+
+
+def failover_input(key: str, index: int) -> UuidFailoverInput:
+    return UuidFailoverInput(
+        key=key,
+        endpoints=[Endpoint(kind="rtmp")],
+        src=PullSource(remote_url=f"rtmp://origin.example.com/{key}/{index}")
+        if key == "backup"
+        else None,
+        id=uuid.uuid4(),
+    )
+
+
+def build_state() -> State:
+    restreams = []
+    for index in range(RESTREAMS):
+        outputs = [
+            UuidOutputWithMixins(
+                dst=f"rtmp://a.rtmp.youtube.com/live2/key-{index}-{output_index}",
+                label=f"Language {output_index}",
+                enabled=True,
+                mixins=[
+                    UuidMixin(
+                        src=f"ts://translation.example.com/{index}/{output_index}",
+                        id=uuid.uuid4(),
+                    )
+                ],
+                id=uuid.uuid4(),
+            )
+            for output_index in range(OUTPUTS)
+        ]
+        restreams.append(
+            UuidRestream(
+                key=f"event{index}",
+                label=f"Event {index}",
+                input=UuidInput(
+                    src=InputSource(
+                        failover_inputs=[
+                            failover_input("main", index),
+                            failover_input("backup", index),
+                        ]
+                    ),
+                    id=uuid.uuid4(),
+                ),
+                outputs=outputs,
+                id=uuid.uuid4(),
+            )
+        )
+    return State(restreams=restreams)
+
+
+def main():
+    state = build_state()
+    baseline = None
+    for name, kwargs in (
+        ("no cleanup", dict(cleanup=False)),
+        ("no cleanup, compact", dict(cleanup=False, compact=True)),
+        ("cleanup", dict(cleanup=True)),
+        ("cleanup, compact", dict(cleanup=True, compact=True)),
+    ):
+        started = time.perf_counter()
+        size = len(state.to_json(**kwargs).encode())
+        elapsed = time.perf_counter() - started
+        baseline = baseline or size
+        print(
+            f"{name:<22} {size / 1024:8.1f} KiB  {size / baseline:6.1%}"
+            f"  {elapsed * 1e3:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
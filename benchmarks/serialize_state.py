@@ -0,0 +1,57 @@
+"""
+Benchmark
+
+Serialization of State with 5,000 restreams (see decode_state.py) to JSON.
+
+Compares:
+* asdict encoder - previous EnhancedJSONEncoder, deep copying the tree
+  with dataclasses.asdict before encoding
+* dtcls_to_json - shallow dicts built by functions generated per class,
+  output is byte-identical
+* compact_dtcls_to_json - without whitespace, orjson if it is installed
+"""
+
+import dataclasses
+import json
+import time
+import tracemalloc
+
+from benchmarks.decode_state import build_export
+from ephyr_control.state import decode_state
+from ephyr_control.utils import serialization
+from ephyr_control.utils.serialization import compact_dtcls_to_json, dtcls_to_json
+
+
+class AsdictJSONEncoder(json.JSONEncoder):
+    def default(self, o):
+        if dataclasses.is_dataclass(o):
+            return dataclasses.asdict(o)
+        return serialization._default(o)
+
+
+def measure(name: str, function):
+    started = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - started
+    # separate run, tracing slows down the code
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{name:<35} {elapsed * 1e3:9.1f} ms  peak {peak / 2**20:7.1f} MiB")
+    return result
+
+
+def main():
+    state = decode_state(build_export())
+    print(f"orjson installed: {serialization.orjson is not None}")
+    before = measure(
+        "asdict encoder (before)", lambda: json.dumps(state, cls=AsdictJSONEncoder)
+    )
+    after = measure("dtcls_to_json (after)", lambda: dtcls_to_json(state))
+    assert before == after, "output differs"
+    measure("compact_dtcls_to_json", lambda: compact_dtcls_to_json(state))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark
+
+Structural diff of two large states and replaying the patch.
+State has 100 restreams with 100 outputs each (10k outputs),
+a few outputs are changed, added and removed.
+
+Compares:
+* State.__eq__ - only tells that states differ
+* diff_states - tells what differs, skipping subtrees that compare equal
+"""
+
+import copy
+import time
+import uuid
+
+from ephyr_control.state import (
+    Input,
+    Mixin,
+    State,
+    UuidOutputWithMixins,
+    UuidRestream,
+    Volume,
+)
+from ephyr_control.state.diff import apply_patch, diff_states
+
+RESTREAMS = 100
+OUTPUTS = 100
+
+
+def build_state() -> State:
+    restreams = []
+    for restream_index in range(RESTREAMS):
+        outputs = [
+            UuidOutputWithMixins(
+                dst=f"rtmp://example.com/live/{restream_index}-{output_index}",
+                label=f"Output {output_index}",
+                id=uuid.uuid4(),
+                mixins=[Mixin(src=f"ts://example.com/{output_index}")],
+            )
+            for output_index in range(OUTPUTS)
+        ]
+        restreams.append(
+            UuidRestream(
+                key=f"restream{restream_index}",
+                input=Input(),
+                outputs=outputs,
+                id=uuid.uuid4(),
+            )
+        )
+    return State(restreams=restreams)
+
+
+def change(state: State) -> State:
+    new = copy.deepcopy(state)
+    new.restreams[3].outputs[10].volume = Volume(level=50)
+    new.restreams[42].outputs[0].mixins[0].delay = "1s"
+    new.restreams[77].outputs.pop(5)
+    new.restreams[99].outputs.append(
+        UuidOutputWithMixins(dst="rtmp://example.com/live/new")
+    )
+    new.restreams[50].label = "Changed"
+    return new
+
+
+def measure(name: str, function):
+    started = time.perf_counter()
+    result = function()
+    print(f"{name:<30} {(time.perf_counter() - started) * 1e3:9.1f} ms")
+    return result
+
+
+def main():
+    old = build_state()
+    new = change(old)
+
+    measure("State.__eq__", lambda: old == new)
+    operations = measure("diff_states", lambda: diff_states(old, new))
+    for operation in operations:
+        print(f"  {operation.op.value:<7} {operation.path}")
+
+    patched = copy.deepcopy(old)
+    measure("apply_patch", lambda: apply_patch(patched, operations))
+    assert patched == new, "patched state differs from desired one"
+    measure("State.__eq__ (equal)", lambda: new == patched)
+    assert measure("diff_states (equal)", lambda: diff_states(new, patched)) == []
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark
+
+Events of `api_subscribe_to_state` subscription.
+Payload has 100 restreams with 100 outputs each (10k outputs),
+consecutive payloads differ by a few statuses and volumes.
+
+Compares:
+* decode_state + diff_states - decoding every payload and diffing State trees
+* StateEventsTracker.feed - comparing payloads as they are, by subtrees
+"""
+
+import copy
+import time
+import uuid
+
+from ephyr_control.instance.events import StateEventsTracker
+from ephyr_control.state.decode import decode_state
+from ephyr_control.state.diff import diff_states
+
+RESTREAMS = 100
+OUTPUTS = 100
+
+
+def volume(level: int = 100) -> dict:
+    return {"level": level, "muted": False}
+
+
+def build_payload() -> dict:
+    restreams = []
+    for restream_index in range(RESTREAMS):
+        outputs = [
+            {
+                "id": str(uuid.uuid4()),
+                "dst": f"rtmp://example.com/live/{restream_index}-{output_index}",
+                "label": f"Output {output_index}",
+                "previewUrl": None,
+                "volume": volume(),
+                "mixins": [
+                    {
+                        "id": str(uuid.uuid4()),
+                        "src": f"ts://example.com/{output_index}",
+                        "volume": volume(),
+                        "delay": 0,
+                        "sidechain": False,
+                    }
+                ],
+                "enabled": True,
+                "status": "OFFLINE",
+            }
+            for output_index in range(OUTPUTS)
+        ]
+        restreams.append(
+            {
+                "id": str(uuid.uuid4()),
+                "key": f"restream{restream_index}",
+                "label": None,
+                "input": {
+                    "id": str(uuid.uuid4()),
+                    "key": "origin",
+                    "endpoints": [
+                        {
+                            "id": str(uuid.uuid4()),
+                            "kind": "RTMP",
+                            "status": "OFFLINE",
+                            "label": None,
+                        }
+                    ],
+                    "src": None,
+                    "enabled": True,
+                },
+                "outputs": outputs,
+            }
+        )
+    return {"allRestreams": restreams}
+
+
+def change(payload: dict) -> dict:
+    new = copy.deepcopy(payload)
+    restreams = new["allRestreams"]
+    restreams[3]["outputs"][10]["status"] = "ONLINE"
+    restreams[42]["outputs"][0]["mixins"][0]["volume"] = volume(50)
+    restreams[77]["input"]["endpoints"][0]["status"] = "ONLINE"
+    return new
+
+
+def measure(name: str, function):
+    started = time.perf_counter()
+    result = function()
+    print(f"{name:<30} {(time.perf_counter() - started) * 1e3:9.1f} ms")
+    return result
+
+
+def main():
+    old = build_payload()
+    new = change(old)
+
+    old_state = decode_state(old)
+    measure(
+        "decode_state + diff_states",
+        lambda: diff_states(old_state, decode_state(new)),
+    )
+
+    tracker = StateEventsTracker(emit_initial=False)
+    tracker.feed(old)
+    events = measure("StateEventsTracker.feed", lambda: tracker.feed(new))
+    for event in events:
+        print(f"  {event.kind.value:<25} {event.old} -> {event.new}")
+    unchanged = copy.deepcopy(new)
+    assert measure("StateEventsTracker (equal)", lambda: tracker.feed(unchanged)) == []
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark
+
+Memory held by State with 100 restreams of 100 outputs (10k outputs,
+each with a mixin), see state_diff.py.
+
+Compares:
+* dict-based dataclasses - the same fields, without __slots__
+  (how state model was declared before)
+* state model - slotted dataclasses
+
+Both trees share strings and UUIDs, only model objects are measured.
+"""
+
+import dataclasses
+import tracemalloc
+from typing import Any, Dict
+
+from benchmarks.state_diff import build_state
+
+_plain_classes: Dict[type, type] = {}
+
+
+def plain_class(cls: type) -> type:
+    plain = _plain_classes.get(cls)
+    if plain is None:
+        plain = _plain_classes[cls] = dataclasses.make_dataclass(
+            cls.__name__,
+            [(field.name, Any, None) for field in dataclasses.fields(cls)],
+        )
+    return plain
+
+
+def rebuild(value: Any, plain: bool) -> Any:
+    if isinstance(value, list):
+        return [rebuild(item, plain) for item in value]
+    if dataclasses.is_dataclass(value):
+        cls = plain_class(type(value)) if plain else type(value)
+        return cls(
+            **{
+                field.name: rebuild(getattr(value, field.name), plain)
+                for field in dataclasses.fields(value)
+            }
+        )
+    return value
+
+
+def measure(name: str, template, plain: bool) -> int:
+    tracemalloc.start()
+    tree = rebuild(template, plain)  # noqa: F841 - kept alive while measured
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{name:<25} {size / 2**20:8.2f} MiB")
+    return size
+
+
+def main():
+    template = build_state()
+    rebuild(template.restreams[0], plain=True)  # create classes before measuring
+    before = measure("dict-based dataclasses", template, plain=True)
+    after = measure("slotted state model", template, plain=False)
+    print(
+        f"{'saved':<25} {(before - after) / 2**20:8.2f} MiB ({1 - after / before:.0%})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark
+
+History of server info: 500 servers, an hour of samples every second each.
+
+Measures memory of samples, time of appending a sample
+and time of queries over all servers at once.
+"""
+
+import random
+import time
+
+from ephyr_control.instance.timeseries import TimeSeriesStore
+
+SERVERS = 500
+SAMPLES = 3600
+
+
+def measure(name: str, function):
+    started = time.perf_counter()
+    result = function()
+    print(f"{name:<30} {(time.perf_counter() - started) * 1e3:9.1f} ms")
+    return result
+
+
+def fill(store: TimeSeriesStore, now: float) -> None:
+    statuses = ("OFFLINE", "INITIALIZING", "ONLINE", "UNSTABLE")
+    for second in range(SAMPLES):
+        timestamp = now - SAMPLES + second
+        for server in range(SERVERS):
+            store.append_server_info(
+                f"server{server}",
+                {
+                    "cpuUsage": random.uniform(0, 100),  # noqa: S311
+                    "ramTotal": 16000.0,
+                    "ramFree": random.uniform(1000, 15000),  # noqa: S311
+                    "txDelta": random.uniform(0, 1e4),  # noqa: S311
+                    "rxDelta": random.uniform(0, 1e4),  # noqa: S311
+                    "errorMsg": None,
+                },
+                timestamp=timestamp,
+            )
+    # statistics payload with counts of inputs and outputs
+    store.append_statistics(
+        {
+            "statistics": [
+                {
+                    "id": "server0",
+                    "statistics": {
+                        "data": {
+                            "inputs": [{"status": "ONLINE", "count": 3}],
+                            "outputs": [
+                                {"status": status, "count": 10} for status in statuses
+                            ],
+                            "serverInfo": {"cpuUsage": 50.0},
+                        }
+                    },
+                }
+            ]
+        },
+        timestamp=now,
+    )
+
+
+def main():
+    store = TimeSeriesStore(capacity=SAMPLES)
+    now = time.time()
+    started = time.perf_counter()
+    fill(store, now)
+    elapsed = time.perf_counter() - started
+    print(f"{len(store)} samples, {elapsed / len(store) * 1e6:.1f} us per sample")
+    print(
+        f"memory of samples: {store.nbytes / 2 ** 20:.1f} MiB,"
+        f" {store.nbytes / (SERVERS * SAMPLES):.0f} bytes per sample"
+    )
+
+    measure("mean, 5 minutes", lambda: store.mean("cpu_usage", 300, now))
+    measure("mean, hour", lambda: store.mean("cpu_usage", 3600, now))
+    measure(
+        "95th percentile, 5 minutes",
+        lambda: store.percentile("cpu_usage", 95, 300, now),
+    )
+    measure("rate, 5 minutes", lambda: store.rate("ram_free", 300, now))
+    measure("series, hour", lambda: store.series("server42", "tx_delta"))
+    measure(
+        "downsample to minutes",
+        lambda: store.downsample("server42", "tx_delta", step=60),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark
+
+Client-side overhead of one tune_volume call, without network.
+HTTP adapter is replaced with one returning canned response,
+so only work done by the library (and gql/requests) is measured.
+
+Compares:
+* gql.Client.execute - prints document and encodes whole body on every call
+* AssignedClient.execute - sends body pre-encoded by AssignedMethodCall
+"""
+
+import timeit
+import uuid
+from unittest import mock
+
+import gql
+import requests
+from gql.transport.requests import RequestsHTTPTransport
+
+from ephyr_control.instance.constants import EphyrApiPaths
+from ephyr_control.instance.protocols import ServerConnectionDetails
+from ephyr_control.instance.queries import mixin_tune_volume
+from ephyr_control.instance.remote import AssignedClient
+
+NUMBER = 2000
+URL = "http://127.0.0.1/api-mix"
+
+VARIABLES = {
+    "restream_id": uuid.uuid4().hex,
+    "output_id": uuid.uuid4().hex,
+    "mixin_id": uuid.uuid4().hex,
+    "level": 80,
+    "muted": False,
+}
+
+
+def canned_send(adapter, request, **kwargs):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = b'{"data":{"tuneVolume":true}}'
+    response.headers["Content-Type"] = "application/json"
+    response.request = request
+    response.url = request.url
+    return response
+
+
+def gql_client_call():
+    client = gql.Client(transport=RequestsHTTPTransport(url=URL))
+    return lambda: client.execute(mixin_tune_volume.query, variable_values=VARIABLES)
+
+
+def assigned_client_call():
+    client = AssignedClient(EphyrApiPaths.MIXIN)
+    client.rebuild_client(
+        ServerConnectionDetails(scheme="http", host="127.0.0.1", port=80)
+    )
+    return lambda: client.execute(mixin_tune_volume, variable_values=VARIABLES)
+
+
+def encode_with_gql_print():
+    from graphql import print_ast
+
+    payload = {"query": print_ast(mixin_tune_volume.query), "variables": VARIABLES}
+    return requests.models.complexjson.dumps(payload).encode()
+
+
+def report(name: str, seconds: float):
+    print(f"{name:<40} {seconds / NUMBER * 1e6:9.1f} us/call")
+
+
+def main():
+    with mock.patch.object(requests.adapters.HTTPAdapter, "send", canned_send):
+        for name, factory in (
+            ("gql.Client.execute (before)", gql_client_call),
+            ("AssignedClient.execute (after)", assigned_client_call),
+        ):
+            call = factory()
+            call()  # warm up
+            report(name, timeit.timeit(call, number=NUMBER))
+
+    print("request body only:")
+    report(
+        "print_ast + json.dumps (before)",
+        timeit.timeit(encode_with_gql_print, number=NUMBER),
+    )
+    report(
+        "AssignedMethodCall.encode_body (after)",
+        timeit.timeit(lambda: mixin_tune_volume.encode_body(VARIABLES), number=NUMBER),
+    )
+
+
+if __name__ == "__main__":
+    main()
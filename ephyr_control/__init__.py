@@ -1,10 +1,60 @@
 """Ephyr-control library.
 
 Set of tools for managing Ephyr instances.
+
+State model is imported eagerly, while remote control (and its network stack)
+is imported on first access to its names.
 """
 
+import importlib
+from typing import TYPE_CHECKING
+
 __version__ = "1.0.1"
 
-# import instance package only after state is ready
-from .instance import EphyrInstance, RemoteEphyrInstance, Subscription
 from .state import *
+
+# name -> module, imported on first access (PEP 562)
+_LAZY_ATTRIBUTES = {
+    "EphyrInstance": ".instance",
+    "RemoteEphyrInstance": ".instance",
+    "Subscription": ".instance",
+    "SubscriptionMultiplexer": ".instance",
+    "SubscriptionHub": ".instance",
+    "StateReplica": ".instance",
+    "FleetExecutor": ".instance",
+    "FleetSubscription": ".instance",
+    "AsyncRemoteEphyrInstance": ".instance.remote_async",
+}
+
+if TYPE_CHECKING:
+    from .instance import (
+        EphyrInstance,
+        FleetExecutor,
+        FleetSubscription,
+        RemoteEphyrInstance,
+        StateReplica,
+        Subscription,
+        SubscriptionHub,
+        SubscriptionMultiplexer,
+    )
+    from .instance.remote_async import AsyncRemoteEphyrInstance
+
+__all__ = [name for name in dir() if not name.startswith("_")]
+__all__.remove("importlib")
+__all__.remove("TYPE_CHECKING")
+# asynchronous API needs optional dependency, so it is not star-imported
+__all__.extend(name for name in _LAZY_ATTRIBUTES if not name.startswith("Async"))
+
+
+def __getattr__(name: str):
+    try:
+        module_name = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
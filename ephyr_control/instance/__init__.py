@@ -1,3 +1,46 @@
-from .instance import EphyrInstance
-from .remote import RemoteEphyrInstance
-from .subscribe import Subscription
+"""Remote control of Ephyr instances.
+
+Names are imported on first access (PEP 562),
+so using one part of the package does not load network stack of others.
+"""
+
+import importlib
+from typing import TYPE_CHECKING
+
+# name -> module
+_LAZY_ATTRIBUTES = {
+    "FleetExecutor": ".fleet",
+    "FleetSubscription": ".fleet_subscription",
+    "EphyrInstance": ".instance",
+    "RemoteEphyrInstance": ".remote",
+    "Subscription": ".subscribe",
+    "SubscriptionMultiplexer": ".multiplex",
+    "SubscriptionHub": ".hub",
+    "StateReplica": ".replica",
+}
+
+if TYPE_CHECKING:
+    from .fleet import FleetExecutor
+    from .fleet_subscription import FleetSubscription
+    from .hub import SubscriptionHub
+    from .instance import EphyrInstance
+    from .multiplex import SubscriptionMultiplexer
+    from .remote import RemoteEphyrInstance
+    from .replica import StateReplica
+    from .subscribe import Subscription
+
+__all__ = tuple(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str):
+    try:
+        module_name = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
@@ -0,0 +1,236 @@
+"""
+Batching of several operations into one GraphQL document.
+
+Every operation becomes aliased field(s) of a single document,
+with its variables renamed, so the whole batch is sent in one HTTP request:
+
+    batch = MethodCallBatch()
+    for output_id, volume in volumes.items():
+        batch.add(mixin_tune_volume, {..., "output_id": output_id.hex, ...})
+    results = batch.execute(instance)  # [{"tuneVolume": True}, ...]
+"""
+
+import copy
+import dataclasses
+from typing import Any, Dict, List, Optional, Tuple
+
+import graphql
+from gql.transport.exceptions import TransportQueryError
+from graphql import (
+    DocumentNode,
+    FieldNode,
+    NameNode,
+    OperationDefinitionNode,
+    OperationType,
+    VariableNode,
+)
+
+from ephyr_control.instance.constants import EphyrApiPaths
+from ephyr_control.instance.protocols import (
+    AssignedMethodCall,
+    AsyncClientsCollectionProtocol,
+    ClientsCollectionProtocol,
+)
+
+__all__ = (
+    "BatchExecutionError",
+    "MethodCallBatch",
+)
+
+
+class BatchExecutionError(Exception):
+    """Raised when server reported errors for some operations of the batch.
+
+    :param results: data of every operation, None for failed ones
+    :param errors: errors reported for every operation, keyed by its index
+    """
+
+    def __init__(
+        self,
+        message: str,
+        results: List[Optional[dict]],
+        errors: Dict[int, List[Any]],
+    ):
+        super().__init__(message)
+        self.results = results
+        self.errors = errors
+
+
+class _RenameVariables(graphql.Visitor):
+    def __init__(self, prefix: str):
+        super().__init__()
+        self.prefix = prefix
+
+    def enter_variable(self, node: VariableNode, *_) -> VariableNode:
+        return VariableNode(name=NameNode(value=self.prefix + node.name.value))
+
+
+@dataclasses.dataclass
+class MethodCallBatch:
+    """
+    Collects operations of the same API path and type (queries or mutations)
+    and executes them in one round trip.
+
+    :param api_path: API path of all operations, taken from the first one if None
+    """
+
+    api_path: Optional[EphyrApiPaths] = None
+    calls: List[Tuple[AssignedMethodCall, Dict[str, Any]]] = dataclasses.field(
+        default_factory=list
+    )
+
+    # prefix of aliases and variables that belong to n-th operation
+    PREFIX_FORMAT = "b{index}_"
+
+    def __len__(self) -> int:
+        return len(self.calls)
+
+    def add(
+        self,
+        method_call: AssignedMethodCall,
+        variable_values: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        """
+        Add operation to the batch.
+
+        :raises ValueError: if operation does not fit into the batch
+        :param method_call: GraphQL operation
+        :param variable_values: dictionary for variables, optional
+        :return: index of operation's result
+        """
+        if method_call.operation_type == OperationType.SUBSCRIPTION:
+            raise ValueError("Subscriptions can not be batched.")
+        if self.api_path is None:
+            self.api_path = method_call.api_path
+        elif method_call.api_path != self.api_path:
+            raise ValueError(
+                f"Batch is assigned to {self.api_path}, got {method_call.api_path}."
+            )
+        if self.calls and method_call.operation_type != self.operation_type:
+            raise ValueError("Queries and mutations can not be batched together.")
+
+        self.calls.append((method_call, variable_values or {}))
+        return len(self.calls) - 1
+
+    @property
+    def operation_type(self) -> Optional[OperationType]:
+        if not self.calls:
+            return None
+        return self.calls[0][0].operation_type
+
+    def build(self) -> Tuple[AssignedMethodCall, Dict[str, Any]]:
+        """
+        Merge all operations into one.
+
+        :raises ValueError: if batch is empty
+        :return: merged operation and its variables
+        """
+        if not self.calls:
+            raise ValueError("Batch is empty.")
+
+        variable_definitions = []
+        selections = []
+        variable_values = {}
+        for index, (method_call, call_variables) in enumerate(self.calls):
+            prefix = self.PREFIX_FORMAT.format(index=index)
+            operation: OperationDefinitionNode = graphql.visit(
+                method_call.query.definitions[0], _RenameVariables(prefix)
+            )
+            variable_definitions.extend(operation.variable_definitions)
+            for selection in operation.selection_set.selections:
+                aliased = copy.copy(selection)
+                aliased.alias = NameNode(value=prefix + self._response_key(selection))
+                selections.append(aliased)
+            for name, value in call_variables.items():
+                variable_values[prefix + name] = value
+
+        operation = OperationDefinitionNode(
+            operation=self.operation_type,
+            name=NameNode(value="Batch"),
+            variable_definitions=tuple(variable_definitions),
+            directives=(),
+            selection_set=graphql.SelectionSetNode(selections=tuple(selections)),
+        )
+        merged = AssignedMethodCall(
+            api_path=self.api_path,
+            query=DocumentNode(definitions=(operation,)),
+        )
+        return merged, variable_values
+
+    def split(self, data: Optional[dict]) -> List[Optional[dict]]:
+        """
+        Split data returned for merged operation into data of every operation.
+        Keys are the same as if operation was executed alone.
+
+        :param data: data returned from server for merged operation
+        :return: list of data, in order of adding operations
+        """
+        data = data or {}
+        results = []
+        for index, (method_call, _) in enumerate(self.calls):
+            prefix = self.PREFIX_FORMAT.format(index=index)
+            selections = method_call.query.definitions[0].selection_set.selections
+            keys = [self._response_key(selection) for selection in selections]
+            if all(prefix + key in data for key in keys):
+                results.append({key: data[prefix + key] for key in keys})
+            else:
+                results.append(None)
+        return results
+
+    def execute(self, clients: ClientsCollectionProtocol) -> List[dict]:
+        """
+        Execute whole batch in one request.
+
+        :raises BatchExecutionError: if server reported errors
+        :param clients: any object executing method calls, e.g. ClientsCollection
+        or RemoteEphyrInstance
+        :return: list of data, in order of adding operations
+        """
+        merged, variable_values = self.build()
+        try:
+            data = clients.execute(merged, variable_values=variable_values)
+        except TransportQueryError as exc:
+            raise self._error(exc) from exc
+        return self.split(data)
+
+    async def execute_async(
+        self, clients: AsyncClientsCollectionProtocol
+    ) -> List[dict]:
+        """
+        Asynchronous counterpart of execute method.
+
+        :param clients: e.g. AsyncClientsCollection or AsyncRemoteEphyrInstance
+        :return: list of data, in order of adding operations
+        """
+        merged, variable_values = self.build()
+        try:
+            data = await clients.execute(merged, variable_values=variable_values)
+        except TransportQueryError as exc:
+            raise self._error(exc) from exc
+        return self.split(data)
+
+    def _error(self, exc: TransportQueryError) -> BatchExecutionError:
+        errors: Dict[int, List[Any]] = {}
+        for error in exc.errors or ():
+            index = self._index_of_error(error)
+            errors.setdefault(index, []).append(error)
+        return BatchExecutionError(
+            f"Server reported errors for operations {sorted(errors)}: {exc}",
+            results=self.split(exc.data),
+            errors=errors,
+        )
+
+    def _index_of_error(self, error: Any) -> int:
+        """Find index of operation that caused error, -1 if unknown."""
+        path = error.get("path") if isinstance(error, dict) else None
+        if not path:
+            return -1
+        head = str(path[0])
+        for index in range(len(self.calls)):
+            if head.startswith(self.PREFIX_FORMAT.format(index=index)):
+                return index
+        return -1
+
+    @staticmethod
+    def _response_key(selection: FieldNode) -> str:
+        return (selection.alias or selection.name).value
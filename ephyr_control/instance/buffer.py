@@ -0,0 +1,204 @@
+"""
+Bounded buffering of subscription updates for slow consumers.
+
+Websocket transport reads updates as they come and queues them without limit,
+so a consumer slower than server makes memory grow. UpdatesBuffer drains
+the subscription continuously and keeps at most `maxsize` updates,
+discarding or merging the rest according to its policy:
+
+    async with buffered(session.iterate(), BufferPolicy.CONFLATE) as updates:
+        async for info in updates:
+            await slow_write(info)
+
+See example usage in examples/subscribe_buffered.py
+"""
+
+import asyncio
+import collections
+import contextlib
+import dataclasses
+import enum
+from typing import Any, AsyncIterator, Callable, Deque, Hashable, Optional, OrderedDict
+
+__all__ = (
+    "BufferPolicy",
+    "UpdatesBuffer",
+    "buffered",
+)
+
+
+class BufferPolicy(enum.Enum):
+    # keep the first updates, discard new ones while buffer is full
+    FIFO = "fifo"
+    # discard the oldest update to make room for a new one
+    DROP_OLDEST = "drop_oldest"
+    # keep only the latest update per key, oldest key is discarded if full
+    CONFLATE = "conflate"
+
+
+def _single_key(update: Any) -> Hashable:
+    return None
+
+
+@dataclasses.dataclass
+class UpdatesBuffer:
+    """
+    Bounded async queue of updates between subscription and consumer.
+    Iterating it yields updates until source is exhausted,
+    error of source is raised to consumer after buffered updates.
+
+    :param policy: what to do with updates that do not fit
+    :param maxsize: maximal number of buffered updates
+    :param key: key of update for CONFLATE policy, e.g. id of entity;
+    by default all updates share one key, so only the latest one is kept
+    """
+
+    policy: BufferPolicy = BufferPolicy.FIFO
+    maxsize: int = 1000
+    key: Callable[[Any], Hashable] = _single_key
+
+    # counters
+    received: int = dataclasses.field(default=0, init=False)
+    delivered: int = dataclasses.field(default=0, init=False)
+    # discarded because buffer was full
+    dropped: int = dataclasses.field(default=0, init=False)
+    # replaced by newer update with the same key
+    conflated: int = dataclasses.field(default=0, init=False)
+
+    _queue: Deque[Any] = dataclasses.field(
+        default_factory=collections.deque, init=False, repr=False
+    )
+    _latest: OrderedDict[Hashable, Any] = dataclasses.field(
+        default_factory=collections.OrderedDict, init=False, repr=False
+    )
+    _ready: Optional[asyncio.Event] = dataclasses.field(
+        default=None, init=False, repr=False
+    )
+    _closed: bool = dataclasses.field(default=False, init=False, repr=False)
+    _error: Optional[BaseException] = dataclasses.field(
+        default=None, init=False, repr=False
+    )
+
+    def __post_init__(self):
+        if self.maxsize < 1:
+            raise ValueError("maxsize must be positive.")
+
+    def __len__(self) -> int:
+        if self.policy is BufferPolicy.CONFLATE:
+            return len(self._latest)
+        return len(self._queue)
+
+    def _get_ready(self) -> asyncio.Event:
+        # created lazily - event must be created inside running event loop
+        if self._ready is None:
+            self._ready = asyncio.Event()
+        return self._ready
+
+    def put_nowait(self, update: Any) -> bool:
+        """
+        Add update, applying policy if buffer is full.
+        :param update: any object
+        :return: False if update was discarded
+        """
+        self.received += 1
+        if self.policy is BufferPolicy.CONFLATE:
+            key = self.key(update)
+            if key in self._latest:
+                # keeps position of replaced update
+                self._latest[key] = update
+                self.conflated += 1
+                return True
+            if len(self._latest) >= self.maxsize:
+                self._latest.popitem(last=False)
+                self.dropped += 1
+            self._latest[key] = update
+        elif len(self._queue) < self.maxsize:
+            self._queue.append(update)
+        elif self.policy is BufferPolicy.DROP_OLDEST:
+            self._queue.popleft()
+            self._queue.append(update)
+            self.dropped += 1
+        else:
+            self.dropped += 1
+            return False
+        self._get_ready().set()
+        return True
+
+    def close(self, error: Optional[BaseException] = None) -> None:
+        """
+        Mark that no more updates will come.
+        :param error: exception to raise to consumer after buffered updates
+        """
+        self._closed = True
+        self._error = error
+        self._get_ready().set()
+
+    async def get(self) -> Any:
+        """
+        Wait for the next update.
+        :raises StopAsyncIteration: if buffer is closed and empty
+        :return: the oldest buffered update
+        """
+        while not len(self):
+            if self._closed:
+                if self._error is not None:
+                    error, self._error = self._error, None
+                    raise error
+                raise StopAsyncIteration
+            ready = self._get_ready()
+            ready.clear()
+            await ready.wait()
+        self.delivered += 1
+        if self.policy is BufferPolicy.CONFLATE:
+            return self._latest.popitem(last=False)[1]
+        return self._queue.popleft()
+
+    async def pump(self, source: AsyncIterator[Any]) -> None:
+        """
+        Move updates from source into buffer until source is exhausted,
+        then close buffer.
+        :param source: e.g. UpdatesIterator.iterate()
+        """
+        try:
+            async for update in source:
+                self.put_nowait(update)
+        except asyncio.CancelledError:
+            self.close()
+            raise
+        except Exception as exc:
+            self.close(exc)
+        else:
+            self.close()
+
+    def __aiter__(self) -> "UpdatesBuffer":
+        return self
+
+    async def __anext__(self) -> Any:
+        return await self.get()
+
+
+@contextlib.asynccontextmanager
+async def buffered(
+    source: AsyncIterator[Any],
+    policy: BufferPolicy = BufferPolicy.FIFO,
+    maxsize: int = 1000,
+    key: Callable[[Any], Hashable] = _single_key,
+) -> AsyncIterator[UpdatesBuffer]:
+    """
+    Drain source into UpdatesBuffer in background task while in context.
+    Task is cancelled on exit.
+
+    :param source: async iterator of updates
+    :param policy: what to do with updates that do not fit
+    :param maxsize: maximal number of buffered updates
+    :param key: key of update for CONFLATE policy
+    :return: UpdatesBuffer to iterate
+    """
+    buffer = UpdatesBuffer(policy=policy, maxsize=maxsize, key=key)
+    task = asyncio.ensure_future(buffer.pump(source))
+    try:
+        yield buffer
+    finally:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
@@ -0,0 +1,239 @@
+"""
+Response cache of read-only operations of one Ephyr instance.
+
+Queries like `api_get_info` are called many times per minute by health checks,
+and every call is an HTTP round trip. Responses cached for a short time
+are served from memory instead. Any successful mutation sent through
+the same clients collection drops all cached responses, so a read after
+a write never sees data older than the write.
+
+Caching is opt-in, per instance:
+
+    inst = RemoteEphyrInstance(
+        ipv4="1.2.3.4",
+        response_cache=ResponseCache(ttl=5, ttls={"Info": 30}),
+    )
+
+Cached data is returned as is, so it must not be modified.
+"""
+
+import collections
+import dataclasses
+import threading
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Optional,
+    OrderedDict,
+    Tuple,
+)
+
+from graphql import OperationType
+
+from ephyr_control.instance.coalesce import request_key
+from ephyr_control.instance.protocols import AssignedMethodCall
+from ephyr_control.utils.serialization import compact_dtcls_to_json
+
+__all__ = ("ResponseCache",)
+
+_MISSING = object()
+
+
+@dataclasses.dataclass
+class ResponseCache:
+    """
+    LRU cache of responses of query operations with expiration.
+
+    One cache serves one instance - do not share it between instances.
+    Safe to use from several threads.
+
+    Size of response is the length of its compact JSON encoding,
+    which is close to the size of response body.
+
+    :param ttl: seconds a response stays fresh, 0 disables caching
+    :param ttls: {operation name: seconds} overriding ttl for some operations
+    :param maxsize: maximal number of cached responses
+    :param max_bytes: maximal total size of cached responses, None for no limit;
+    least recently used responses are evicted to keep within both limits,
+    and a response larger than max_bytes is not cached at all
+    """
+
+    ttl: float = 5.0
+    ttls: Dict[str, float] = dataclasses.field(default_factory=dict)
+    maxsize: int = 256
+    max_bytes: Optional[int] = 32 * 2**20
+
+    # total size of cached responses, 0 if max_bytes is None
+    nbytes: int = dataclasses.field(default=0, init=False)
+    # counters
+    hits: int = dataclasses.field(default=0, init=False)
+    misses: int = dataclasses.field(default=0, init=False)
+    # removed to make room for new responses
+    evictions: int = dataclasses.field(default=0, init=False)
+    # times cache was cleared by mutation or reconnection
+    invalidations: int = dataclasses.field(default=0, init=False)
+
+    # key -> (expires at, data, size)
+    _entries: OrderedDict[Hashable, Tuple[float, Any, int]] = dataclasses.field(
+        default_factory=collections.OrderedDict, init=False, repr=False
+    )
+    # incremented on invalidation, responses of queries sent before are not stored
+    _generation: int = dataclasses.field(default=0, init=False, repr=False)
+    _lock: threading.Lock = dataclasses.field(
+        default_factory=threading.Lock, init=False, repr=False
+    )
+
+    def __post_init__(self):
+        if self.maxsize < 1:
+            raise ValueError("maxsize must be positive.")
+        if self.max_bytes is not None and self.max_bytes < 1:
+            raise ValueError("max_bytes must be positive.")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    @property
+    def hit_ratio(self) -> float:
+        """Share of lookups served from cache, 0 if there were none."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def ttl_for(self, method_call: AssignedMethodCall) -> float:
+        """
+        Seconds response of operation stays fresh, 0 if it is not cached.
+        Only queries are cached.
+        """
+        if method_call.operation_type is not OperationType.QUERY:
+            return 0
+        return self.ttls.get(method_call.operation_name, self.ttl)
+
+    def get(
+        self,
+        method_call: AssignedMethodCall,
+        variable_values: Optional[Dict[str, Any]] = None,
+        default: Any = None,
+    ) -> Any:
+        """
+        Get fresh cached response, counting hit or miss of cached operation.
+        :param method_call: GraphQL operation
+        :param variable_values: dictionary for variables, optional
+        :param default: returned if there is no fresh response
+        :return: cached data
+        """
+        if self.ttl_for(method_call) <= 0:
+            # not cached, not counted
+            return default
+        key = request_key(method_call, variable_values)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, data, size = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return data
+                del self._entries[key]
+                self.nbytes -= size
+            self.misses += 1
+        return default
+
+    def put(
+        self,
+        method_call: AssignedMethodCall,
+        variable_values: Optional[Dict[str, Any]],
+        data: Any,
+        generation: Optional[int] = None,
+    ) -> None:
+        """
+        Store response, if operation is cached.
+        :param method_call: GraphQL operation
+        :param variable_values: dictionary for variables, optional
+        :param data: response
+        :param generation: value of `generation` when query was sent;
+        response is discarded if cache was invalidated since then
+        """
+        ttl = self.ttl_for(method_call)
+        if ttl <= 0:
+            return
+        size = 0
+        if self.max_bytes is not None:
+            size = len(compact_dtcls_to_json(data))
+            if size > self.max_bytes:
+                return
+        key = request_key(method_call, variable_values)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            replaced = self._entries.pop(key, None)
+            if replaced is not None:
+                self.nbytes -= replaced[2]
+            self._entries[key] = (time.monotonic() + ttl, data, size)
+            self.nbytes += size
+            while len(self._entries) > self.maxsize or (
+                self.max_bytes is not None and self.nbytes > self.max_bytes
+            ):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.nbytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self) -> None:
+        """Drop all cached responses."""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self._generation += 1
+            self.invalidations += 1
+
+    def observe(self, method_call: AssignedMethodCall) -> None:
+        """
+        Invalidate cache if successfully executed operation changes server data.
+        :param method_call: executed GraphQL operation
+        """
+        if method_call.operation_type is OperationType.MUTATION:
+            self.invalidate()
+
+    def execute(
+        self,
+        method_call: AssignedMethodCall,
+        variable_values: Optional[Dict[str, Any]],
+        execute: Callable[[], dict],
+    ) -> dict:
+        """
+        Serve response from cache or execute operation and cache its response.
+        :param method_call: GraphQL operation
+        :param variable_values: dictionary for variables, optional
+        :param execute: function sending operation to server
+        :return: data
+        """
+        data = self.get(method_call, variable_values, default=_MISSING)
+        if data is not _MISSING:
+            return data
+        generation = self._generation
+        data = execute()
+        self.observe(method_call)
+        self.put(method_call, variable_values, data, generation=generation)
+        return data
+
+    async def execute_async(
+        self,
+        method_call: AssignedMethodCall,
+        variable_values: Optional[Dict[str, Any]],
+        execute: Callable[[], Awaitable[dict]],
+    ) -> dict:
+        """Asynchronous counterpart of execute."""
+        data = self.get(method_call, variable_values, default=_MISSING)
+        if data is not _MISSING:
+            return data
+        generation = self._generation
+        data = await execute()
+        self.observe(method_call)
+        self.put(method_call, variable_values, data, generation=generation)
+        return data
@@ -0,0 +1,166 @@
+"""
+Single-flight coalescing of identical concurrent queries.
+
+When many threads or coroutines ask the same server for `export()` at once,
+only the first one sends the request, others wait for it and receive
+the same result (or error). Mutations are never coalesced.
+
+Coalescing is opt-in, per instance:
+
+    inst = AsyncRemoteEphyrInstance(
+        ipv4="1.2.3.4", request_coalescer=RequestCoalescer()
+    )
+
+Shared data is returned to every waiting caller, so it must not be modified.
+"""
+
+import asyncio
+import dataclasses
+import json
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from graphql import OperationType
+
+from ephyr_control.instance.protocols import AssignedMethodCall
+
+__all__ = (
+    "RequestCoalescer",
+    "request_key",
+)
+
+
+def request_key(
+    method_call: AssignedMethodCall, variable_values: Optional[Dict[str, Any]]
+) -> Hashable:
+    """Key identifying request: operation and variables, in any order."""
+    variables = json.dumps(variable_values, sort_keys=True) if variable_values else ""
+    return method_call.api_path, method_call.query_string, variables
+
+
+@dataclasses.dataclass(eq=False)
+class _Call:
+    """Request in flight, executed by thread."""
+
+    done: threading.Event = dataclasses.field(default_factory=threading.Event)
+    result: Any = None
+    error: Optional[BaseException] = None
+
+
+@dataclasses.dataclass
+class RequestCoalescer:
+    """
+    Shares one in-flight request among identical concurrent queries.
+
+    One coalescer serves one instance - do not share it between instances.
+    """
+
+    # requests sent to server
+    executed: int = dataclasses.field(default=0, init=False)
+    # calls served by request of another caller
+    coalesced: int = dataclasses.field(default=0, init=False)
+
+    _calls: Dict[Hashable, _Call] = dataclasses.field(
+        default_factory=dict, init=False, repr=False
+    )
+    _tasks: Dict[Hashable, asyncio.Future] = dataclasses.field(
+        default_factory=dict, init=False, repr=False
+    )
+    _lock: threading.Lock = dataclasses.field(
+        default_factory=threading.Lock, init=False, repr=False
+    )
+
+    @property
+    def in_flight(self) -> int:
+        """Number of requests being executed."""
+        return len(self._calls) + len(self._tasks)
+
+    def forget(self) -> None:
+        """Make later callers send new requests instead of joining current ones."""
+        with self._lock:
+            self._calls.clear()
+        self._tasks.clear()
+
+    def _observe(self, method_call: AssignedMethodCall) -> None:
+        # data read before mutation must not reach callers coming after it
+        if method_call.operation_type is OperationType.MUTATION:
+            self.forget()
+
+    def execute(
+        self,
+        method_call: AssignedMethodCall,
+        variable_values: Optional[Dict[str, Any]],
+        execute: Callable[[], dict],
+    ) -> dict:
+        """
+        Execute operation, or wait for identical query executed by another thread.
+        :param method_call: GraphQL operation
+        :param variable_values: dictionary for variables, optional
+        :param execute: function sending operation to server
+        :return: data
+        """
+        if method_call.operation_type is not OperationType.QUERY:
+            data = execute()
+            self._observe(method_call)
+            return data
+
+        key = request_key(method_call, variable_values)
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = execute()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+
+    async def execute_async(
+        self,
+        method_call: AssignedMethodCall,
+        variable_values: Optional[Dict[str, Any]],
+        execute: Callable[[], Awaitable[dict]],
+    ) -> dict:
+        """
+        Asynchronous counterpart of execute.
+        Shared request runs in its own task, so cancellation of one caller
+        does not affect others.
+        """
+        if method_call.operation_type is not OperationType.QUERY:
+            data = await execute()
+            self._observe(method_call)
+            return data
+
+        key = request_key(method_call, variable_values)
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(execute())
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            # retrieved, so it is not reported if all callers were cancelled
+            task.exception()
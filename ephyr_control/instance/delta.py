@@ -0,0 +1,111 @@
+"""
+Delta deployments of State.
+
+Instead of uploading the whole State, desired State is compared with
+the one exported from server, and only differing restreams are uploaded
+with targeted `import` mutations.
+"""
+
+import dataclasses
+import json
+from typing import Any, Dict, List, Optional
+
+from ephyr_control.state.restream.restream import Restream
+from ephyr_control.state.settings import Settings
+from ephyr_control.state.state import State
+from ephyr_control.utils.serialization import compact_dtcls_to_json
+
+__all__ = (
+    "StateDelta",
+    "normalize_spec",
+    "plan_state_delta",
+    "build_restreams_spec",
+)
+
+# keys assigned by server, they never differ in desired state
+READ_ONLY_KEYS = frozenset({"id"})
+
+
+def normalize_spec(value: Any) -> Any:
+    """
+    Bring exported or serialized spec to comparable form:
+    drop read-only keys and null values.
+    :param value: decoded JSON
+    :return: normalized copy
+    """
+    if isinstance(value, dict):
+        return {
+            key: normalize_spec(item)
+            for key, item in value.items()
+            if item is not None and key not in READ_ONLY_KEYS
+        }
+    if isinstance(value, list):
+        return [normalize_spec(item) for item in value]
+    return value
+
+
+@dataclasses.dataclass
+class StateDelta:
+    """
+    Difference between desired State and State exported from server.
+
+    :param changed: desired restreams that differ from server's, by server's id
+    :param added: desired restreams that server does not have
+    :param removed: ids of server's restreams missing in desired State
+    :param settings: desired settings if they differ from server's, otherwise None
+    """
+
+    changed: Dict[str, Restream] = dataclasses.field(default_factory=dict)
+    added: List[Restream] = dataclasses.field(default_factory=list)
+    removed: List[str] = dataclasses.field(default_factory=list)
+    settings: Optional[Settings] = None
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.changed or self.added or self.removed or self.settings)
+
+
+def plan_state_delta(state: State, exported: dict, replace: bool = False) -> StateDelta:
+    """
+    Compare desired State with exported one, matching restreams by key.
+
+    :param state: desired State
+    :param exported: result of RemoteEphyrInstance.export()
+    :param replace: if True, server's restreams missing in desired State
+    are planned for removal
+    :return: StateDelta
+    """
+    current = {
+        restream["key"]: restream for restream in exported.get("restreams") or ()
+    }
+    delta = StateDelta()
+    for restream in state.restreams:
+        exported_restream = current.pop(restream.key, None)
+        if exported_restream is None:
+            delta.added.append(restream)
+        elif _restream_spec(restream) != normalize_spec(exported_restream):
+            delta.changed[exported_restream["id"]] = restream
+
+    if replace:
+        delta.removed.extend(restream["id"] for restream in current.values())
+
+    if state.settings is not None:
+        exported_settings = normalize_spec(exported.get("settings") or {})
+        if normalize_spec(state.settings.to_dict()) != exported_settings:
+            delta.settings = state.settings
+
+    return delta
+
+
+def _restream_spec(restream: Restream) -> dict:
+    # server does not export defaults, so they are compared in cleaned form
+    return normalize_spec(json.loads(compact_dtcls_to_json(restream, cleanup=True)))
+
+
+def build_restreams_spec(restreams: List[Restream]) -> str:
+    """
+    Build spec for import mutation, containing only given restreams.
+    :param restreams: restreams to include
+    :return: JSON string
+    """
+    return State(restreams=list(restreams)).to_json(cleanup=True, compact=True)
@@ -0,0 +1,313 @@
+"""
+Structural events of `api_subscribe_to_state` subscription.
+
+Server sends the whole `allRestreams` tree on every change.
+StateEventsTracker keeps the previous payload and reports only what changed:
+restreams, outputs and mixins added or removed, statuses and volumes changed.
+Elements are matched by id, never by position.
+
+Payloads are compared subtree by subtree, so unchanged restreams and outputs
+cost one comparison of dicts, and only changed ones are descended into.
+
+See example usage in examples/subscribe_events.py
+"""
+
+import dataclasses
+import enum
+import uuid
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Union
+
+from ephyr_control.instance.subscribe import SubscriptionUpdate
+
+__all__ = (
+    "StateEventKind",
+    "StateEvent",
+    "StateEventsTracker",
+    "iterate_state_events",
+)
+
+
+class StateEventKind(enum.Enum):
+    RESTREAM_ADDED = "restream_added"
+    RESTREAM_REMOVED = "restream_removed"
+    # key or label changed
+    RESTREAM_CHANGED = "restream_changed"
+    # enabled state, source or set of endpoints of input changed
+    INPUT_CHANGED = "input_changed"
+    # status of endpoint of input or of failover input changed
+    ENDPOINT_STATUS_CHANGED = "endpoint_status_changed"
+    OUTPUT_ADDED = "output_added"
+    OUTPUT_REMOVED = "output_removed"
+    OUTPUT_STATUS_CHANGED = "output_status_changed"
+    OUTPUT_VOLUME_CHANGED = "output_volume_changed"
+    # dst, label, enabled state or preview URL changed
+    OUTPUT_CHANGED = "output_changed"
+    MIXIN_ADDED = "mixin_added"
+    MIXIN_REMOVED = "mixin_removed"
+    MIXIN_VOLUME_CHANGED = "mixin_volume_changed"
+    # src, delay or sidechain changed
+    MIXIN_CHANGED = "mixin_changed"
+
+
+@dataclasses.dataclass(frozen=True)
+class StateEvent:
+    """
+    One change of state of Ephyr instance.
+
+    :param kind: what happened
+    :param restream_id: restream the change belongs to
+    :param output_id: output, for output and mixin events
+    :param mixin_id: mixin, for mixin events
+    :param endpoint_id: endpoint, for ENDPOINT_STATUS_CHANGED
+    :param old: previous value - status, volume dict or removed/changed element
+    :param new: current value - status, volume dict or added/changed element
+    """
+
+    kind: StateEventKind
+    restream_id: Optional[uuid.UUID] = None
+    output_id: Optional[uuid.UUID] = None
+    mixin_id: Optional[uuid.UUID] = None
+    endpoint_id: Optional[uuid.UUID] = None
+    old: Any = None
+    new: Any = None
+
+
+def _by_id(items: Optional[Iterable[dict]]) -> Dict[str, dict]:
+    return {item["id"]: item for item in items or ()}
+
+
+def _uuid(value: Optional[str]) -> Optional[uuid.UUID]:
+    return None if value is None else uuid.UUID(value)
+
+
+def _changed(old: dict, new: dict, skipped: Iterable[str]) -> bool:
+    """Whether fields other than skipped ones differ."""
+    skipped = set(skipped)
+    keys = (old.keys() | new.keys()) - skipped
+    return any(old.get(key) != new.get(key) for key in keys)
+
+
+def _endpoint_statuses(input_: Optional[dict]) -> Dict[str, Any]:
+    """Statuses of endpoints of input and its failover inputs, by endpoint id."""
+    statuses = {}
+    if not input_:
+        return statuses
+    for endpoint in input_.get("endpoints") or ():
+        statuses[endpoint["id"]] = endpoint.get("status")
+    for failover_input in (input_.get("src") or {}).get("inputs") or ():
+        statuses.update(_endpoint_statuses(failover_input))
+    return statuses
+
+
+def _without_statuses(input_: Optional[dict]) -> Optional[dict]:
+    """Copy of input with statuses of endpoints removed."""
+    if not input_:
+        return input_
+    result = dict(input_)
+    if "endpoints" in result:
+        result["endpoints"] = [
+            {key: value for key, value in endpoint.items() if key != "status"}
+            for endpoint in result["endpoints"] or ()
+        ]
+    src = result.get("src")
+    if src and "inputs" in src:
+        result["src"] = dict(
+            src, inputs=[_without_statuses(item) for item in src["inputs"] or ()]
+        )
+    return result
+
+
+Ids = Dict[str, uuid.UUID]
+ChildDiffer = Callable[[List[StateEvent], Ids, dict, dict], None]
+
+
+def _diff_children(
+    events: List[StateEvent],
+    ids: Ids,
+    id_name: str,
+    added: StateEventKind,
+    removed: StateEventKind,
+    old_items: Optional[Iterable[dict]],
+    new_items: Optional[Iterable[dict]],
+    diff_child: ChildDiffer,
+) -> None:
+    """
+    Match elements of lists by id, report added and removed ones,
+    and descend into changed ones.
+    """
+    previous = _by_id(old_items)
+    current = _by_id(new_items)
+    for child_id, old in previous.items():
+        if child_id not in current:
+            child_ids = dict(ids, **{id_name: _uuid(child_id)})
+            events.append(StateEvent(removed, old=old, **child_ids))
+    for child_id, new in current.items():
+        old = previous.get(child_id)
+        if old is None:
+            child_ids = dict(ids, **{id_name: _uuid(child_id)})
+            events.append(StateEvent(added, new=new, **child_ids))
+        elif old != new:
+            child_ids = dict(ids, **{id_name: _uuid(child_id)})
+            diff_child(events, child_ids, old, new)
+
+
+def _diff_mixin(events: List[StateEvent], ids: Ids, old: dict, new: dict) -> None:
+    if old.get("volume") != new.get("volume"):
+        events.append(
+            StateEvent(
+                StateEventKind.MIXIN_VOLUME_CHANGED,
+                old=old.get("volume"),
+                new=new.get("volume"),
+                **ids,
+            )
+        )
+    if _changed(old, new, skipped=("volume",)):
+        events.append(StateEvent(StateEventKind.MIXIN_CHANGED, old=old, new=new, **ids))
+
+
+def _diff_output(events: List[StateEvent], ids: Ids, old: dict, new: dict) -> None:
+    if old.get("status") != new.get("status"):
+        events.append(
+            StateEvent(
+                StateEventKind.OUTPUT_STATUS_CHANGED,
+                old=old.get("status"),
+                new=new.get("status"),
+                **ids,
+            )
+        )
+    if old.get("volume") != new.get("volume"):
+        events.append(
+            StateEvent(
+                StateEventKind.OUTPUT_VOLUME_CHANGED,
+                old=old.get("volume"),
+                new=new.get("volume"),
+                **ids,
+            )
+        )
+    if _changed(old, new, skipped=("status", "volume", "mixins")):
+        events.append(
+            StateEvent(StateEventKind.OUTPUT_CHANGED, old=old, new=new, **ids)
+        )
+
+    old_mixins, new_mixins = old.get("mixins"), new.get("mixins")
+    if old_mixins != new_mixins:
+        _diff_children(
+            events,
+            ids,
+            "mixin_id",
+            StateEventKind.MIXIN_ADDED,
+            StateEventKind.MIXIN_REMOVED,
+            old_mixins,
+            new_mixins,
+            _diff_mixin,
+        )
+
+
+def _diff_input(events: List[StateEvent], ids: Ids, old: dict, new: dict) -> None:
+    old_statuses = _endpoint_statuses(old)
+    for endpoint_id, status in _endpoint_statuses(new).items():
+        if endpoint_id in old_statuses and old_statuses[endpoint_id] != status:
+            events.append(
+                StateEvent(
+                    StateEventKind.ENDPOINT_STATUS_CHANGED,
+                    endpoint_id=_uuid(endpoint_id),
+                    old=old_statuses[endpoint_id],
+                    new=status,
+                    **ids,
+                )
+            )
+    if _without_statuses(old) != _without_statuses(new):
+        events.append(StateEvent(StateEventKind.INPUT_CHANGED, old=old, new=new, **ids))
+
+
+def _diff_restream(events: List[StateEvent], ids: Ids, old: dict, new: dict) -> None:
+    if _changed(old, new, skipped=("input", "outputs")):
+        events.append(
+            StateEvent(StateEventKind.RESTREAM_CHANGED, old=old, new=new, **ids)
+        )
+
+    old_input, new_input = old.get("input"), new.get("input")
+    if old_input != new_input:
+        _diff_input(events, ids, old_input, new_input)
+
+    old_outputs, new_outputs = old.get("outputs"), new.get("outputs")
+    if old_outputs != new_outputs:
+        _diff_children(
+            events,
+            ids,
+            "output_id",
+            StateEventKind.OUTPUT_ADDED,
+            StateEventKind.OUTPUT_REMOVED,
+            old_outputs,
+            new_outputs,
+            _diff_output,
+        )
+
+
+@dataclasses.dataclass
+class StateEventsTracker:
+    """
+    Converts consecutive payloads of `api_subscribe_to_state` into events.
+
+    :param emit_initial: report restreams of the first payload as added,
+    otherwise it only becomes the baseline
+    """
+
+    emit_initial: bool = True
+
+    # restreams of previous payload, None before the first payload
+    restreams: Optional[List[dict]] = dataclasses.field(
+        default=None, init=False, repr=False
+    )
+
+    def reset(self) -> None:
+        """Forget previous payload, the next one becomes the baseline."""
+        self.restreams = None
+
+    def feed(self, payload: Dict[str, Any]) -> List[StateEvent]:
+        """
+        Compare payload with the previous one.
+        :param payload: data of subscription, with `allRestreams` list
+        :return: events, empty list if nothing changed
+        """
+        current = payload["allRestreams"]
+        previous, self.restreams = self.restreams, current
+        if previous is None and not self.emit_initial:
+            return []
+
+        events: List[StateEvent] = []
+        _diff_children(
+            events,
+            {},
+            "restream_id",
+            StateEventKind.RESTREAM_ADDED,
+            StateEventKind.RESTREAM_REMOVED,
+            previous,
+            current,
+            _diff_restream,
+        )
+        return events
+
+
+async def iterate_state_events(
+    updates: AsyncIterator[Union[Dict[str, Any], SubscriptionUpdate]],
+    tracker: Optional[StateEventsTracker] = None,
+) -> AsyncIterator[StateEvent]:
+    """
+    Convert iterator of `api_subscribe_to_state` payloads into iterator of events.
+
+    Works with UpdatesIterator.iterate() and with resilient iterators:
+    resync payload after reconnection is compared with the last payload
+    before disconnection, so changes made in between are reported too.
+
+    :param updates: async iterator of payloads or SubscriptionUpdate
+    :param tracker: keeps previous payload, new one is created if None
+    :return: async iterator of StateEvent
+    """
+    if tracker is None:
+        tracker = StateEventsTracker()
+    async for update in updates:
+        if isinstance(update, SubscriptionUpdate):
+            update = update.data
+        for event in tracker.feed(update):
+            yield event
@@ -0,0 +1,255 @@
+"""
+Fan-out of operations across many Ephyr instances.
+
+Works with both RemoteEphyrInstance (blocking calls are run in threads)
+and AsyncRemoteEphyrInstance (coroutines are awaited in event loop).
+"""
+
+import asyncio
+import concurrent.futures
+import dataclasses
+import inspect
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Collection,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from ephyr_control.instance.protocols import AssignedMethodCall, EphyrInstanceProtocol
+
+__all__ = (
+    "FleetResult",
+    "FleetReport",
+    "FleetExecutor",
+)
+
+FleetCall = Union[AssignedMethodCall, str, Callable[..., Any]]
+""" What to call on every instance:
+* AssignedMethodCall - executed with instance.execute
+* str - name of instance method, e.g. "export"
+* bound method of any instance, e.g. inst.export - method of the same name
+  is called on every instance
+* other callable - called with instance as first argument,
+  e.g. RemoteEphyrInstance.export
+"""
+
+
+@dataclasses.dataclass(frozen=True)
+class FleetResult:
+    """
+    Outcome of operation on one instance.
+
+    :param instance: instance the operation was called on
+    :param value: returned value, if succeeded
+    :param error: raised exception, if failed (asyncio.TimeoutError on deadline)
+    :param queued: seconds spent waiting for free concurrency slot
+    :param elapsed: seconds spent on the call itself
+    """
+
+    instance: EphyrInstanceProtocol
+    value: Any = None
+    error: Optional[BaseException] = None
+    queued: float = 0.0
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclasses.dataclass(frozen=True)
+class FleetReport:
+    """All results of one fleet-wide operation, in order of completion."""
+
+    results: Tuple[FleetResult, ...]
+    elapsed: float
+
+    @property
+    def succeeded(self) -> Tuple[FleetResult, ...]:
+        return tuple(r for r in self.results if r.ok)
+
+    @property
+    def failed(self) -> Tuple[FleetResult, ...]:
+        return tuple(r for r in self.results if not r.ok)
+
+    def timings(self) -> Dict[str, float]:
+        """Total call time spent on every host, in seconds."""
+        timings: Dict[str, float] = {}
+        for result in self.results:
+            host = result.instance.host
+            timings[host] = timings.get(host, 0.0) + result.elapsed
+        return timings
+
+
+@dataclasses.dataclass
+class FleetExecutor:
+    """
+    Runs the same operation on many instances concurrently.
+
+    Failure or timeout of one instance never affects others -
+    it is reported in its FleetResult.
+
+    :param concurrency: maximum number of calls in flight across all instances
+    :param per_host_concurrency: maximum number of calls in flight to one host
+    :param timeout: deadline of every call in seconds, None for no deadline.
+    Note that blocking call which exceeded deadline keeps its thread busy
+    until underlying HTTP request is over.
+    """
+
+    concurrency: int = 32
+    per_host_concurrency: int = 1
+    timeout: Optional[float] = None
+
+    def __post_init__(self):
+        if self.concurrency < 1 or self.per_host_concurrency < 1:
+            raise ValueError("Concurrency limits must be positive.")
+
+    async def stream(
+        self,
+        instances: Collection[EphyrInstanceProtocol],
+        call: FleetCall,
+        *args,
+        **kwargs,
+    ) -> AsyncIterator[FleetResult]:
+        """
+        Run operation on every instance, yield results as they complete.
+
+        :param instances: instances to run operation on
+        :param call: operation, see FleetCall
+        :param args: extra positional arguments of the call
+        :param kwargs: extra keyword arguments of the call,
+        e.g. variable_values for AssignedMethodCall
+        :return: async iterator of FleetResult
+        """
+        limit = asyncio.Semaphore(self.concurrency)
+        host_limits: Dict[str, asyncio.Semaphore] = {}
+        threads = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.concurrency,
+            thread_name_prefix="FleetExecutor",
+        )
+        tasks = []
+        for instance in instances:
+            if instance.host not in host_limits:
+                host_limits[instance.host] = asyncio.Semaphore(
+                    self.per_host_concurrency
+                )
+            tasks.append(
+                asyncio.ensure_future(
+                    self._run_one(
+                        instance,
+                        call,
+                        args,
+                        kwargs,
+                        limits=(limit, host_limits[instance.host]),
+                        threads=threads,
+                    )
+                )
+            )
+
+        try:
+            for completed in asyncio.as_completed(tasks):
+                yield await completed
+        finally:
+            for task in tasks:
+                task.cancel()
+            threads.shutdown(wait=False)
+
+    def run(
+        self,
+        instances: Collection[EphyrInstanceProtocol],
+        call: FleetCall,
+        *args,
+        **kwargs,
+    ) -> FleetReport:
+        """
+        Blocking counterpart of stream method.
+        Can not be called from running event loop.
+
+        :return: FleetReport with all results
+        """
+        return asyncio.run(self.gather(instances, call, *args, **kwargs))
+
+    async def gather(
+        self,
+        instances: Collection[EphyrInstanceProtocol],
+        call: FleetCall,
+        *args,
+        **kwargs,
+    ) -> FleetReport:
+        """
+        Run operation on every instance and wait for all results.
+
+        :return: FleetReport with all results
+        """
+        started = time.monotonic()
+        results = [
+            result async for result in self.stream(instances, call, *args, **kwargs)
+        ]
+        return FleetReport(results=tuple(results), elapsed=time.monotonic() - started)
+
+    async def _run_one(  # noqa: WPS211
+        self,
+        instance: EphyrInstanceProtocol,
+        call: FleetCall,
+        args: tuple,
+        kwargs: dict,
+        limits: Tuple[asyncio.Semaphore, ...],
+        threads: concurrent.futures.Executor,
+    ) -> FleetResult:
+        queued_since = time.monotonic()
+        global_limit, host_limit = limits
+        # waiting for busy host must not take a global slot from other hosts
+        async with host_limit, global_limit:
+            started = time.monotonic()
+            try:
+                value = await asyncio.wait_for(
+                    self._call(instance, call, args, kwargs, threads),
+                    timeout=self.timeout,
+                )
+            except Exception as exc:
+                return FleetResult(
+                    instance=instance,
+                    error=exc,
+                    queued=started - queued_since,
+                    elapsed=time.monotonic() - started,
+                )
+            return FleetResult(
+                instance=instance,
+                value=value,
+                queued=started - queued_since,
+                elapsed=time.monotonic() - started,
+            )
+
+    @staticmethod
+    async def _call(
+        instance: EphyrInstanceProtocol,
+        call: FleetCall,
+        args: tuple,
+        kwargs: dict,
+        threads: concurrent.futures.Executor,
+    ) -> Any:
+        if isinstance(call, AssignedMethodCall):
+            func, args = instance.execute, (call, *args)
+        elif isinstance(call, str):
+            func = getattr(instance, call)
+        elif inspect.ismethod(call) and not isinstance(call.__self__, type):
+            # bound to another instance, classmethods are called as they are
+            func = getattr(instance, call.__name__)
+        else:
+            func, args = call, (instance, *args)
+
+        if inspect.iscoroutinefunction(func):
+            return await func(*args, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(threads, lambda: func(*args, **kwargs))
+        if inspect.isawaitable(result):
+            result = await result
+        return result
@@ -0,0 +1,262 @@
+"""
+One subscription operation on many Ephyr instances, merged into one stream.
+
+Every instance has its own resilient subscription and small bounded buffer,
+while the consumer takes updates from instances in round-robin order,
+so a chatty instance can not delay updates of others.
+
+See example usage in examples/subscribe_fleet.py
+"""
+
+import asyncio
+import collections
+import dataclasses
+import time
+from typing import Any, Collection, Deque, Dict, List, Optional
+
+from ephyr_control.instance.buffer import BufferPolicy, UpdatesBuffer
+from ephyr_control.instance.protocols import AssignedMethodCall, EphyrInstanceProtocol
+from ephyr_control.instance.subscribe import Subscription
+from ephyr_control.utils.backoff import Backoff
+
+__all__ = (
+    "FleetUpdate",
+    "InstanceSubscriptionStatus",
+    "FleetSubscription",
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class FleetUpdate:
+    """
+    Update of one instance of the fleet.
+
+    :param instance: instance the update came from
+    :param data: payload of operation
+    :param resync: True for the first payload after reconnection
+    :param received_at: time.monotonic() when update was received
+    """
+
+    instance: EphyrInstanceProtocol
+    data: dict
+    resync: bool = False
+    received_at: float = 0.0
+
+
+@dataclasses.dataclass(eq=False)
+class InstanceSubscriptionStatus:
+    """
+    State of subscription of one instance.
+
+    :param instance: subscribed instance
+    :param updates: number of received updates
+    :param last_update_at: time.monotonic() of the last received update
+    :param lag: seconds the last delivered update waited for consumer
+    :param reconnects: number of reconnections
+    :param error: error subscription stopped with, it is not retried anymore
+    :param finished: subscription is not running anymore
+    """
+
+    instance: EphyrInstanceProtocol
+    updates: int = 0
+    last_update_at: Optional[float] = None
+    lag: float = 0.0
+    reconnects: int = 0
+    error: Optional[BaseException] = None
+    finished: bool = False
+
+    buffer: Optional[UpdatesBuffer] = dataclasses.field(default=None, repr=False)
+    # is waiting in line of consumer
+    queued: bool = dataclasses.field(default=False, repr=False)
+
+    @property
+    def staleness(self) -> Optional[float]:
+        """Seconds since the last received update, None if there were none."""
+        if self.last_update_at is None:
+            return None
+        return time.monotonic() - self.last_update_at
+
+
+@dataclasses.dataclass
+class FleetSubscription:
+    """
+    Runs the same subscription operation on many instances
+    and merges their updates into one async iterator of FleetUpdate.
+
+    Failure of one instance never affects others: its subscription reconnects
+    with backoff, and if it gives up, the error is kept in its status.
+    Acts as async context manager - starts subscriptions on enter
+    and stops them on exit.
+
+    :param instances: instances to subscribe to
+    :param method_call: subscription operation
+    :param variable_values: dict of variables of operation
+    :param policy: buffering of updates of every instance waiting for consumer,
+    by default only the latest one is kept
+    :param maxsize: maximal number of buffered updates of every instance
+    :param backoff: delays between reconnection attempts
+    :param max_attempts: reconnection attempts in a row before giving up
+    on instance, None to retry forever
+    :param max_connecting: maximal number of connections being opened at once,
+    a slot is held only during handshake, not while waiting for data
+    :param connect_timeout: seconds to open connection and to get its
+    acknowledgement from server each
+    :param compression: negotiate per-message compression, disabled by default
+    to save memory of thousands of connections
+    """
+
+    instances: Collection[EphyrInstanceProtocol]
+    method_call: AssignedMethodCall
+    variable_values: Optional[Dict[str, Any]] = None
+    policy: BufferPolicy = BufferPolicy.CONFLATE
+    maxsize: int = 1
+    backoff: Backoff = dataclasses.field(default_factory=Backoff)
+    max_attempts: Optional[int] = None
+    max_connecting: int = 100
+    connect_timeout: float = 10.0
+    compression: bool = False
+
+    statuses: List[InstanceSubscriptionStatus] = dataclasses.field(
+        default_factory=list, init=False, repr=False
+    )
+    _tasks: List[asyncio.Task] = dataclasses.field(
+        default_factory=list, init=False, repr=False
+    )
+    # statuses of instances having buffered updates, in order of service
+    _ready: Deque[InstanceSubscriptionStatus] = dataclasses.field(
+        default_factory=collections.deque, init=False, repr=False
+    )
+    _wakeup: Optional[asyncio.Event] = dataclasses.field(
+        default=None, init=False, repr=False
+    )
+    _running: int = dataclasses.field(default=0, init=False, repr=False)
+
+    def __post_init__(self):
+        if self.max_connecting < 1:
+            raise ValueError("max_connecting must be positive.")
+
+    def status(self, instance: EphyrInstanceProtocol) -> InstanceSubscriptionStatus:
+        """
+        Get status of instance subscription.
+        :raises LookupError: if instance is not in the fleet
+        """
+        for status in self.statuses:
+            if status.instance is instance:
+                return status
+        raise LookupError(f"{instance.host} is not subscribed.")
+
+    def lags(self) -> Dict[str, float]:
+        """Lag of the last delivered update of every host, in seconds."""
+        return {status.instance.host: status.lag for status in self.statuses}
+
+    @property
+    def running(self) -> int:
+        """Number of subscriptions that are still running."""
+        return self._running
+
+    async def start(self) -> None:
+        """Start subscriptions of all instances."""
+        if self._tasks:
+            raise RuntimeError("Fleet subscription is already started.")
+        self._wakeup = asyncio.Event()
+        connecting = asyncio.Semaphore(self.max_connecting)
+        self.statuses = [
+            InstanceSubscriptionStatus(
+                instance=instance,
+                buffer=UpdatesBuffer(policy=self.policy, maxsize=self.maxsize),
+            )
+            for instance in self.instances
+        ]
+        self._running = len(self.statuses)
+        self._tasks = [
+            asyncio.ensure_future(self._run_one(status, connecting))
+            for status in self.statuses
+        ]
+
+    async def stop(self) -> None:
+        """Stop all subscriptions and close their connections."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def __aenter__(self) -> "FleetSubscription":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    def __aiter__(self) -> "FleetSubscription":
+        return self
+
+    async def __anext__(self) -> FleetUpdate:
+        if self._wakeup is None:
+            raise RuntimeError("Fleet subscription is not started.")
+        while True:
+            while self._ready:
+                status = self._ready.popleft()
+                status.queued = False
+                if not len(status.buffer):
+                    continue
+                update = await status.buffer.get()
+                if len(status.buffer):
+                    # back to the end of the line, after other instances
+                    self._enqueue(status)
+                status.lag = time.monotonic() - update.received_at
+                return update
+            if not self.running:
+                raise StopAsyncIteration
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    def _enqueue(self, status: InstanceSubscriptionStatus) -> None:
+        if not status.queued:
+            status.queued = True
+            self._ready.append(status)
+
+    async def _run_one(
+        self, status: InstanceSubscriptionStatus, connecting: asyncio.Semaphore
+    ) -> None:
+        updates = Subscription(
+            instance=status.instance,
+            method_call=self.method_call,
+            compression=self.compression,
+            connect_timeout=self.connect_timeout,
+        ).resilient(
+            variable_values=self.variable_values,
+            backoff=self.backoff,
+            max_attempts=self.max_attempts,
+            # limits the number of handshakes at once, including reconnections
+            connect_limit=connecting,
+        )
+        iterator = updates.__aiter__()
+        try:
+            update = await iterator.__anext__()
+            while True:
+                now = time.monotonic()
+                status.updates += 1
+                status.last_update_at = now
+                status.reconnects = updates.reconnects
+                status.buffer.put_nowait(
+                    FleetUpdate(
+                        instance=status.instance,
+                        data=update.data,
+                        resync=update.resync,
+                        received_at=now,
+                    )
+                )
+                self._enqueue(status)
+                self._wakeup.set()
+                update = await iterator.__anext__()
+        except StopAsyncIteration:
+            pass
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            status.error = exc
+        finally:
+            status.finished = True
+            self._running -= 1
+            await updates.close()
+            self._wakeup.set()
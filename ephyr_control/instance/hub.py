@@ -0,0 +1,189 @@
+"""
+Local broadcast of subscriptions shared by many consumers.
+
+Every SubscriptionSession opens its own websocket, and its payloads are
+parsed and decoded separately. SubscriptionHub keeps one upstream subscription
+per instance, operation and variables, decodes every payload once and
+fans it out to any number of local subscribers:
+
+    hub = SubscriptionHub(decoders={"State": decode_state})
+    subscription = Subscription(instance, api_subscribe_to_state)
+    async for update in hub.subscribe(subscription):
+        state = update.data
+
+Decoded values are shared by all subscribers, so they must not be modified.
+
+See example usage in examples/subscribe_hub.py
+"""
+
+import asyncio
+import contextlib
+import dataclasses
+import json
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from ephyr_control.instance.buffer import BufferPolicy, UpdatesBuffer
+from ephyr_control.instance.subscribe import (
+    ResilientUpdatesIterator,
+    Subscription,
+    SubscriptionUpdate,
+)
+
+__all__ = (
+    "SubscriptionHub",
+    "Topic",
+)
+
+# websocket URL, query text, encoded variables
+TopicKey = Tuple[str, str, str]
+
+
+@dataclasses.dataclass(eq=False)
+class Topic:
+    """
+    One upstream subscription and its local subscribers.
+
+    :param key: identifies instance, operation and variables
+    :param updates: upstream iterator
+    :param buffers: queues of local subscribers
+    :param last: the latest update, replayed to new subscribers
+    :param received: number of upstream updates, each decoded once
+    """
+
+    key: TopicKey
+    updates: ResilientUpdatesIterator
+    buffers: List[UpdatesBuffer] = dataclasses.field(default_factory=list)
+    last: Optional[SubscriptionUpdate] = None
+    received: int = 0
+    task: Optional[asyncio.Task] = dataclasses.field(default=None, repr=False)
+
+
+def _topic_key(
+    subscription: Subscription, variable_values: Optional[Dict[str, Any]]
+) -> TopicKey:
+    return (
+        str(subscription.build_ws_url()),
+        subscription.method_call.query_string,
+        json.dumps(variable_values or {}, sort_keys=True),
+    )
+
+
+@dataclasses.dataclass
+class SubscriptionHub:
+    """
+    Registry of shared upstream subscriptions.
+
+    Upstream is started by the first local subscriber
+    and stopped when the last one leaves. It reconnects if connection drops.
+
+    :param decoders: {operation name: function decoding payload}, payloads
+    of other operations are passed as is
+    :param replay_last: new subscriber first receives the latest update,
+    useful for operations sending full snapshots, like state
+    :param maxsize: default bound of queue of every local subscriber
+    :param policy: default policy of queue of every local subscriber,
+    a slow subscriber never delays others
+    """
+
+    decoders: Dict[str, Callable[[dict], Any]] = dataclasses.field(default_factory=dict)
+    replay_last: bool = True
+    maxsize: int = 100
+    policy: BufferPolicy = BufferPolicy.DROP_OLDEST
+
+    topics: Dict[TopicKey, Topic] = dataclasses.field(
+        default_factory=dict, init=False, repr=False
+    )
+
+    async def subscribe(
+        self,
+        subscription: Subscription,
+        variable_values: Optional[Dict[str, Any]] = None,
+        maxsize: Optional[int] = None,
+        policy: Optional[BufferPolicy] = None,
+    ) -> AsyncIterator[SubscriptionUpdate]:
+        """
+        Receive updates of shared upstream subscription.
+        Leaving iteration unsubscribes.
+
+        :param subscription: defines instance and operation
+        :param variable_values: dict of variables of operation
+        :param maxsize: bound of own queue, hub's default if None
+        :param policy: policy of own queue, hub's default if None
+        :return: async iterator of SubscriptionUpdate with decoded data
+        """
+        buffer = UpdatesBuffer(
+            policy=policy or self.policy,
+            maxsize=maxsize or self.maxsize,
+        )
+        topic = self._join(subscription, variable_values, buffer)
+        try:
+            async for update in buffer:
+                yield update
+        finally:
+            await self._leave(topic, buffer)
+
+    def _join(
+        self,
+        subscription: Subscription,
+        variable_values: Optional[Dict[str, Any]],
+        buffer: UpdatesBuffer,
+    ) -> Topic:
+        key = _topic_key(subscription, variable_values)
+        topic = self.topics.get(key)
+        if topic is None:
+            topic = self.topics[key] = Topic(
+                key=key, updates=subscription.resilient(variable_values)
+            )
+            decode = self.decoders.get(subscription.method_call.operation_name)
+            topic.task = asyncio.ensure_future(self._run(topic, decode))
+        elif self.replay_last and topic.last is not None:
+            buffer.put_nowait(topic.last)
+        topic.buffers.append(buffer)
+        return topic
+
+    async def _leave(self, topic: Topic, buffer: UpdatesBuffer) -> None:
+        topic.buffers.remove(buffer)
+        if topic.buffers:
+            return
+        if self.topics.get(topic.key) is topic:
+            del self.topics[topic.key]
+        topic.task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await topic.task
+
+    async def _run(self, topic: Topic, decode: Optional[Callable[[dict], Any]]) -> None:
+        error = None
+        try:
+            async for update in topic.updates:
+                if decode is not None:
+                    update = SubscriptionUpdate(
+                        data=decode(update.data), resync=update.resync
+                    )
+                topic.received += 1
+                topic.last = update
+                for buffer in topic.buffers:
+                    buffer.put_nowait(update)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            error = exc
+        finally:
+            await topic.updates.close()
+            if self.topics.get(topic.key) is topic:
+                # subscribers joining later start a new upstream
+                del self.topics[topic.key]
+            for buffer in topic.buffers:
+                buffer.close(error)
+
+    async def close(self) -> None:
+        """Stop all upstream subscriptions, local subscribers stop iterating."""
+        topics, self.topics = list(self.topics.values()), {}
+        for topic in topics:
+            topic.task.cancel()
+        await asyncio.gather(*(topic.task for topic in topics), return_exceptions=True)
+
+    async def __aenter__(self) -> "SubscriptionHub":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
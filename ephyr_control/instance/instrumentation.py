@@ -0,0 +1,365 @@
+"""
+Instrumentation of requests sent to Ephyr servers.
+
+Every request of an instrumented client is passed to hooks
+before it is sent and after it completes, with its operation, API path,
+host, size of request and response, duration and error. Subclass
+Instrumentation to plug own hooks, or use MetricsCollector, which keeps
+latency histograms, bytes, errors and in-flight counts in memory:
+
+    metrics = MetricsCollector()
+    inst = RemoteEphyrInstance(ipv4="1.2.3.4", instrumentation=metrics)
+    inst.get_info()
+    print(metrics.to_text())
+
+One collector may serve any number of instances, metrics are kept by host.
+Clients without instrumentation do not pay for it.
+
+See example usage in examples/instrumentation.py
+"""
+
+import asyncio
+import bisect
+import collections
+import dataclasses
+import json
+import sys
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from gql.transport.exceptions import (
+    TransportError,
+    TransportProtocolError,
+    TransportQueryError,
+    TransportServerError,
+)
+from graphql import ExecutionResult
+
+from ephyr_control.instance.constants import EphyrApiPaths
+from ephyr_control.instance.transport import unwrap_result
+
+__all__ = (
+    "CallInfo",
+    "Instrumentation",
+    "InstrumentationGroup",
+    "LatencyHistogram",
+    "CallMetrics",
+    "MetricsCollector",
+    "error_category",
+)
+
+# (result, size of response in bytes)
+SizedResult = Tuple[ExecutionResult, int]
+
+# upper bounds of latency buckets, seconds
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+)
+
+
+@dataclasses.dataclass(eq=False)
+class CallInfo:
+    """
+    One request, passed to hooks.
+    Fields after `request_bytes` are set when request completes.
+
+    :param host: host of server
+    :param api_path: API path of operation
+    :param operation_name: name of GraphQL operation
+    :param request_bytes: size of request body
+    :param started_at: time.perf_counter() when request was sent
+    :param duration: seconds request took
+    :param response_bytes: size of response body, None if there was none
+    :param error: exception request failed with
+    """
+
+    host: Optional[str]
+    api_path: EphyrApiPaths
+    operation_name: Optional[str]
+    request_bytes: int
+    started_at: float = 0.0
+    duration: Optional[float] = None
+    response_bytes: Optional[int] = None
+    error: Optional[BaseException] = None
+
+
+def error_category(exc: BaseException) -> str:
+    """
+    Short name of kind of error, to count errors by.
+    :param exc: exception request failed with
+    :return: one of "query", "server", "protocol", "timeout", "connection",
+    "cancelled", "other"
+    """
+    if isinstance(exc, TransportQueryError):
+        return "query"
+    if isinstance(exc, TransportServerError):
+        return "server"
+    if isinstance(exc, TransportProtocolError):
+        return "protocol"
+    if isinstance(exc, asyncio.CancelledError):
+        return "cancelled"
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError)):
+        return "timeout"
+    # requests.Timeout is not TimeoutError
+    if "Timeout" in type(exc).__name__:
+        return "timeout"
+    aiohttp = sys.modules.get("aiohttp")
+    if isinstance(exc, (TransportError, OSError)) or (
+        aiohttp is not None and isinstance(exc, aiohttp.ClientError)
+    ):
+        return "connection"
+    return "other"
+
+
+class Instrumentation:
+    """
+    Hooks called around every request of instrumented client.
+    Hooks must be fast and must not raise, they run on the hot path.
+    """
+
+    def before_call(self, call: CallInfo) -> None:
+        """Called before request is sent."""
+
+    def after_call(self, call: CallInfo) -> None:
+        """Called when request completed, successfully or not."""
+
+    def run(self, call: CallInfo, send: Callable[[], SizedResult]) -> dict:
+        """
+        Send request between hooks.
+        :param call: request info, completed by this method
+        :param send: function sending request
+        :return: data
+        """
+        self.before_call(call)
+        call.started_at = time.perf_counter()
+        try:
+            result, call.response_bytes = send()
+            return unwrap_result(result)
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            call.duration = time.perf_counter() - call.started_at
+            self.after_call(call)
+
+    async def run_async(
+        self, call: CallInfo, send: Callable[[], Awaitable[SizedResult]]
+    ) -> dict:
+        """Asynchronous counterpart of run."""
+        self.before_call(call)
+        call.started_at = time.perf_counter()
+        try:
+            result, call.response_bytes = await send()
+            return unwrap_result(result)
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            call.duration = time.perf_counter() - call.started_at
+            self.after_call(call)
+
+
+class InstrumentationGroup(Instrumentation):
+    """Calls hooks of several instrumentations, in order."""
+
+    def __init__(self, *instrumentations: Instrumentation):
+        self.instrumentations = instrumentations
+
+    def before_call(self, call: CallInfo) -> None:
+        for instrumentation in self.instrumentations:
+            instrumentation.before_call(call)
+
+    def after_call(self, call: CallInfo) -> None:
+        for instrumentation in self.instrumentations:
+            instrumentation.after_call(call)
+
+
+@dataclasses.dataclass
+class LatencyHistogram:
+    """
+    Counts of latencies in buckets with fixed upper bounds,
+    the last bucket counts latencies above all bounds.
+    """
+
+    bounds: Tuple[float, ...] = LATENCY_BUCKETS
+    counts: List[int] = dataclasses.field(init=False)
+    total: float = 0.0
+    maximum: float = 0.0
+
+    def __post_init__(self):
+        self.counts = [0] * (len(self.bounds) + 1)
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate quantile, interpolating linearly inside bucket it falls into.
+        :param q: between 0 and 1, e.g. 0.99
+        :return: seconds, None if nothing was observed
+        """
+        count = self.count
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                if index == len(self.bounds):
+                    return self.maximum
+                lower = self.bounds[index - 1] if index else 0.0
+                upper = min(self.bounds[index], self.maximum)
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.maximum
+
+    def to_dict(self) -> Dict[str, Any]:
+        buckets = {str(bound): count for bound, count in zip(self.bounds, self.counts)}
+        buckets["+Inf"] = self.counts[-1]
+        count = self.count
+        return {
+            "count": count,
+            "mean": self.total / count if count else None,
+            "max": self.maximum,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "buckets": buckets,
+        }
+
+
+@dataclasses.dataclass
+class CallMetrics:
+    """Metrics of one operation on one API path of one host."""
+
+    calls: int = 0
+    in_flight: int = 0
+    bytes_out: int = 0
+    bytes_in: int = 0
+    errors: Dict[str, int] = dataclasses.field(default_factory=collections.Counter)
+    latency: LatencyHistogram = dataclasses.field(default_factory=LatencyHistogram)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "in_flight": self.in_flight,
+            "bytes_out": self.bytes_out,
+            "bytes_in": self.bytes_in,
+            "errors": dict(self.errors),
+            "latency": self.latency.to_dict(),
+        }
+
+
+# host, API path, operation name
+MetricsKey = Tuple[Optional[str], EphyrApiPaths, Optional[str]]
+
+
+@dataclasses.dataclass
+class MetricsCollector(Instrumentation):
+    """
+    Keeps metrics of requests in memory, by host, API path and operation.
+    Safe to share between threads and instances.
+    """
+
+    metrics: Dict[MetricsKey, CallMetrics] = dataclasses.field(
+        default_factory=dict, init=False
+    )
+
+    _lock: threading.Lock = dataclasses.field(
+        default_factory=threading.Lock, init=False, repr=False
+    )
+
+    def _get(self, call: CallInfo) -> CallMetrics:
+        key = (call.host, call.api_path, call.operation_name)
+        metrics = self.metrics.get(key)
+        if metrics is None:
+            metrics = self.metrics[key] = CallMetrics()
+        return metrics
+
+    def before_call(self, call: CallInfo) -> None:
+        with self._lock:
+            metrics = self._get(call)
+            metrics.in_flight += 1
+            metrics.bytes_out += call.request_bytes
+
+    def after_call(self, call: CallInfo) -> None:
+        with self._lock:
+            metrics = self._get(call)
+            metrics.in_flight -= 1
+            metrics.calls += 1
+            metrics.latency.observe(call.duration)
+            if call.response_bytes is not None:
+                metrics.bytes_in += call.response_bytes
+            if call.error is not None:
+                metrics.errors[error_category(call.error)] += 1
+
+    def reset(self) -> None:
+        """Forget collected metrics, except requests in flight."""
+        with self._lock:
+            self.metrics = {
+                key: CallMetrics(in_flight=metrics.in_flight)
+                for key, metrics in self.metrics.items()
+                if metrics.in_flight
+            }
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Copy of collected metrics.
+        :return: list of dicts with host, api_path, operation and metrics
+        """
+        with self._lock:
+            return [
+                {
+                    "host": host,
+                    "api_path": api_path.name,
+                    "operation": operation_name,
+                    **metrics.to_dict(),
+                }
+                for (host, api_path, operation_name), metrics in self.metrics.items()
+            ]
+
+    def to_json(self, **kwargs) -> str:
+        """Snapshot encoded as JSON, kwargs are passed to json.dumps."""
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def to_text(self) -> str:
+        """Snapshot as table, one line per host, API path and operation."""
+        lines = []
+        for item in sorted(
+            self.snapshot(),
+            key=lambda i: (i["host"] or "", i["api_path"], i["operation"] or ""),
+        ):
+            latency = item["latency"]
+            errors = ",".join(f"{k}={v}" for k, v in sorted(item["errors"].items()))
+            lines.append(
+                f"{item['host']} {item['api_path']} {item['operation']}"
+                f" calls={item['calls']} in_flight={item['in_flight']}"
+                f" p50={_ms(latency['p50'])} p99={_ms(latency['p99'])}"
+                f" max={_ms(latency['max'])}"
+                f" out={item['bytes_out']}B in={item['bytes_in']}B"
+                f" errors={errors or 0}"
+            )
+        return "\n".join(lines)
+
+
+def _ms(seconds: Optional[float]) -> str:
+    return "-" if seconds is None else f"{seconds * 1000:.1f}ms"
@@ -0,0 +1,174 @@
+"""
+Adaptive limit of requests sent to one Ephyr server.
+
+Ephyr runs ffmpeg for every output, so dozens of simultaneous mutations
+make its latency spike and streams stutter. AdaptiveLimiter bounds both
+the rate of requests (token bucket) and the number of requests in flight.
+The concurrency limit adapts AIMD-style: it grows by about one every
+window of fast successful requests, and is cut by half when a request
+is slow or fails by transport. So load of every server settles
+at the highest level it sustains.
+
+Limiting is opt-in, per instance:
+
+    inst = AsyncRemoteEphyrInstance(
+        ipv4="1.2.3.4", limiter=AdaptiveLimiter(rate=20, latency_target=0.5)
+    )
+"""
+
+import asyncio
+import dataclasses
+import math
+import threading
+import time
+from typing import Awaitable, Callable, Optional
+
+from ephyr_control.instance.resilience import is_transient_error
+
+__all__ = ("AdaptiveLimiter",)
+
+
+@dataclasses.dataclass
+class AdaptiveLimiter:
+    """
+    Token bucket with adaptive concurrency limit, for one instance.
+    Do not share it between instances.
+
+    :param rate: requests per second on average, None for no rate limit
+    :param burst: maximal number of requests sent at once after idle period
+    :param initial_limit: requests in flight at the start
+    :param min_limit: concurrency limit is never cut below it
+    :param max_limit: concurrency limit never grows above it
+    :param latency_target: seconds; slower request cuts concurrency limit
+    :param backoff_ratio: concurrency limit is multiplied by it when cut
+    """
+
+    rate: Optional[float] = 50.0
+    burst: int = 10
+    initial_limit: int = 4
+    min_limit: int = 1
+    max_limit: int = 64
+    latency_target: float = 1.0
+    backoff_ratio: float = 0.5
+
+    # current concurrency limit, fractional part accumulates increases
+    limit: float = dataclasses.field(init=False)
+    in_flight: int = dataclasses.field(default=0, init=False)
+    tokens: float = dataclasses.field(init=False)
+    # counters
+    admitted: int = dataclasses.field(default=0, init=False)
+    # admitted after waiting for token or free slot
+    delayed: int = dataclasses.field(default=0, init=False)
+    # times concurrency limit was cut
+    decreases: int = dataclasses.field(default=0, init=False)
+
+    _refilled_at: float = dataclasses.field(
+        default_factory=time.monotonic, init=False, repr=False
+    )
+    _decreased_at: float = dataclasses.field(default=-math.inf, init=False, repr=False)
+    _condition: threading.Condition = dataclasses.field(
+        default_factory=threading.Condition, init=False, repr=False
+    )
+    _released: Optional[asyncio.Event] = dataclasses.field(
+        default=None, init=False, repr=False
+    )
+
+    def __post_init__(self):
+        if not 1 <= self.min_limit <= self.initial_limit <= self.max_limit:
+            raise ValueError("Expected min_limit <= initial_limit <= max_limit.")
+        if self.rate is not None and self.rate <= 0:
+            raise ValueError("rate must be positive.")
+        if not 0 < self.backoff_ratio < 1:
+            raise ValueError("backoff_ratio must be between 0 and 1.")
+        self.limit = float(self.initial_limit)
+        self.tokens = float(self.burst)
+
+    @property
+    def window(self) -> int:
+        """Number of requests allowed in flight now."""
+        return int(self.limit)
+
+    def _try_acquire(self) -> Optional[float]:
+        # 0 if admitted, else seconds till token, None if waiting for free slot
+        if self.in_flight >= self.window:
+            return None
+        if self.rate is not None:
+            now = time.monotonic()
+            elapsed, self._refilled_at = now - self._refilled_at, now
+            self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+            if self.tokens < 1:
+                return (1 - self.tokens) / self.rate
+            self.tokens -= 1
+        self.in_flight += 1
+        self.admitted += 1
+        return 0
+
+    def _release(self, latency: float, exc: Optional[BaseException]) -> None:
+        self.in_flight -= 1
+        if isinstance(exc, asyncio.CancelledError):
+            return
+        if (exc is not None and is_transient_error(exc)) or (
+            latency > self.latency_target
+        ):
+            now = time.monotonic()
+            # requests sent together fail together, cut once for all of them
+            if now - self._decreased_at > self.latency_target:
+                self._decreased_at = now
+                limit = max(self.min_limit, self.limit * self.backoff_ratio)
+                if limit < self.limit:
+                    self.limit = limit
+                    self.decreases += 1
+        elif exc is None:
+            # about +1 after every `window` successful requests
+            self.limit = min(self.max_limit, self.limit + 1 / self.window)
+
+    def call(self, execute: Callable[[], dict]) -> dict:
+        """
+        Execute operation when limits allow.
+        :param execute: function sending operation to server
+        :return: data
+        """
+        with self._condition:
+            wait = self._try_acquire()
+            if wait != 0:
+                self.delayed += 1
+            while wait != 0:
+                self._condition.wait(timeout=wait)
+                wait = self._try_acquire()
+        started_at = time.monotonic()
+        error = None
+        try:
+            return execute()
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            with self._condition:
+                self._release(time.monotonic() - started_at, error)
+                self._condition.notify_all()
+
+    async def call_async(self, execute: Callable[[], Awaitable[dict]]) -> dict:
+        """Asynchronous counterpart of call."""
+        if self._released is None:
+            # created lazily - event must be created inside running event loop
+            self._released = asyncio.Event()
+        wait = self._try_acquire()
+        if wait != 0:
+            self.delayed += 1
+        while wait != 0:
+            if wait is None:
+                self._released.clear()
+                await self._released.wait()
+            else:
+                await asyncio.sleep(wait)
+            wait = self._try_acquire()
+        started_at = time.monotonic()
+        error = None
+        try:
+            return await execute()
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            self._release(time.monotonic() - started_at, error)
+            self._released.set()
@@ -0,0 +1,183 @@
+"""
+Multiplexing of subscriptions over shared websockets.
+
+Every SubscriptionSession opens its own websocket. SubscriptionMultiplexer
+keeps one websocket per instance and API path instead, and runs any number
+of subscription operations over it (graphql-ws protocol identifies them by id),
+starting and stopping them independently:
+
+    multiplexer = SubscriptionMultiplexer()
+    subscription = Subscription(instance, api_subscribe_to_info)
+    async for info in multiplexer.subscribe(subscription):
+        ...
+
+See example usage in examples/subscribe_multiplexed.py
+"""
+
+import asyncio
+import dataclasses
+from typing import Any, AsyncIterator, Dict, Optional
+
+import gql
+from gql.client import AsyncClientSession
+from gql.transport.exceptions import TransportClosed
+
+from ephyr_control.instance.protocols import AssignedMethodCall
+from ephyr_control.instance.subscribe import Subscription
+
+__all__ = (
+    "SharedConnection",
+    "SubscriptionMultiplexer",
+)
+
+
+@dataclasses.dataclass
+class SharedConnection:
+    """
+    One websocket connection to API path of Ephyr instance,
+    shared by subscription operations.
+    Connects on first subscription and disconnects when the last one stops.
+
+    :param subscription: provides URL and transport of connection
+    """
+
+    subscription: Subscription
+
+    _client: Optional[gql.Client] = dataclasses.field(
+        default=None, init=False, repr=False
+    )
+    _session: Optional[AsyncClientSession] = dataclasses.field(
+        default=None, init=False, repr=False
+    )
+    _lock: Optional[asyncio.Lock] = dataclasses.field(
+        default=None, init=False, repr=False
+    )
+    # number of running subscription operations
+    active: int = dataclasses.field(default=0, init=False)
+
+    @property
+    def is_connected(self) -> bool:
+        return (
+            self._client is not None
+            and getattr(self._client.transport, "websocket", None) is not None
+        )
+
+    def _get_lock(self) -> asyncio.Lock:
+        # created lazily - lock must be created inside running event loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def acquire(self) -> AsyncClientSession:
+        """
+        Connect if needed and register new user of connection.
+        :return: session to run subscription operation on
+        """
+        async with self._get_lock():
+            if self._session is None or not self.is_connected:
+                # connection may have been dropped by server
+                await self._disconnect()
+                client = self.subscription.build_client()
+                self._session = await client.connect_async()
+                self._client = client
+            self.active += 1
+            return self._session
+
+    async def release(self) -> None:
+        """Unregister user of connection, disconnect if it was the last one."""
+        async with self._get_lock():
+            self.active -= 1
+            if self.active <= 0:
+                self.active = 0
+                await self._disconnect()
+
+    async def close(self) -> None:
+        """Disconnect, running subscription operations will fail."""
+        async with self._get_lock():
+            await self._disconnect()
+
+    async def _disconnect(self) -> None:
+        client, self._client, self._session = self._client, None, None
+        if client is not None:
+            try:
+                await client.close_async()
+            except TransportClosed:
+                pass
+
+    async def subscribe(
+        self,
+        method_call: AssignedMethodCall,
+        variable_values: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Run subscription operation over shared connection.
+        Operation is stopped when iteration stops.
+
+        :raises ValueError: if operation belongs to another API path
+        :param method_call: subscription operation
+        :param variable_values: dict of variables of operation
+        :return: async iterator of data
+        """
+        if method_call.api_path != self.subscription.method_call.api_path:
+            raise ValueError(
+                f"Connection is assigned to {self.subscription.method_call.api_path},"
+                f" got {method_call.api_path}."
+            )
+        session = await self.acquire()
+        try:
+            async for data in session.subscribe(
+                method_call.query, variable_values=variable_values
+            ):
+                yield data
+        finally:
+            await self.release()
+
+
+@dataclasses.dataclass
+class SubscriptionMultiplexer:
+    """
+    Registry of shared connections, one per instance and API path.
+    Acts as async context manager - closes all connections on exit.
+    """
+
+    connections: Dict[str, SharedConnection] = dataclasses.field(default_factory=dict)
+
+    def connection(self, subscription: Subscription) -> SharedConnection:
+        """
+        Get connection for subscription, creating it on first use.
+        :param subscription: provides instance, API path and transport
+        :return: SharedConnection
+        """
+        key = str(subscription.build_ws_url())
+        connection = self.connections.get(key)
+        if connection is None:
+            connection = self.connections[key] = SharedConnection(subscription)
+        return connection
+
+    def subscribe(
+        self,
+        subscription: Subscription,
+        variable_values: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Run subscription operation over connection shared with other
+        operations of the same instance and API path.
+
+        :param subscription: defines instance and operation
+        :param variable_values: dict of variables of operation
+        :return: async iterator of data
+        """
+        return self.connection(subscription).subscribe(
+            subscription.method_call, variable_values
+        )
+
+    async def close(self) -> None:
+        await asyncio.gather(
+            *(connection.close() for connection in self.connections.values())
+        )
+
+    async def __aenter__(self) -> "SubscriptionMultiplexer":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
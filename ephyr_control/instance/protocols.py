@@ -1,9 +1,20 @@
 import abc
 import dataclasses
-from typing import Any, ClassVar, Collection, Dict, Optional, Protocol, Type
+import functools
+import json
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    ClassVar,
+    Collection,
+    Dict,
+    Optional,
+    Protocol,
+    Type,
+)
 
 import yarl
-from graphql import DocumentNode, OperationType
+from graphql import DocumentNode, OperationType, print_ast
 
 from ephyr_control.instance.constants import EphyrApiPaths
 
@@ -12,6 +23,12 @@ try:
 except ImportError:
     raise RuntimeError("You need to install 'gql' together with 'requests' lib.")
 
+if TYPE_CHECKING:
+    from ephyr_control.instance.cache import ResponseCache
+    from ephyr_control.instance.coalesce import RequestCoalescer
+    from ephyr_control.instance.limiter import AdaptiveLimiter
+    from ephyr_control.instance.resilience import CircuitBreaker, RetryPolicy
+
 __all__ = (
     "EphyrInstanceProtocol",
     "RemoteEphyrInstanceProtocol",
@@ -20,6 +37,8 @@ __all__ = (
     "ClientNotInitialisedError",
     "AssignedClientProtocol",
     "ClientsCollectionProtocol",
+    "AsyncAssignedClientProtocol",
+    "AsyncClientsCollectionProtocol",
     "RemoteEphyrInstanceProtocol",
 )
 
@@ -46,15 +65,49 @@ class AssignedMethodCall:
     api_path: EphyrApiPaths
     query: DocumentNode
 
+    # cached on creation, because queries are constants used many times
+    query_string: str = dataclasses.field(init=False, repr=False, compare=False)
+    operation_name: Optional[str] = dataclasses.field(
+        init=False, repr=False, compare=False
+    )
+    _body_prefix: bytes = dataclasses.field(init=False, repr=False, compare=False)
+    _body_without_variables: bytes = dataclasses.field(
+        init=False, repr=False, compare=False
+    )
+
     def __post_init__(self):
         # allow only 1 definition
         if len(self.query.definitions) != 1:
             raise ValueError("Place exactly 1 definition.")
 
+        self.query_string = print_ast(self.query)
+        name = self.query.definitions[0].name
+        self.operation_name = name.value if name else None
+
+        head = {"query": self.query_string}
+        if self.operation_name:
+            head["operationName"] = self.operation_name
+        encoded_head = json.dumps(head, separators=(",", ":"))
+        self._body_without_variables = encoded_head.encode()
+        self._body_prefix = (encoded_head[:-1] + ',"variables":').encode()
+
     @property
     def operation_type(self) -> OperationType:
         return self.query.definitions[0].operation
 
+    def encode_body(self, variable_values: Optional[Dict[str, Any]] = None) -> bytes:
+        """
+        Encode body of HTTP request executing this operation.
+        Only variables are encoded on every call.
+
+        :param variable_values: dictionary for variables, optional
+        :return: JSON encoded body
+        """
+        if not variable_values:
+            return self._body_without_variables
+        encoded_variables = json.dumps(variable_values, separators=(",", ":"))
+        return self._body_prefix + encoded_variables.encode() + b"}"
+
 
 @dataclasses.dataclass
 class ServerConnectionDetails:
@@ -126,6 +179,16 @@ class ClientsCollectionProtocol(Protocol):
     """
 
     assigned_clients: Dict[EphyrApiPaths, AssignedClientProtocol]
+    # responses of queries, not cached if None
+    cache: Optional["ResponseCache"] = None
+    # shares in-flight identical queries, not coalesced if None
+    coalescer: Optional["RequestCoalescer"] = None
+    # repeats queries failed by transport, not retried if None
+    retry_policy: Optional["RetryPolicy"] = None
+    # fails fast when server is unhealthy, not used if None
+    circuit_breaker: Optional["CircuitBreaker"] = None
+    # bounds rate and concurrency of requests, not limited if None
+    limiter: Optional["AdaptiveLimiter"] = None
 
     def __init__(self, clients: Collection[AssignedClientProtocol]):
         self.assigned_clients = {client.api_path: client for client in clients}
@@ -141,6 +204,8 @@ class ClientsCollectionProtocol(Protocol):
         """
         for cli in self.assigned_clients.values():
             cli.rebuild_client(server_connection_details)
+        if self.cache is not None:
+            self.cache.invalidate()
 
     def execute(
         self,
@@ -158,10 +223,172 @@ class ClientsCollectionProtocol(Protocol):
         if client is None:
             raise KeyError(f"There is no client matching {method_call}")
 
-        return client.execute(
+        execute = functools.partial(
+            client.execute,
             method_call=method_call,
             variable_values=variable_values,
         )
+        if self.limiter is not None:
+            execute = functools.partial(self.limiter.call, execute)
+        if self.retry_policy is not None:
+            execute = functools.partial(self.retry_policy.call, method_call, execute)
+        # outside of retries: failure of call is its last error, and
+        # CircuitOpenError is raised only by calls that never reached server
+        if self.circuit_breaker is not None:
+            execute = functools.partial(self.circuit_breaker.call, execute)
+        if self.coalescer is not None:
+            execute = functools.partial(
+                self.coalescer.execute, method_call, variable_values, execute
+            )
+        if self.cache is None:
+            return execute()
+        return self.cache.execute(method_call, variable_values, execute)
+
+
+class AsyncAssignedClientProtocol(Protocol):
+    """Client assigned to API path that executes operations asynchronously - protocol.
+
+    Connection is established lazily, on first execution,
+    because it must be done inside running event loop.
+    """
+
+    api_path: EphyrApiPaths
+
+    Transport: ClassVar[Type[gql.transport.AsyncTransport]]
+
+    ClientNotInitialisedError: ClassVar[Type[Exception]] = ClientNotInitialisedError
+
+    @property
+    @abc.abstractmethod
+    def is_initialised(self) -> bool:
+        """Whether client knows how to connect to server."""
+
+    @abc.abstractmethod
+    def build_client(self, server_connection_details: ServerConnectionDetails) -> None:
+        """Prepare GraphQL client, without connecting to server.
+
+        :param server_connection_details: Details that specify how to connect to server
+        :return:
+        """
+
+    async def rebuild_client(
+        self, server_connection_details: ServerConnectionDetails
+    ) -> None:
+        """Close existing connection and prepare new GraphQL client.
+        Useful when connection parameters change.
+
+        :param server_connection_details: Details that specify how to connect to server
+        :return:
+        """
+        await self.close()
+        self.build_client(server_connection_details)
+
+    @abc.abstractmethod
+    async def execute(
+        self,
+        method_call: AssignedMethodCall,
+        variable_values: Optional[Dict[str, Any]] = None,
+    ) -> dict:
+        """Execute GraphQL query with optional variables.
+
+        :raises ClientNotInitialisedError: if client was not yet initialised
+        :raises ValueError: if passed method_call is assigned to another
+        API path than client
+        :param method_call: GraphQL query
+        :param variable_values: dictionary for variables, optional
+        :return: data returned from server
+        """
+
+    @abc.abstractmethod
+    async def close(self) -> None:
+        """Close connection to server, if any."""
+
+
+class AsyncClientsCollectionProtocol(Protocol):
+    """Collection of asynchronous clients - protocol.
+
+    Asynchronous counterpart of ClientsCollectionProtocol.
+    """
+
+    assigned_clients: Dict[EphyrApiPaths, AsyncAssignedClientProtocol]
+    # responses of queries, not cached if None
+    cache: Optional["ResponseCache"] = None
+    # shares in-flight identical queries, not coalesced if None
+    coalescer: Optional["RequestCoalescer"] = None
+    # repeats queries failed by transport, not retried if None
+    retry_policy: Optional["RetryPolicy"] = None
+    # fails fast when server is unhealthy, not used if None
+    circuit_breaker: Optional["CircuitBreaker"] = None
+    # bounds rate and concurrency of requests, not limited if None
+    limiter: Optional["AdaptiveLimiter"] = None
+
+    def build_all_clients(
+        self, server_connection_details: ServerConnectionDetails
+    ) -> None:
+        """Prepare all GraphQL clients, without connecting to server.
+
+        :param server_connection_details: Details that specify how to connect to server
+        :return:
+        """
+        for cli in self.assigned_clients.values():
+            cli.build_client(server_connection_details)
+
+    async def rebuild_all_clients(
+        self, server_connection_details: ServerConnectionDetails
+    ) -> None:
+        """Rebuild all GraphQL clients.
+        Useful when connection parameters change.
+
+        :param server_connection_details: Details that specify how to connect to server
+        :return:
+        """
+        for cli in self.assigned_clients.values():
+            await cli.rebuild_client(server_connection_details)
+        if self.cache is not None:
+            self.cache.invalidate()
+
+    async def execute(
+        self,
+        method_call: AssignedMethodCall,
+        variable_values: Optional[Dict[str, Any]] = None,
+    ) -> dict:
+        """Execute GraphQL query with optional variables.
+
+        :raises KeyError: if there is no client matching API path for passed method_call
+        :param method_call: GraphQL query
+        :param variable_values: dictionary for variables, optional
+        :return: data returned from server
+        """
+        client = self.assigned_clients.get(method_call.api_path)
+        if client is None:
+            raise KeyError(f"There is no client matching {method_call}")
+
+        execute = functools.partial(
+            client.execute,
+            method_call=method_call,
+            variable_values=variable_values,
+        )
+        if self.limiter is not None:
+            execute = functools.partial(self.limiter.call_async, execute)
+        if self.retry_policy is not None:
+            execute = functools.partial(
+                self.retry_policy.call_async, method_call, execute
+            )
+        # outside of retries, see ClientsCollectionProtocol.execute
+        if self.circuit_breaker is not None:
+            execute = functools.partial(self.circuit_breaker.call_async, execute)
+        if self.coalescer is not None:
+            execute = functools.partial(
+                self.coalescer.execute_async, method_call, variable_values, execute
+            )
+        if self.cache is None:
+            return await execute()
+        return await self.cache.execute_async(method_call, variable_values, execute)
+
+    async def close(self) -> None:
+        """Close connections of all clients."""
+        for cli in self.assigned_clients.values():
+            await cli.close()
 
 
 class RemoteEphyrInstanceProtocol(EphyrInstanceProtocol, Protocol):
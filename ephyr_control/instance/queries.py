@@ -1,3 +1,12 @@
+"""
+GraphQL operations of Ephyr API.
+
+Operations are parsed lazily, on first access to module attribute,
+so importing this module is cheap.
+"""
+
+from typing import Dict, Tuple
+
 import gql
 
 from ephyr_control.instance.constants import EphyrApiPaths
@@ -9,6 +18,7 @@ __all__ = (
     "api_change_settings",
     "api_change_state",
     "api_export_all_restreams",
+    "api_remove_restream",
     "api_subscribe_to_state",
     "api_subscribe_to_info",
     "api_subscribe_to_server_info",
@@ -21,13 +31,30 @@ __all__ = (
     "dashboard_subscribe_to_statistics",
 )
 
+# declared for type checkers and IDEs, actual values are created by __getattr__
+api_get_info: AssignedMethodCall
+api_change_password: AssignedMethodCall
+api_change_settings: AssignedMethodCall
+api_change_state: AssignedMethodCall
+api_export_all_restreams: AssignedMethodCall
+api_remove_restream: AssignedMethodCall
+api_subscribe_to_state: AssignedMethodCall
+api_subscribe_to_info: AssignedMethodCall
+api_subscribe_to_server_info: AssignedMethodCall
+mixin_tune_volume: AssignedMethodCall
+mixin_tune_delay: AssignedMethodCall
+mixin_tune_sidechain: AssignedMethodCall
+mixin_subscribe_to_output: AssignedMethodCall
+dashboard_add_client: AssignedMethodCall
+dashboard_remove_client: AssignedMethodCall
+dashboard_subscribe_to_statistics: AssignedMethodCall
 
-# main API
-# ========
 
-api_get_info = AssignedMethodCall(
-    api_path=EphyrApiPaths.API,
-    query=gql.gql(
+_SOURCES: Dict[str, Tuple[EphyrApiPaths, str]] = {
+    # main API
+    # ========
+    "api_get_info": (
+        EphyrApiPaths.API,
         """
         query Info {
             info {
@@ -39,24 +66,18 @@ api_get_info = AssignedMethodCall(
                 enableConfirmation
             }
         }
-    """
+    """,
     ),
-)
-
-api_change_password = AssignedMethodCall(
-    api_path=EphyrApiPaths.API,
-    query=gql.gql(
+    "api_change_password": (
+        EphyrApiPaths.API,
         """
         mutation ($new: String, $old: String, $kind: PasswordKind!) {
             setPassword(new: $new, old: $old, kind: $kind)
         }
-    """
+    """,
     ),
-)
-
-api_change_settings = AssignedMethodCall(
-    api_path=EphyrApiPaths.API,
-    query=gql.gql(
+    "api_change_settings": (
+        EphyrApiPaths.API,
         """
         mutation SetSettings(
             $title: String
@@ -69,13 +90,10 @@ api_change_settings = AssignedMethodCall(
                 enableConfirmation: $enable_confirmation
             )
         }
-    """
+    """,
     ),
-)
-
-api_change_state = AssignedMethodCall(
-    api_path=EphyrApiPaths.API,
-    query=gql.gql(
+    "api_change_state": (
+        EphyrApiPaths.API,
         """
         mutation Import(
             $restream_id: RestreamId
@@ -88,24 +106,26 @@ api_change_state = AssignedMethodCall(
                 spec: $spec
             )
         }
-    """
+    """,
     ),
-)
-
-api_export_all_restreams = AssignedMethodCall(
-    api_path=EphyrApiPaths.API,
-    query=gql.gql(
+    "api_export_all_restreams": (
+        EphyrApiPaths.API,
         """
         query ExportAllRestreams {
             export
         }
-    """
+    """,
     ),
-)
-
-api_subscribe_to_state = AssignedMethodCall(
-    api_path=EphyrApiPaths.API,
-    query=gql.gql(
+    "api_remove_restream": (
+        EphyrApiPaths.API,
+        """
+        mutation RemoveRestream($id: RestreamId!) {
+            removeRestream(id: $id)
+        }
+        """,
+    ),
+    "api_subscribe_to_state": (
+        EphyrApiPaths.API,
         """
         subscription State {
             allRestreams {
@@ -172,13 +192,10 @@ api_subscribe_to_state = AssignedMethodCall(
                 }
             }
         }
-        """
+        """,
     ),
-)
-
-api_subscribe_to_info = AssignedMethodCall(
-    api_path=EphyrApiPaths.API,
-    query=gql.gql(
+    "api_subscribe_to_info": (
+        EphyrApiPaths.API,
         """
         subscription Info {
             info {
@@ -190,13 +207,10 @@ api_subscribe_to_info = AssignedMethodCall(
                 passwordOutputHash
             }
         }
-        """
+        """,
     ),
-)
-
-api_subscribe_to_server_info = AssignedMethodCall(
-    api_path=EphyrApiPaths.API,
-    query=gql.gql(
+    "api_subscribe_to_server_info": (
+        EphyrApiPaths.API,
         """
         subscription ServerInfo {
             serverInfo {
@@ -208,17 +222,12 @@ api_subscribe_to_server_info = AssignedMethodCall(
                 errorMsg
             }
         }
-        """
+        """,
     ),
-)
-
-
-# output mixin API
-# ================
-
-mixin_tune_volume = AssignedMethodCall(
-    api_path=EphyrApiPaths.MIXIN,
-    query=gql.gql(
+    # output mixin API
+    # ================
+    "mixin_tune_volume": (
+        EphyrApiPaths.MIXIN,
         """
         mutation TuneVolume(
             $restream_id: RestreamId!
@@ -235,13 +244,10 @@ mixin_tune_volume = AssignedMethodCall(
                 muted: $muted
             )
         }
-        """
+        """,
     ),
-)
-
-mixin_tune_delay = AssignedMethodCall(
-    api_path=EphyrApiPaths.MIXIN,
-    query=gql.gql(
+    "mixin_tune_delay": (
+        EphyrApiPaths.MIXIN,
         """
         mutation TuneDelay(
             $restream_id: RestreamId!
@@ -256,13 +262,10 @@ mixin_tune_delay = AssignedMethodCall(
                 delay: $delay
             )
         }
-        """
+        """,
     ),
-)
-
-mixin_tune_sidechain = AssignedMethodCall(
-    api_path=EphyrApiPaths.MIXIN,
-    query=gql.gql(
+    "mixin_tune_sidechain": (
+        EphyrApiPaths.MIXIN,
         """
         mutation TuneSidechain(
             $restream_id: RestreamId!
@@ -277,13 +280,10 @@ mixin_tune_sidechain = AssignedMethodCall(
                 sidechain: $sidechain
             )
         }
-        """
+        """,
     ),
-)
-
-mixin_subscribe_to_output = AssignedMethodCall(
-    api_path=EphyrApiPaths.MIXIN,
-    query=gql.gql(
+    "mixin_subscribe_to_output": (
+        EphyrApiPaths.MIXIN,
         """
         subscription Output($restreamId: RestreamId!, $outputId: OutputId!) {
             output(outputId: $outputId, restreamId: $restreamId) {
@@ -309,39 +309,28 @@ mixin_subscribe_to_output = AssignedMethodCall(
                 status
             }
         }
-        """
+        """,
     ),
-)
-
-
-# Dashboard API
-# =============
-
-dashboard_add_client = AssignedMethodCall(
-    api_path=EphyrApiPaths.DASHBOARD,
-    query=gql.gql(
+    # Dashboard API
+    # =============
+    "dashboard_add_client": (
+        EphyrApiPaths.DASHBOARD,
         """
         mutation AddClient($client_id: ClientId!) {
             addClient(clientId: $client_id)
         }
-        """
+        """,
     ),
-)
-
-dashboard_remove_client = AssignedMethodCall(
-    api_path=EphyrApiPaths.DASHBOARD,
-    query=gql.gql(
+    "dashboard_remove_client": (
+        EphyrApiPaths.DASHBOARD,
         """
         mutation RemoveClient($client_id: ClientId!) {
             removeClient(clientId: $client_id)
         }
-        """
+        """,
     ),
-)
-
-dashboard_subscribe_to_statistics = AssignedMethodCall(
-    api_path=EphyrApiPaths.DASHBOARD,
-    query=gql.gql(
+    "dashboard_subscribe_to_statistics": (
+        EphyrApiPaths.DASHBOARD,
         """
         subscription Statistics {
             statistics {
@@ -371,6 +360,17 @@ dashboard_subscribe_to_statistics = AssignedMethodCall(
                 }
             }
         }
-        """
+        """,
     ),
-)
+}
+
+
+def __getattr__(name: str) -> AssignedMethodCall:
+    try:
+        api_path, source = _SOURCES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    method_call = AssignedMethodCall(api_path=api_path, query=gql.gql(source))
+    # another thread might have been faster, keep the first one
+    return globals().setdefault(name, method_call)
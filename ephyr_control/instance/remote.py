@@ -5,16 +5,26 @@ import uuid
 from typing import Any, ClassVar, Dict, Optional, Tuple, Type
 
 import gql
-import gql.transport.requests
+import gql.transport
 import yarl
 
+from ephyr_control.instance import queries
+from ephyr_control.instance.cache import ResponseCache
+from ephyr_control.instance.coalesce import RequestCoalescer
 from ephyr_control.instance.constants import (
     ALL_API_PATHS,
     MIXIN_UI_PATH,
     EphyrApiPaths,
     EphyrPasswordKind,
 )
+from ephyr_control.instance.delta import (
+    StateDelta,
+    build_restreams_spec,
+    plan_state_delta,
+)
 from ephyr_control.instance.instance import EphyrInstance
+from ephyr_control.instance.instrumentation import CallInfo, Instrumentation
+from ephyr_control.instance.limiter import AdaptiveLimiter
 from ephyr_control.instance.protocols import (
     AssignedClientProtocol,
     AssignedMethodCall,
@@ -22,18 +32,12 @@ from ephyr_control.instance.protocols import (
     RemoteEphyrInstanceProtocol,
     ServerConnectionDetails,
 )
-from ephyr_control.instance.queries import (
-    api_change_password,
-    api_change_settings,
-    api_change_state,
-    api_export_all_restreams,
-    api_get_info,
-    dashboard_add_client,
-    dashboard_remove_client,
-    mixin_tune_delay,
-    mixin_tune_sidechain,
-    mixin_tune_volume,
+from ephyr_control.instance.resilience import CircuitBreaker, RetryPolicy
+from ephyr_control.instance.transport import (
+    PreparedRequestsHTTPTransport,
+    unwrap_result,
 )
+from ephyr_control.state.decode import decode_state
 from ephyr_control.state.restream.output.volume import Volume
 from ephyr_control.state.settings import Settings
 from ephyr_control.state.state import State
@@ -51,10 +55,11 @@ __all__ = (
 class AssignedClient(AssignedClientProtocol):
     api_path: EphyrApiPaths
     client: gql.Client = None
+    instrumentation: Optional[Instrumentation] = None
+    # host of server, set by rebuild_client
+    host: Optional[str] = dataclasses.field(default=None, init=False)
 
-    Transport: ClassVar[
-        Type[gql.transport.Transport]
-    ] = gql.transport.requests.RequestsHTTPTransport
+    Transport: ClassVar[Type[gql.transport.Transport]] = PreparedRequestsHTTPTransport
 
     def rebuild_client(
         self, server_connection_details: ServerConnectionDetails
@@ -66,7 +71,12 @@ class AssignedClient(AssignedClientProtocol):
             path=self.api_path.value,
         )
 
+        if self.client is not None:
+            self.client.transport.close()
+        self.host = server_connection_details.host
         transport = self.Transport(url=str(url))
+        # stay connected to keep HTTP connections alive between calls
+        transport.connect()
         self.client = gql.Client(transport=transport)
 
     def execute(
@@ -82,15 +92,29 @@ class AssignedClient(AssignedClientProtocol):
         if self.api_path != method_call.api_path:
             raise ValueError("api_path does not match")
 
-        return self.client.execute(
-            method_call.query,
-            variable_values=variable_values,
+        body = method_call.encode_body(variable_values)
+        if self.instrumentation is None:
+            return unwrap_result(self.client.transport.execute_prepared(body))
+
+        call = CallInfo(
+            host=self.host,
+            api_path=self.api_path,
+            operation_name=method_call.operation_name,
+            request_bytes=len(body),
+        )
+        return self.instrumentation.run(
+            call, lambda: self.client.transport.execute_prepared_sized(body)
         )
 
 
 @dataclasses.dataclass
 class ClientsCollection(ClientsCollectionProtocol):
     clients: Tuple[AssignedClientProtocol, ...]
+    cache: Optional[ResponseCache] = None
+    coalescer: Optional[RequestCoalescer] = None
+    retry_policy: Optional[RetryPolicy] = None
+    circuit_breaker: Optional[CircuitBreaker] = None
+    limiter: Optional[AdaptiveLimiter] = None
     assigned_clients: Dict[EphyrApiPaths, AssignedClientProtocol] = dataclasses.field(
         init=False
     )
@@ -104,13 +128,45 @@ class BaseRemoteEphyrInstance(EphyrInstance, RemoteEphyrInstanceProtocol):
     """Base class implementing RemoteEphyrInstanceProtocol"""
 
     connect_to: Tuple[EphyrApiPaths, ...] = ALL_API_PATHS
+    # opt-in cache of query responses, see ResponseCache
+    response_cache: Optional[ResponseCache] = dataclasses.field(
+        default=None, repr=False, compare=False
+    )
+    # opt-in sharing of identical concurrent queries, see RequestCoalescer
+    request_coalescer: Optional[RequestCoalescer] = dataclasses.field(
+        default=None, repr=False, compare=False
+    )
+    # opt-in retries of failed queries, see RetryPolicy
+    retry_policy: Optional[RetryPolicy] = dataclasses.field(
+        default=None, repr=False, compare=False
+    )
+    # opt-in failing fast while server is unhealthy, see CircuitBreaker
+    circuit_breaker: Optional[CircuitBreaker] = dataclasses.field(
+        default=None, repr=False, compare=False
+    )
+    # opt-in adaptive limit of requests, see AdaptiveLimiter
+    limiter: Optional[AdaptiveLimiter] = dataclasses.field(
+        default=None, repr=False, compare=False
+    )
+    # opt-in hooks around every request, e.g. MetricsCollector
+    instrumentation: Optional[Instrumentation] = dataclasses.field(
+        default=None, repr=False, compare=False
+    )
 
     # username used for BasicAuth, 1 is well accepted by browsers
     DEFAULT_USER_HTTPAUTH: str = "1"
 
     def __post_init__(self):
         self.clients = ClientsCollection(
-            tuple(AssignedClient(api) for api in self.connect_to)
+            tuple(
+                AssignedClient(api, instrumentation=self.instrumentation)
+                for api in self.connect_to
+            ),
+            cache=self.response_cache,
+            coalescer=self.request_coalescer,
+            retry_policy=self.retry_policy,
+            circuit_breaker=self.circuit_breaker,
+            limiter=self.limiter,
         )
         self.rebuild_clients()
 
@@ -190,7 +246,7 @@ class RemoteEphyrInstance(BaseRemoteEphyrInstance):
         Get basic info about instance (title, publicHost, some settings)
         :return: dictionary
         """
-        data = self.execute(api_get_info)
+        data = self.execute(queries.api_get_info)
         return data["info"]
 
     def verify_ipv4_domain_match(self) -> bool:
@@ -213,7 +269,7 @@ class RemoteEphyrInstance(BaseRemoteEphyrInstance):
             "kind": EphyrPasswordKind.MAIN.value,
         }
         response = self.execute(
-            api_change_password,
+            queries.api_change_password,
             variable_values=variables,
         )
         success: bool = response["setPassword"]
@@ -230,39 +286,101 @@ class RemoteEphyrInstance(BaseRemoteEphyrInstance):
         """
         variables = settings.to_dict()
         response = self.execute(
-            api_change_settings,
+            queries.api_change_settings,
             variable_values=variables,
         )
         return response["setSettings"]
 
-    def change_state(self, state: State, replace: bool = False) -> bool:
+    def change_state(
+        self,
+        state: State,
+        replace: bool = False,
+        delta: bool = False,
+        exported: Optional[dict] = None,
+    ) -> bool:
         """
         Change state (includes settings and restreams) of the Ephyr instance.
         :param state: State object
         :param replace: if True, server will try to match objects and update their
         configuration, otherwise - replace entire State.
+        :param delta: if True, compare state with the one exported from server
+        and upload only restreams that differ, see apply_state_delta
+        :param exported: result of export() to compare with in delta mode,
+        exported from server if None
         :return: success
         """
+        if delta:
+            if exported is None:
+                exported = self.export()
+            state_delta = plan_state_delta(state, exported, replace=replace)
+            return self.apply_state_delta(state_delta, replace=replace)
+
         variables = {
             "restream_id": None,
             "replace": replace,
-            "spec": state.to_json(cleanup=True, prettify=False),
+            "spec": state.to_json(cleanup=True, compact=True),
         }
         response = self.execute(
-            api_change_state,
+            queries.api_change_state,
             variable_values=variables,
         )
         return response["import"]
 
+    def apply_state_delta(self, state_delta: StateDelta, replace: bool = False) -> bool:
+        """
+        Apply delta to the Ephyr instance with targeted mutations.
+        Nothing is sent if delta is empty.
+        :param state_delta: result of plan_state_delta
+        :param replace: passed to import of every changed restream
+        :return: success of all mutations
+        """
+        results = []
+        for restream_id, restream in state_delta.changed.items():
+            variables = {
+                "restream_id": restream_id,
+                "replace": replace,
+                "spec": build_restreams_spec([restream]),
+            }
+            response = self.execute(queries.api_change_state, variable_values=variables)
+            # server returns null if there is no such restream
+            results.append(bool(response["import"]))
+
+        if state_delta.added:
+            variables = {
+                "restream_id": None,
+                "replace": False,
+                "spec": build_restreams_spec(state_delta.added),
+            }
+            response = self.execute(queries.api_change_state, variable_values=variables)
+            results.append(bool(response["import"]))
+
+        for restream_id in state_delta.removed:
+            response = self.execute(
+                queries.api_remove_restream, variable_values={"id": restream_id}
+            )
+            results.append(bool(response["removeRestream"]))
+
+        if state_delta.settings is not None:
+            results.append(self.change_settings(state_delta.settings))
+
+        return all(results)
+
     def export(self) -> dict:
         """
         Export Ephyr server data (includes restreams and settings).
         :return: dict with data
         """
-        data = self.execute(api_export_all_restreams)
+        data = self.execute(queries.api_export_all_restreams)
         as_string = data["export"]
         return json.loads(as_string)
 
+    def export_state(self) -> State:
+        """
+        Export Ephyr server data decoded into State.
+        :return: State with UuidRestream objects
+        """
+        return decode_state(self.export())
+
     def add_instance_to_dashboard(
         self,
         instance: RemoteEphyrInstanceProtocol,
@@ -275,7 +393,7 @@ class RemoteEphyrInstance(BaseRemoteEphyrInstance):
         variables = {
             "client_id": str(instance.build_url()),
         }
-        response = self.execute(dashboard_add_client, variable_values=variables)
+        response = self.execute(queries.dashboard_add_client, variable_values=variables)
         return response["addClient"]
 
     def remove_instance_from_dashboard(
@@ -290,7 +408,9 @@ class RemoteEphyrInstance(BaseRemoteEphyrInstance):
         variables = {
             "client_id": str(instance.build_url()),
         }
-        response = self.execute(dashboard_remove_client, variable_values=variables)
+        response = self.execute(
+            queries.dashboard_remove_client, variable_values=variables
+        )
         return response["removeClient"]
 
     def tune_volume(
@@ -311,11 +431,11 @@ class RemoteEphyrInstance(BaseRemoteEphyrInstance):
         variables = {
             "restream_id": restream_id.hex,
             "output_id": output_id.hex,
-            "mixin_id": mixin_id.hex,
+            "mixin_id": mixin_id.hex if mixin_id is not None else None,
             "level": volume.level,
             "muted": volume.muted,
         }
-        response = self.execute(mixin_tune_volume, variable_values=variables)
+        response = self.execute(queries.mixin_tune_volume, variable_values=variables)
         return response["tuneVolume"]
 
     def tune_delay(
@@ -340,7 +460,7 @@ class RemoteEphyrInstance(BaseRemoteEphyrInstance):
             "mixin_id": mixin_id.hex,
             "delay": delay_milliseconds,
         }
-        response = self.execute(mixin_tune_delay, variable_values=variables)
+        response = self.execute(queries.mixin_tune_delay, variable_values=variables)
         return response["tuneDelay"]
 
     def tune_sidechain(
@@ -364,5 +484,5 @@ class RemoteEphyrInstance(BaseRemoteEphyrInstance):
             "mixin_id": mixin_id.hex,
             "sidechain": sidechain_enabled,
         }
-        response = self.execute(mixin_tune_sidechain, variable_values=variables)
+        response = self.execute(queries.mixin_tune_sidechain, variable_values=variables)
         return response["tuneSidechain"]
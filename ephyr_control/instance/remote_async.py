@@ -0,0 +1,589 @@
+"""
+Asynchronous counterpart of remote API.
+Executes queries and mutations in asyncio environment,
+so single event loop can control lots of Ephyr servers at once.
+
+All clients of one instance share the same keep-alive connection pool.
+"""
+
+import asyncio
+import dataclasses
+import json
+import uuid
+from typing import Any, ClassVar, Dict, Optional, Tuple, Type
+
+import gql
+import gql.transport
+import yarl
+from gql.transport.exceptions import (
+    TransportClosed,
+    TransportProtocolError,
+    TransportServerError,
+)
+from graphql import ExecutionResult
+
+from ephyr_control.instance import queries
+from ephyr_control.instance.cache import ResponseCache
+from ephyr_control.instance.coalesce import RequestCoalescer
+from ephyr_control.instance.constants import EphyrApiPaths, EphyrPasswordKind
+from ephyr_control.instance.delta import (
+    StateDelta,
+    build_restreams_spec,
+    plan_state_delta,
+)
+from ephyr_control.instance.instrumentation import CallInfo, Instrumentation
+from ephyr_control.instance.limiter import AdaptiveLimiter
+from ephyr_control.instance.protocols import (
+    AssignedMethodCall,
+    AsyncAssignedClientProtocol,
+    AsyncClientsCollectionProtocol,
+    RemoteEphyrInstanceProtocol,
+    ServerConnectionDetails,
+)
+from ephyr_control.instance.remote import BaseRemoteEphyrInstance
+from ephyr_control.instance.resilience import CircuitBreaker, RetryPolicy
+from ephyr_control.instance.transport import (
+    JSON_HEADERS,
+    answer_to_result,
+    unwrap_result,
+)
+from ephyr_control.state.decode import decode_state
+from ephyr_control.state.restream.output.volume import Volume
+from ephyr_control.state.settings import Settings
+from ephyr_control.state.state import State
+
+try:
+    import aiohttp
+    from gql.transport.aiohttp import AIOHTTPTransport
+except ImportError:
+    raise RuntimeError("Install ephyr-control[async] extra")
+
+__all__ = (
+    "PreparedAIOHTTPTransport",
+    "HostConnectionPool",
+    "AsyncAssignedClient",
+    "AsyncClientsCollection",
+    "AsyncRemoteEphyrInstance",
+)
+
+
+class PreparedAIOHTTPTransport(AIOHTTPTransport):
+    """Asynchronous transport accepting pre-encoded request bodies."""
+
+    async def execute_prepared(self, body: bytes) -> ExecutionResult:
+        """
+        Send pre-encoded GraphQL request.
+
+        :param body: JSON encoded request body
+        :return: The result of execution.
+        """
+        return (await self.execute_prepared_sized(body))[0]
+
+    async def execute_prepared_sized(self, body: bytes) -> Tuple[ExecutionResult, int]:
+        """
+        Send pre-encoded GraphQL request, measuring response.
+
+        :param body: JSON encoded request body
+        :return: The result of execution and size of response body in bytes.
+        """
+        if self.session is None:
+            raise TransportClosed("Transport is not connected")
+
+        async with self.session.post(
+            self.url, ssl=self.ssl, data=body, headers=JSON_HEADERS
+        ) as resp:
+            self.response_headers = resp.headers
+            try:
+                result = answer_to_result(await resp.json(content_type=None))
+            except ValueError:
+                result = None
+            if result is None:
+                try:
+                    resp.raise_for_status()
+                except aiohttp.ClientResponseError as exc:
+                    raise TransportServerError(str(exc), exc.status) from exc
+                raise TransportProtocolError(
+                    f"Server did not return a GraphQL result: {await resp.text()}"
+                )
+            # body is already read, it is not read again
+            return result, len(await resp.read())
+
+
+@dataclasses.dataclass
+class HostConnectionPool:
+    """
+    Keep-alive connection pool for one Ephyr server.
+    Shared between clients of all API paths of that server.
+
+    :param limit: maximum number of simultaneous connections to server
+    :param keepalive_timeout: seconds to keep idle connection open
+    """
+
+    limit: int = 100
+    keepalive_timeout: float = 30
+
+    connector: Optional[aiohttp.TCPConnector] = dataclasses.field(
+        default=None, init=False, repr=False
+    )
+
+    def get_connector(self) -> aiohttp.TCPConnector:
+        """
+        Get connector, creating it if needed.
+        Must be called inside running event loop.
+        :return: aiohttp.TCPConnector
+        """
+        if self.connector is None or self.connector.closed:
+            self.connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+        return self.connector
+
+    async def close(self) -> None:
+        if self.connector is not None:
+            await self.connector.close()
+            self.connector = None
+
+
+@dataclasses.dataclass
+class AsyncAssignedClient(AsyncAssignedClientProtocol):
+    api_path: EphyrApiPaths
+    pool: HostConnectionPool = dataclasses.field(default_factory=HostConnectionPool)
+    url: Optional[yarl.URL] = None
+    client: gql.Client = None
+    session: Optional[gql.client.AsyncClientSession] = None
+    instrumentation: Optional[Instrumentation] = None
+
+    Transport: ClassVar[Type[gql.transport.AsyncTransport]] = PreparedAIOHTTPTransport
+
+    _connect_lock: Optional[asyncio.Lock] = dataclasses.field(
+        default=None, init=False, repr=False
+    )
+
+    @property
+    def is_initialised(self) -> bool:
+        return self.url is not None
+
+    def build_client(self, server_connection_details: ServerConnectionDetails) -> None:
+        if self.session is not None:
+            raise RuntimeError("Client is connected. Use rebuild_client method.")
+        self.url = yarl.URL.build(
+            scheme=server_connection_details.scheme,
+            host=server_connection_details.host,
+            password=server_connection_details.password or "",
+            path=self.api_path.value,
+        )
+
+    def build_transport(self) -> gql.transport.AsyncTransport:
+        """
+        Build AsyncTransport object using shared connection pool.
+        :return:
+        """
+        return self.Transport(
+            url=str(self.url),
+            client_session_args={
+                "connector": self.pool.get_connector(),
+                # pool is shared - it must survive this transport
+                "connector_owner": False,
+            },
+        )
+
+    async def connect(self) -> gql.client.AsyncClientSession:
+        """
+        Connect to server, unless already connected.
+        :return: connected session
+        """
+        if self.session is not None:
+            return self.session
+
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self.session is None:
+                self.client = gql.Client(transport=self.build_transport())
+                self.session = await self.client.connect_async()
+        return self.session
+
+    async def execute(
+        self,
+        method_call: AssignedMethodCall,
+        variable_values: Optional[Dict[str, Any]] = None,
+    ) -> dict:
+        if not self.is_initialised:
+            raise self.ClientNotInitialisedError(
+                "Client was not initialised yet. Call build_client method."
+            )
+
+        if self.api_path != method_call.api_path:
+            raise ValueError("api_path does not match")
+
+        session = await self.connect()
+        body = method_call.encode_body(variable_values)
+        if self.instrumentation is None:
+            result = await asyncio.wait_for(
+                session.transport.execute_prepared(body),
+                timeout=session.client.execute_timeout,
+            )
+            return unwrap_result(result)
+
+        call = CallInfo(
+            host=self.url.host,
+            api_path=self.api_path,
+            operation_name=method_call.operation_name,
+            request_bytes=len(body),
+        )
+        return await self.instrumentation.run_async(
+            call,
+            lambda: asyncio.wait_for(
+                session.transport.execute_prepared_sized(body),
+                timeout=session.client.execute_timeout,
+            ),
+        )
+
+    async def close(self) -> None:
+        if self.session is not None:
+            self.session = None
+            # transport leaves session open when it does not own connector
+            http_session = self.client.transport.session
+            if http_session is not None:
+                await http_session.close()
+            await self.client.close_async()
+        self.client = None
+
+
+@dataclasses.dataclass
+class AsyncClientsCollection(AsyncClientsCollectionProtocol):
+    clients: Tuple[AsyncAssignedClientProtocol, ...]
+    pool: Optional[HostConnectionPool] = None
+    cache: Optional[ResponseCache] = None
+    coalescer: Optional[RequestCoalescer] = None
+    retry_policy: Optional[RetryPolicy] = None
+    circuit_breaker: Optional[CircuitBreaker] = None
+    limiter: Optional[AdaptiveLimiter] = None
+    assigned_clients: Dict[
+        EphyrApiPaths, AsyncAssignedClientProtocol
+    ] = dataclasses.field(init=False)
+
+    def __post_init__(self):
+        self.assigned_clients = {client.api_path: client for client in self.clients}
+
+    async def close(self) -> None:
+        await super().close()
+        if self.pool is not None:
+            await self.pool.close()
+
+
+@dataclasses.dataclass
+class AsyncRemoteEphyrInstance(BaseRemoteEphyrInstance):
+    """
+    Implements concrete actions on Ephyr server as coroutines.
+    Mirrors RemoteEphyrInstance.
+
+    Use as async context manager or call close method when done,
+    to release connections:
+
+        async with AsyncRemoteEphyrInstance(ipv4="1.2.3.4") as inst:
+            info = await inst.get_info()
+    """
+
+    pool_limit: int = 100
+
+    def __post_init__(self):
+        pool = HostConnectionPool(limit=self.pool_limit)
+        self.clients = AsyncClientsCollection(
+            tuple(
+                AsyncAssignedClient(
+                    api, pool=pool, instrumentation=self.instrumentation
+                )
+                for api in self.connect_to
+            ),
+            pool=pool,
+            cache=self.response_cache,
+            coalescer=self.request_coalescer,
+            retry_policy=self.retry_policy,
+            circuit_breaker=self.circuit_breaker,
+            limiter=self.limiter,
+        )
+        self.clients.build_all_clients(self.get_connection_details())
+
+    async def __aenter__(self) -> "AsyncRemoteEphyrInstance":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self) -> None:
+        """Close all connections to server."""
+        await self.clients.close()
+
+    async def rebuild_clients(self) -> None:
+        await self.clients.rebuild_all_clients(self.get_connection_details())
+
+    async def execute(
+        self,
+        method_call: AssignedMethodCall,
+        variable_values: Optional[Dict[str, Any]] = None,
+    ):
+        return await self.clients.execute(
+            method_call=method_call, variable_values=variable_values
+        )
+
+    async def get_info(self) -> dict:
+        """
+        Get basic info about instance (title, publicHost, some settings)
+        :return: dictionary
+        """
+        data = await self.execute(queries.api_get_info)
+        return data["info"]
+
+    async def verify_ipv4_domain_match(self) -> bool:
+        public_host = (await self.get_info())["publicHost"]
+        return public_host == self.ipv4
+
+    async def change_password(
+        self,
+        new_password: str or None,
+    ) -> bool:
+        """
+        Change password. Set to None to remove password protection.
+        :param new_password: string of new password (as user types it), set
+        None to remove password protection
+        :return: success
+        """
+        variables = {
+            "new": new_password,
+            "old": self.password,
+            "kind": EphyrPasswordKind.MAIN.value,
+        }
+        response = await self.execute(
+            queries.api_change_password,
+            variable_values=variables,
+        )
+        success: bool = response["setPassword"]
+        if success:
+            self.password = new_password
+            await self.rebuild_clients()
+        return success
+
+    async def change_settings(self, settings: Settings) -> bool:
+        """
+        Change only settings of the Ephyr instance.
+        :param settings: Settings object
+        :return: success
+        """
+        variables = settings.to_dict()
+        response = await self.execute(
+            queries.api_change_settings,
+            variable_values=variables,
+        )
+        return response["setSettings"]
+
+    async def change_state(
+        self,
+        state: State,
+        replace: bool = False,
+        delta: bool = False,
+        exported: Optional[dict] = None,
+    ) -> bool:
+        """
+        Change state (includes settings and restreams) of the Ephyr instance.
+        :param state: State object
+        :param replace: if True, server will try to match objects and update their
+        configuration, otherwise - replace entire State.
+        :param delta: if True, compare state with the one exported from server
+        and upload only restreams that differ, see apply_state_delta
+        :param exported: result of export() to compare with in delta mode,
+        exported from server if None
+        :return: success
+        """
+        if delta:
+            if exported is None:
+                exported = await self.export()
+            state_delta = plan_state_delta(state, exported, replace=replace)
+            return await self.apply_state_delta(state_delta, replace=replace)
+
+        variables = {
+            "restream_id": None,
+            "replace": replace,
+            "spec": state.to_json(cleanup=True, compact=True),
+        }
+        response = await self.execute(
+            queries.api_change_state,
+            variable_values=variables,
+        )
+        return response["import"]
+
+    async def apply_state_delta(
+        self, state_delta: StateDelta, replace: bool = False
+    ) -> bool:
+        """
+        Apply delta to the Ephyr instance with targeted mutations.
+        Nothing is sent if delta is empty.
+        :param state_delta: result of plan_state_delta
+        :param replace: passed to import of every changed restream
+        :return: success of all mutations
+        """
+        results = []
+        for restream_id, restream in state_delta.changed.items():
+            variables = {
+                "restream_id": restream_id,
+                "replace": replace,
+                "spec": build_restreams_spec([restream]),
+            }
+            response = await self.execute(
+                queries.api_change_state, variable_values=variables
+            )
+            # server returns null if there is no such restream
+            results.append(bool(response["import"]))
+
+        if state_delta.added:
+            variables = {
+                "restream_id": None,
+                "replace": False,
+                "spec": build_restreams_spec(state_delta.added),
+            }
+            response = await self.execute(
+                queries.api_change_state, variable_values=variables
+            )
+            results.append(bool(response["import"]))
+
+        for restream_id in state_delta.removed:
+            response = await self.execute(
+                queries.api_remove_restream, variable_values={"id": restream_id}
+            )
+            results.append(bool(response["removeRestream"]))
+
+        if state_delta.settings is not None:
+            results.append(await self.change_settings(state_delta.settings))
+
+        return all(results)
+
+    async def export(self) -> dict:
+        """
+        Export Ephyr server data (includes restreams and settings).
+        :return: dict with data
+        """
+        data = await self.execute(queries.api_export_all_restreams)
+        as_string = data["export"]
+        return json.loads(as_string)
+
+    async def export_state(self) -> State:
+        """
+        Export Ephyr server data decoded into State.
+        :return: State with UuidRestream objects
+        """
+        return decode_state(await self.export())
+
+    async def add_instance_to_dashboard(
+        self,
+        instance: RemoteEphyrInstanceProtocol,
+    ) -> bool:
+        """Add another instance to Dashboard UI.
+
+        :param instance: Ephyr instance to add to dashboard
+        :return: success status
+        """
+        variables = {
+            "client_id": str(instance.build_url()),
+        }
+        response = await self.execute(
+            queries.dashboard_add_client, variable_values=variables
+        )
+        return response["addClient"]
+
+    async def remove_instance_from_dashboard(
+        self,
+        instance: RemoteEphyrInstanceProtocol,
+    ) -> bool:
+        """Remove another instance from Dashboard UI
+
+        :param instance: Ephyr instance to remove from dashboard
+        :return: success status
+        """
+        variables = {
+            "client_id": str(instance.build_url()),
+        }
+        response = await self.execute(
+            queries.dashboard_remove_client, variable_values=variables
+        )
+        return response["removeClient"]
+
+    async def tune_volume(
+        self,
+        restream_id: uuid.UUID,
+        output_id: uuid.UUID,
+        volume: Volume,
+        mixin_id: Optional[uuid.UUID] = None,
+    ) -> bool:
+        """
+        Set volume options for output's main source or one of it's mixins.
+        :param restream_id: uuid of Restream
+        :param output_id: uuid of Output
+        :param mixin_id: optional, if None - applies for main source (e.g. not a mixin)
+        :param volume: Volume object containing
+        :return: success
+        """
+        variables = {
+            "restream_id": restream_id.hex,
+            "output_id": output_id.hex,
+            "mixin_id": mixin_id.hex if mixin_id is not None else None,
+            "level": volume.level,
+            "muted": volume.muted,
+        }
+        response = await self.execute(
+            queries.mixin_tune_volume, variable_values=variables
+        )
+        return response["tuneVolume"]
+
+    async def tune_delay(
+        self,
+        restream_id: uuid.UUID,
+        output_id: uuid.UUID,
+        mixin_id: uuid.UUID,
+        delay_milliseconds: int,
+    ) -> bool:
+        """
+        Set delay option for output's mixin.
+        :param restream_id: uuid of Restream
+        :param output_id: uuid of Output
+        :param mixin_id: uuid of Mixin
+        :param delay_milliseconds: delay in milliseconds, controls by how much
+        mixin stream will be delayed relatively to main stream.
+        :return: success
+        """
+        variables = {
+            "restream_id": restream_id.hex,
+            "output_id": output_id.hex,
+            "mixin_id": mixin_id.hex,
+            "delay": delay_milliseconds,
+        }
+        response = await self.execute(
+            queries.mixin_tune_delay, variable_values=variables
+        )
+        return response["tuneDelay"]
+
+    async def tune_sidechain(
+        self,
+        restream_id: uuid.UUID,
+        output_id: uuid.UUID,
+        mixin_id: uuid.UUID,
+        sidechain_enabled: bool,
+    ) -> bool:
+        """
+        Set sidechain option for output's mixin.
+        :param restream_id: uuid of Restream
+        :param output_id: uuid of Output
+        :param mixin_id: uuid of Mixin
+        :param sidechain_enabled: state of sidechain feature
+        :return: success
+        """
+        variables = {
+            "restream_id": restream_id.hex,
+            "output_id": output_id.hex,
+            "mixin_id": mixin_id.hex,
+            "sidechain": sidechain_enabled,
+        }
+        response = await self.execute(
+            queries.mixin_tune_sidechain, variable_values=variables
+        )
+        return response["tuneSidechain"]
@@ -0,0 +1,222 @@
+"""
+Local read replica of state of Ephyr instance.
+
+Instead of calling `export()` every time current restreams are needed,
+StateReplica exports state once and then follows `api_subscribe_to_state`
+subscription, so reads are served from memory without network calls.
+Only restreams that changed since the previous payload are decoded again.
+
+See example usage in examples/replica.py
+"""
+
+import asyncio
+import dataclasses
+import inspect
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from ephyr_control.instance.protocols import RemoteEphyrInstanceProtocol
+from ephyr_control.instance.queries import api_subscribe_to_state
+from ephyr_control.instance.subscribe import Subscription
+from ephyr_control.state import State
+from ephyr_control.state.decode import decode_restream
+from ephyr_control.state.restream import Output, Restream
+from ephyr_control.utils.backoff import Backoff
+
+__all__ = ("StateReplica",)
+
+
+def _statuses(restream: Dict[str, Any]) -> Dict[uuid.UUID, Any]:
+    """Statuses of outputs and input endpoints of restream payload, by their id."""
+    statuses = {}
+    inputs = [restream.get("input") or {}]
+    while inputs:
+        input_ = inputs.pop()
+        for endpoint in input_.get("endpoints") or ():
+            statuses[uuid.UUID(endpoint["id"])] = endpoint.get("status")
+        inputs.extend((input_.get("src") or {}).get("inputs") or ())
+    for output in restream.get("outputs") or ():
+        statuses[uuid.UUID(output["id"])] = output.get("status")
+    return statuses
+
+
+@dataclasses.dataclass
+class StateReplica:
+    """
+    State of Ephyr instance, kept current by subscription.
+
+    Acts as async context manager - bootstraps and starts following
+    the subscription on enter, stops on exit.
+    Returned objects are owned by replica and must not be modified.
+
+    :param instance: remote instance, sync or async, providing export_state()
+    :param backoff: delays between reconnections of subscription
+    """
+
+    instance: RemoteEphyrInstanceProtocol
+    backoff: Backoff = dataclasses.field(default_factory=Backoff)
+
+    state: Optional[State] = dataclasses.field(default=None, init=False)
+    # UNIX time when state was known to be current
+    updated_at: Optional[float] = dataclasses.field(default=None, init=False)
+    # number of applied subscription payloads
+    updates: int = dataclasses.field(default=0, init=False)
+
+    # payloads of restreams by id, to find changed ones
+    _payloads: Dict[str, dict] = dataclasses.field(
+        default_factory=dict, init=False, repr=False
+    )
+    # id of output or endpoint -> status
+    _statuses: Dict[uuid.UUID, Any] = dataclasses.field(
+        default_factory=dict, init=False, repr=False
+    )
+    # id of output -> id of its restream
+    _output_restreams: Dict[uuid.UUID, uuid.UUID] = dataclasses.field(
+        default_factory=dict, init=False, repr=False
+    )
+    _task: Optional[asyncio.Task] = dataclasses.field(
+        default=None, init=False, repr=False
+    )
+
+    @property
+    def age(self) -> Optional[float]:
+        """Seconds since state was known to be current, None before bootstrap."""
+        if self.updated_at is None:
+            return None
+        return time.time() - self.updated_at
+
+    @property
+    def is_following(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def bootstrap(self) -> State:
+        """
+        Export current state of instance.
+        :return: State
+        """
+        export_state = self.instance.export_state
+        if inspect.iscoroutinefunction(export_state):
+            state = await export_state()
+        else:
+            state = await asyncio.get_running_loop().run_in_executor(None, export_state)
+        self.state = state
+        self._output_restreams = {}
+        for restream in state.restreams:
+            self._index_outputs(restream)
+        self.updated_at = time.time()
+        return state
+
+    async def start(self) -> None:
+        """Bootstrap and follow subscription in background task."""
+        if self._task is not None:
+            raise RuntimeError("Replica is already started.")
+        await self.bootstrap()
+        self._task = asyncio.ensure_future(self.follow())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def __aenter__(self) -> "StateReplica":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    async def follow(self) -> None:
+        """Apply payloads of state subscription until cancelled."""
+        subscription = Subscription(
+            instance=self.instance, method_call=api_subscribe_to_state
+        )
+        async with subscription.resilient(backoff=self.backoff) as updates:
+            async for update in updates:
+                self.apply(update.data)
+
+    def apply(self, payload: Dict[str, Any]) -> None:
+        """
+        Update state from payload of api_subscribe_to_state,
+        decoding only restreams that changed.
+        :param payload: data of subscription, with `allRestreams` list
+        """
+        if self.state is None:
+            self.state = State()
+        previous, current = self._payloads, {}
+        restreams: List[Restream] = []
+        changed = False
+        for data in payload["allRestreams"]:
+            current[data["id"]] = data
+            old = previous.get(data["id"])
+            if old == data:
+                restreams.append(self.state.get_restream_by_id(uuid.UUID(data["id"])))
+                continue
+            changed = True
+            restream = decode_restream(data)
+            restreams.append(restream)
+            if old is not None:
+                self._forget(old)
+            self._statuses.update(_statuses(data))
+            self._index_outputs(restream)
+        for restream_id, old in previous.items():
+            if restream_id not in current:
+                changed = True
+                self._forget(old)
+
+        if changed or list(current) != list(previous):
+            self.state.restreams = restreams
+            self.state.reindex()
+        self._payloads = current
+        self.updates += 1
+        self.updated_at = time.time()
+
+    def _index_outputs(self, restream: Restream) -> None:
+        for output in restream.outputs:
+            self._output_restreams[output.id] = restream.id
+
+    def _forget(self, payload: Dict[str, Any]) -> None:
+        for key in _statuses(payload):
+            self._statuses.pop(key, None)
+            self._output_restreams.pop(key, None)
+
+    # reads
+    # =====
+
+    def _get_state(self) -> State:
+        if self.state is None:
+            raise RuntimeError("Replica is not bootstrapped.")
+        return self.state
+
+    @property
+    def restreams(self) -> List[Restream]:
+        return self._get_state().restreams
+
+    def get_restream_by_key(self, restream_key: str) -> Restream:
+        return self._get_state().get_restream_by_key(restream_key)
+
+    def get_restream_by_id(self, restream_id: uuid.UUID) -> Restream:
+        return self._get_state().get_restream_by_id(restream_id)
+
+    def get_output_by_id(self, output_id: uuid.UUID) -> Output:
+        """
+        Find output in any restream.
+        :raises KeyError: if there is no such output
+        """
+        try:
+            restream_id = self._output_restreams[output_id]
+        except KeyError:
+            raise KeyError(f'Output with id="{output_id}" not found.')
+        return self.get_restream_by_id(restream_id).get_output_by_id(output_id)
+
+    def get_status(self, entity_id: uuid.UUID) -> Optional[str]:
+        """
+        Status of output or input endpoint, e.g. "ONLINE".
+        Known only after the first subscription payload.
+        :raises KeyError: if status is not known
+        """
+        try:
+            return self._statuses[entity_id]
+        except KeyError:
+            raise KeyError(f'Status of id="{entity_id}" is not known.')
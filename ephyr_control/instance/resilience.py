@@ -0,0 +1,314 @@
+"""
+Retries of failed queries and circuit breaker of unhealthy server.
+
+Without them, a dead server makes every caller wait for the full timeout
+again and again, and a short network glitch fails the operation.
+RetryPolicy repeats queries failed by transport, never mutations,
+because mutation may have been applied before connection broke.
+CircuitBreaker counts failed calls of an instance in a row, a call with
+all its retries being one call, and once the instance is known unhealthy,
+calls fail fast with CircuitOpenError until recovery timeout, after which
+one probe call, with its retries, decides whether the circuit closes again.
+
+Both are opt-in, per instance:
+
+    inst = RemoteEphyrInstance(
+        ipv4="1.2.3.4",
+        retry_policy=RetryPolicy(attempts=3, deadline=10),
+        circuit_breaker=CircuitBreaker(failure_threshold=5),
+    )
+"""
+
+import asyncio
+import dataclasses
+import enum
+import logging
+import sys
+import threading
+import time
+from typing import Awaitable, Callable, Optional, Tuple, Type
+
+from gql.transport.exceptions import (
+    TransportError,
+    TransportQueryError,
+    TransportServerError,
+)
+from graphql import OperationType
+
+from ephyr_control.instance.protocols import AssignedMethodCall
+from ephyr_control.utils.backoff import Backoff
+
+__all__ = (
+    "CircuitOpenError",
+    "CircuitState",
+    "CircuitBreaker",
+    "RetryPolicy",
+    "TRANSIENT_ERRORS",
+    "is_transient_error",
+)
+
+logger = logging.getLogger(__name__)
+
+# failures of transport, not of operation itself
+# requests exceptions are subclasses of OSError,
+# aiohttp.ClientError is checked separately, see is_transient_error
+TRANSIENT_ERRORS: Tuple[Type[BaseException], ...] = (
+    TransportError,
+    OSError,
+    asyncio.TimeoutError,
+)
+
+
+class CircuitOpenError(TransportError):
+    """Raised instead of calling server known to be unhealthy."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """
+    Whether error is caused by server or connection being unavailable,
+    so the same request may succeed later.
+    GraphQL errors and client errors (HTTP 4xx) are not transient.
+    """
+    if isinstance(exc, (TransportQueryError, CircuitOpenError)):
+        return False
+    if isinstance(exc, TransportServerError):
+        return exc.code is None or exc.code >= 500
+    if isinstance(exc, TRANSIENT_ERRORS):
+        return True
+    # aiohttp is not imported for synchronous clients,
+    # and if it is not imported, its errors can not be raised
+    aiohttp = sys.modules.get("aiohttp")
+    return aiohttp is not None and isinstance(exc, aiohttp.ClientError)
+
+
+class CircuitState(enum.Enum):
+    # calls pass
+    CLOSED = "closed"
+    # calls fail fast
+    OPEN = "open"
+    # one probe call passes, others fail fast
+    HALF_OPEN = "half_open"
+
+
+@dataclasses.dataclass
+class CircuitBreaker:
+    """
+    Circuit breaker of one instance - do not share it between instances.
+
+    :param failure_threshold: calls failed by transport in a row opening the circuit,
+    retries of a call are not counted separately
+    :param recovery_timeout: seconds circuit stays open before probe call
+    """
+
+    failure_threshold: int = 5
+    recovery_timeout: float = 30.0
+
+    state: CircuitState = dataclasses.field(default=CircuitState.CLOSED, init=False)
+    # transient failures in a row
+    failures: int = dataclasses.field(default=0, init=False)
+    # calls failed fast without calling server
+    rejected: int = dataclasses.field(default=0, init=False)
+    # time.monotonic() when circuit opened
+    opened_at: Optional[float] = dataclasses.field(default=None, init=False)
+
+    _lock: threading.Lock = dataclasses.field(
+        default_factory=threading.Lock, init=False, repr=False
+    )
+
+    def __post_init__(self):
+        if self.failure_threshold < 1:
+            raise ValueError("failure_threshold must be positive.")
+
+    @property
+    def retry_after(self) -> float:
+        """Seconds till probe call is allowed, 0 if calls pass."""
+        if self.state is not CircuitState.OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.recovery_timeout - time.monotonic())
+
+    def before_call(self) -> None:
+        """
+        Check that call may be sent to server.
+        :raises CircuitOpenError: if server is known to be unhealthy
+        """
+        with self._lock:
+            if self.state is CircuitState.CLOSED:
+                return
+            if self.state is CircuitState.OPEN and not self.retry_after:
+                # this call is the probe
+                self.state = CircuitState.HALF_OPEN
+                return
+            self.rejected += 1
+            retry_after = self.retry_after or self.recovery_timeout
+        raise CircuitOpenError(
+            f"Server is unhealthy, calls fail fast for {retry_after:.1f}s",
+            retry_after=retry_after,
+        )
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state is not CircuitState.CLOSED:
+                logger.info("Circuit closed, server is healthy again")
+            self.state = CircuitState.CLOSED
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self, exc: BaseException) -> None:
+        """Count failure, only transient ones may open the circuit."""
+        if not is_transient_error(exc):
+            # server answered, so it is alive
+            self.record_success()
+            return
+        with self._lock:
+            self.failures += 1
+            if (
+                self.state is CircuitState.HALF_OPEN
+                or self.failures >= self.failure_threshold
+            ):
+                if self.state is not CircuitState.OPEN:
+                    logger.warning(f"Circuit opened after {self.failures} failures")
+                self.state = CircuitState.OPEN
+                self.opened_at = time.monotonic()
+
+    def abandon_call(self) -> None:
+        """
+        Forget call interrupted before its outcome was known,
+        so if it was the probe, the next call probes server instead.
+        """
+        with self._lock:
+            if self.state is CircuitState.HALF_OPEN:
+                self.state = CircuitState.OPEN
+
+    def call(self, execute: Callable[[], dict]) -> dict:
+        """
+        Execute operation unless circuit is open.
+        :raises CircuitOpenError: if server is known to be unhealthy
+        :param execute: function sending operation to server
+        :return: data
+        """
+        self.before_call()
+        try:
+            data = execute()
+        except Exception as exc:
+            self.record_failure(exc)
+            raise
+        except BaseException:
+            # e.g. KeyboardInterrupt, nothing is known about server
+            self.abandon_call()
+            raise
+        self.record_success()
+        return data
+
+    async def call_async(self, execute: Callable[[], Awaitable[dict]]) -> dict:
+        """Asynchronous counterpart of call."""
+        self.before_call()
+        try:
+            data = await execute()
+        except asyncio.CancelledError:
+            # subclass of Exception before Python 3.8
+            self.abandon_call()
+            raise
+        except Exception as exc:
+            self.record_failure(exc)
+            raise
+        except BaseException:
+            self.abandon_call()
+            raise
+        self.record_success()
+        return data
+
+
+@dataclasses.dataclass
+class RetryPolicy:
+    """
+    Retries of queries failed with transient errors.
+    Mutations are not idempotent and are never retried.
+
+    :param attempts: maximal number of attempts, including the first one
+    :param backoff: delays between attempts
+    :param deadline: seconds all attempts together may take, None for no limit;
+    no attempt is started if its delay would pass the deadline, and
+    asynchronous attempts are cancelled when it passes
+    """
+
+    attempts: int = 3
+    backoff: Backoff = dataclasses.field(
+        default_factory=lambda: Backoff(initial=0.2, maximum=2.0)
+    )
+    deadline: Optional[float] = 10.0
+
+    # attempts repeated after failure
+    retries: int = dataclasses.field(default=0, init=False)
+
+    def __post_init__(self):
+        if self.attempts < 1:
+            raise ValueError("attempts must be positive.")
+
+    def _next_delay(
+        self,
+        method_call: AssignedMethodCall,
+        exc: BaseException,
+        attempt: int,
+        started_at: float,
+    ) -> Optional[float]:
+        # delay before the next attempt, None if it should not be made
+        if method_call.operation_type is not OperationType.QUERY:
+            return None
+        if attempt + 1 >= self.attempts or not is_transient_error(exc):
+            return None
+        delay = self.backoff.delay(attempt)
+        if self.deadline is not None:
+            if time.monotonic() + delay - started_at >= self.deadline:
+                return None
+        self.retries += 1
+        logger.debug(f"Retrying {method_call.operation_name} in {delay:.2f}s: {exc}")
+        return delay
+
+    def call(
+        self, method_call: AssignedMethodCall, execute: Callable[[], dict]
+    ) -> dict:
+        """
+        Execute operation, retrying query if it fails with transient error.
+        :param method_call: GraphQL operation
+        :param execute: function sending operation to server
+        :return: data
+        """
+        started_at = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                return execute()
+            except Exception as exc:
+                delay = self._next_delay(method_call, exc, attempt, started_at)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
+    async def call_async(
+        self,
+        method_call: AssignedMethodCall,
+        execute: Callable[[], Awaitable[dict]],
+    ) -> dict:
+        """Asynchronous counterpart of call."""
+        started_at = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                if (
+                    self.deadline is None
+                    or method_call.operation_type is not OperationType.QUERY
+                ):
+                    return await execute()
+                remaining = started_at + self.deadline - time.monotonic()
+                return await asyncio.wait_for(execute(), timeout=max(remaining, 0))
+            except Exception as exc:
+                delay = self._next_delay(method_call, exc, attempt, started_at)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
@@ -5,18 +5,24 @@ Unlike most of the lib, it is developed for use in asyncio environment.
 See example usage in examples/subscribe.py
 """
 
+import asyncio
 import dataclasses
+import logging
+import time
 from typing import Any, AsyncIterator, ClassVar, Dict, Optional, Type
 
 import gql
 import gql.transport
 import graphql
 import yarl
+from gql.transport.exceptions import TransportError, TransportQueryError
 
 from ephyr_control.instance.protocols import AssignedMethodCall, EphyrInstanceProtocol
+from ephyr_control.utils.backoff import Backoff
 
 try:
     from gql.transport.websockets import WebsocketsTransport
+    from websockets.exceptions import WebSocketException
 except ImportError:
     raise RuntimeError("Install gql[websockets] extra")
 
@@ -24,6 +30,18 @@ __all__ = (
     "Subscription",
     "SubscriptionSession",
     "UpdatesIterator",
+    "SubscriptionUpdate",
+    "ResilientUpdatesIterator",
+)
+
+logger = logging.getLogger(__name__)
+
+# failures of connection, after which operation can be re-issued
+RECONNECTABLE_ERRORS = (
+    TransportError,
+    WebSocketException,
+    OSError,
+    asyncio.TimeoutError,
 )
 
 
@@ -37,11 +55,18 @@ class Subscription:
     :param instance: provides connection options
     :param method_call: defines GraphQL operation and API (path) to use
     :param use_ssl: overrides SSL on/off settings provided by EphyrInstance
+    :param compression: negotiate per-message compression, it costs
+    about 200 KiB of zlib buffers per connection, so it is worth disabling
+    when holding many connections with small payloads
+    :param connect_timeout: seconds to open connection and to get its
+    acknowledgement from server each, transport's default if None
     """
 
     instance: EphyrInstanceProtocol
     method_call: AssignedMethodCall
     use_ssl: Optional[bool] = None
+    compression: bool = True
+    connect_timeout: Optional[float] = None
 
     Transport: ClassVar[Type[gql.transport.AsyncTransport]] = WebsocketsTransport
 
@@ -75,13 +100,17 @@ class Subscription:
         :param url:
         :return:
         """
-        return self.Transport(
-            str(url),
-            connect_args={
-                # Ephyr server does not support ping at the moment
-                "ping_interval": None,
-            },
-        )
+        connect_args = {
+            # Ephyr server does not support ping at the moment
+            "ping_interval": None,
+        }
+        if not self.compression:
+            connect_args["compression"] = None
+        timeouts = {}
+        if self.connect_timeout is not None:
+            timeouts["connect_timeout"] = self.connect_timeout
+            timeouts["ack_timeout"] = self.connect_timeout
+        return self.Transport(str(url), connect_args=connect_args, **timeouts)
 
     def build_client(self) -> gql.Client:
         """
@@ -101,6 +130,34 @@ class Subscription:
         """
         return SubscriptionSession(subscription=self, client=self.build_client())
 
+    def resilient(
+        self,
+        variable_values: Optional[Dict[str, Any]] = None,
+        backoff: Optional[Backoff] = None,
+        max_attempts: Optional[int] = None,
+        connect_limit: Optional[asyncio.Semaphore] = None,
+    ) -> "ResilientUpdatesIterator":
+        """
+        Iterate data of operation over own connection, reconnecting if it drops.
+        Connection is opened on first iteration.
+
+        :param variable_values: dict of variables used in GraphQl
+        subscription operation.
+        :param backoff: delays between reconnection attempts
+        :param max_attempts: reconnection attempts in a row before giving up,
+        None to retry forever
+        :param connect_limit: semaphore held during every connection attempt,
+        limits number of handshakes at once
+        :return: ResilientUpdatesIterator
+        """
+        return ResilientUpdatesIterator(
+            subscription=self,
+            variable_values=variable_values,
+            backoff=backoff or Backoff(),
+            max_attempts=max_attempts,
+            connect_limit=connect_limit,
+        )
+
 
 @dataclasses.dataclass(frozen=True)
 class SubscriptionSession:
@@ -148,3 +205,186 @@ class UpdatesIterator:
             self.subscription.method_call.query,
             variable_values=variable_values,
         )
+
+    def iterate_resilient(
+        self,
+        variable_values: Optional[Dict[str, Any]] = None,
+        backoff: Optional[Backoff] = None,
+        max_attempts: Optional[int] = None,
+    ) -> "ResilientUpdatesIterator":
+        """
+        Executes operation and iterates data, reconnecting session's transport
+        and re-issuing operation if connection drops.
+        Connection stays managed by SubscriptionSession.
+
+        :param variable_values: dict of variables used in GraphQl
+        subscription operation.
+        :param backoff: delays between reconnection attempts
+        :param max_attempts: reconnection attempts in a row before giving up,
+        None to retry forever
+        :return: ResilientUpdatesIterator
+        """
+        return ResilientUpdatesIterator(
+            subscription=self.subscription,
+            variable_values=variable_values,
+            backoff=backoff or Backoff(),
+            max_attempts=max_attempts,
+            session=self.session,
+        )
+
+
+@dataclasses.dataclass(frozen=True)
+class SubscriptionUpdate:
+    """
+    Data of operation, yielded by ResilientUpdatesIterator.
+
+    :param data: payload of operation, or its decoded form
+    :param resync: True for the first payload after reconnection -
+    a full snapshot, updates between connections were lost
+    """
+
+    data: Any
+    resync: bool = False
+
+
+@dataclasses.dataclass
+class ResilientUpdatesIterator:
+    """
+    Async iterator of SubscriptionUpdate, surviving dropped connections.
+
+    When connection fails, waits according to backoff, reconnects
+    and re-issues operation with the same variables.
+    Errors of operation itself (TransportQueryError) are raised as is.
+    Acts as async context manager - stops iteration and closes
+    own connection on exit.
+
+    :param subscription: defines instance and operation
+    :param variable_values: dict of variables of operation
+    :param backoff: delays between reconnection attempts
+    :param max_attempts: reconnection attempts in a row before giving up
+    and raising the last error, None to retry forever
+    :param session: session to reconnect, own connection is opened if None
+    :param connect_limit: semaphore held during every connection attempt,
+    released when handshake is done or failed
+    """
+
+    subscription: Subscription
+    variable_values: Optional[Dict[str, Any]] = None
+    backoff: Backoff = dataclasses.field(default_factory=Backoff)
+    max_attempts: Optional[int] = None
+    session: Optional[gql.client.AsyncClientSession] = None
+    connect_limit: Optional[asyncio.Semaphore] = None
+
+    # number of successful reconnections
+    reconnects: int = dataclasses.field(default=0, init=False)
+    # seconds without data, summed over finished outages
+    downtime: float = dataclasses.field(default=0.0, init=False)
+    last_error: Optional[BaseException] = dataclasses.field(default=None, init=False)
+
+    _client: Optional[gql.Client] = dataclasses.field(
+        default=None, init=False, repr=False
+    )
+    _disconnected_at: Optional[float] = dataclasses.field(
+        default=None, init=False, repr=False
+    )
+    _iterator: Optional[AsyncIterator[SubscriptionUpdate]] = dataclasses.field(
+        default=None, init=False, repr=False
+    )
+
+    @property
+    def is_connected(self) -> bool:
+        return self._disconnected_at is None and self.session is not None
+
+    @property
+    def total_downtime(self) -> float:
+        """Seconds without data, including current outage."""
+        if self._disconnected_at is None:
+            return self.downtime
+        return self.downtime + time.monotonic() - self._disconnected_at
+
+    def __aiter__(self) -> AsyncIterator[SubscriptionUpdate]:
+        if self._iterator is None:
+            self._iterator = self._iterate()
+        return self._iterator
+
+    async def _connect(self) -> gql.client.AsyncClientSession:
+        if self.connect_limit is None:
+            return await self._handshake()
+        async with self.connect_limit:
+            return await self._handshake()
+
+    async def _handshake(self) -> gql.client.AsyncClientSession:
+        if self.session is None:
+            if self._client is None:
+                self._client = self.subscription.build_client()
+            self.session = await self._client.connect_async()
+        else:
+            transport = self.session.transport
+            await transport.close()
+            await transport.connect()
+        return self.session
+
+    async def _iterate(self) -> AsyncIterator[SubscriptionUpdate]:
+        query = self.subscription.method_call.query
+        session = self.session
+        attempt = 0
+        resync = False
+        try:
+            while True:
+                try:
+                    if session is None or resync:
+                        session = await self._connect()
+                    async for data in session.subscribe(
+                        query, variable_values=self.variable_values
+                    ):
+                        if self._disconnected_at is not None:
+                            self._recovered()
+                            attempt = 0
+                        yield SubscriptionUpdate(data=data, resync=resync)
+                        resync = False
+                    return  # server completed operation
+                except TransportQueryError:
+                    raise
+                except RECONNECTABLE_ERRORS as exc:
+                    if self.max_attempts is not None and attempt >= self.max_attempts:
+                        raise
+                    self._failed(exc)
+                    delay = self.backoff.delay(attempt)
+                    attempt += 1
+                    logger.warning(
+                        f"Subscription to {self.subscription.build_ws_url()} failed:"
+                        f" {exc!r}, reconnecting in {delay:.1f}s"
+                    )
+                    await asyncio.sleep(delay)
+                    resync = True
+        finally:
+            await self._close_client()
+
+    def _failed(self, exc: BaseException) -> None:
+        self.last_error = exc
+        if self._disconnected_at is None:
+            self._disconnected_at = time.monotonic()
+
+    def _recovered(self) -> None:
+        self.downtime += time.monotonic() - self._disconnected_at
+        self._disconnected_at = None
+        self.reconnects += 1
+
+    async def _close_client(self) -> None:
+        client, self._client = self._client, None
+        # client has no session if it never connected
+        if client is not None and self.session is not None:
+            self.session = None
+            await client.close_async()
+
+    async def close(self) -> None:
+        """Stop iteration and close own connection."""
+        if self._iterator is not None:
+            await self._iterator.aclose()
+        await self._close_client()
+
+    async def __aenter__(self) -> "ResilientUpdatesIterator":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
@@ -0,0 +1,402 @@
+"""
+History of server info and statistics of Ephyr instances.
+
+Samples of `api_subscribe_to_server_info` and `dashboard_subscribe_to_statistics`
+are written into fixed-size ring buffers, one numpy array per metric,
+with a row per instance. No Python objects are kept per sample,
+and queries over all instances at once are vectorized.
+
+Needs `numpy` installed, see `ephyr-control[timeseries]` extra.
+"""
+
+import dataclasses
+import time
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    raise RuntimeError("Install ephyr-control[timeseries] extra")
+
+__all__ = (
+    "COLUMNS",
+    "TimeSeriesStore",
+)
+
+STATUSES = ("OFFLINE", "INITIALIZING", "ONLINE", "UNSTABLE")
+
+# metric -> type of its values, chosen to keep samples small
+COLUMNS: Dict[str, Any] = {
+    "cpu_usage": np.float32,
+    "ram_total": np.float32,
+    "ram_free": np.float32,
+    "tx_delta": np.float32,
+    "rx_delta": np.float32,
+    **{f"inputs_{status.lower()}": np.uint16 for status in STATUSES},
+    **{f"outputs_{status.lower()}": np.uint16 for status in STATUSES},
+}
+
+# field of serverInfo -> metric
+SERVER_INFO_FIELDS = {
+    "cpuUsage": "cpu_usage",
+    "ramTotal": "ram_total",
+    "ramFree": "ram_free",
+    "txDelta": "tx_delta",
+    "rxDelta": "rx_delta",
+}
+
+
+# offset of sample in milliseconds from base time of its row
+TIMESTAMP = np.uint32
+MAX_OFFSET = np.iinfo(TIMESTAMP).max
+
+
+@dataclasses.dataclass
+class TimeSeriesStore:
+    """
+    Ring buffers of samples per instance, the oldest samples are overwritten.
+
+    Timestamps are stored with millisecond precision as uint32 offsets from
+    base time of instance, which is moved forward when offsets overflow,
+    so samples of one instance may span up to 49 days.
+    A metric takes memory only after its first value was appended:
+    a sample of server info takes 24 bytes, with counts of inputs
+    and outputs 40 bytes.
+    Missing float metrics are NaN and are skipped by queries,
+    missing counts are 0.
+
+    :param capacity: samples kept per instance, e.g. 3600 for an hour of
+    samples every second
+    """
+
+    capacity: int = 3600
+
+    # key of instance -> row of arrays
+    keys: Dict[str, int] = dataclasses.field(default_factory=dict, init=False)
+
+    # UNIX time offsets are counted from, per row
+    _bases: "np.ndarray" = dataclasses.field(init=False, repr=False)
+    _timestamps: "np.ndarray" = dataclasses.field(init=False, repr=False)
+    # metric -> array, only of metrics that had values
+    _columns: Dict[str, "np.ndarray"] = dataclasses.field(init=False, repr=False)
+    # position of the next sample and number of samples, per row
+    _heads: "np.ndarray" = dataclasses.field(init=False, repr=False)
+    _sizes: "np.ndarray" = dataclasses.field(init=False, repr=False)
+
+    def __post_init__(self):
+        if self.capacity < 1:
+            raise ValueError("capacity must be positive.")
+        self._bases = np.zeros(0, dtype=np.float64)
+        self._timestamps = np.zeros((0, self.capacity), dtype=TIMESTAMP)
+        self._columns = {}
+        self._heads = np.zeros(0, dtype=np.int64)
+        self._sizes = np.zeros(0, dtype=np.int64)
+
+    def _empty(self, dtype: Any, rows: int) -> "np.ndarray":
+        if np.issubdtype(dtype, np.floating):
+            return np.full((rows, self.capacity), np.nan, dtype=dtype)
+        return np.zeros((rows, self.capacity), dtype=dtype)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory taken by samples."""
+        return (
+            self._bases.nbytes
+            + self._timestamps.nbytes
+            + sum(column.nbytes for column in self._columns.values())
+        )
+
+    def __len__(self) -> int:
+        """Number of stored samples of all instances."""
+        return int(self._sizes.sum())
+
+    def _row(self, key: str) -> int:
+        row = self.keys.get(key)
+        if row is not None:
+            return row
+        row = self.keys[key] = len(self.keys)
+        if row >= len(self._heads):
+            self._grow(max(2 * len(self._heads), 16))
+        return row
+
+    def _grow(self, rows: int) -> None:
+        old = len(self._heads)
+
+        def extend(array: "np.ndarray") -> "np.ndarray":
+            grown = self._empty(array.dtype, rows)
+            grown[:old] = array
+            return grown
+
+        self._timestamps = extend(self._timestamps)
+        self._columns = {name: extend(column) for name, column in self._columns.items()}
+        self._bases = np.concatenate([self._bases, np.zeros(rows - old)])
+        self._heads = np.concatenate([self._heads, np.zeros(rows - old, np.int64)])
+        self._sizes = np.concatenate([self._sizes, np.zeros(rows - old, np.int64)])
+
+    def _column(self, name: str) -> "np.ndarray":
+        # values of all rows, missing ones if metric had no values yet
+        column = self._columns.get(name)
+        if column is None:
+            column = self._empty(COLUMNS[name], len(self._heads))
+        return column
+
+    def _filled(self, rows: int) -> "np.ndarray":
+        # ring buffers are filled from the start, and wrap only when full
+        return np.arange(self.capacity) < self._sizes[:rows, None]
+
+    def _offset(self, row: int, position: int, timestamp: float) -> int:
+        if self._sizes[row] == 0:
+            self._bases[row] = timestamp
+            return 0
+        offset = round((timestamp - self._bases[row]) * 1000)
+        if 0 <= offset <= MAX_OFFSET:
+            return offset
+        # move base to the oldest of kept samples and the new one
+        kept = np.arange(self.capacity) < self._sizes[row]
+        if self._sizes[row] == self.capacity:
+            # overwritten by the new sample
+            kept[position] = False
+        offsets = self._timestamps[row].astype(np.int64)
+        shift = min(offsets[kept].min(initial=offset), offset)
+        if offsets[kept].max(initial=offset) - shift > MAX_OFFSET:
+            raise ValueError("Samples of instance would span more than 49 days.")
+        self._timestamps[row, kept] = offsets[kept] - shift
+        self._bases[row] += shift / 1000
+        return offset - shift
+
+    def append(
+        self,
+        key: str,
+        values: Mapping[str, float],
+        timestamp: Optional[float] = None,
+    ) -> None:
+        """
+        Add sample of instance.
+        :raises ValueError: if samples of instance would span more than 49 days
+        :param key: instance, e.g. host
+        :param values: {metric: value}, see COLUMNS
+        :param timestamp: UNIX time of sample, current time if None
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        row = self._row(key)
+        position = self._heads[row]
+        self._timestamps[row, position] = self._offset(row, position, timestamp)
+        for name, value in values.items():
+            if value is not None and name in COLUMNS and name not in self._columns:
+                self._columns[name] = self._empty(COLUMNS[name], len(self._heads))
+        for name, column in self._columns.items():
+            value = values.get(name)
+            if value is None:
+                value = 0 if column.dtype.kind == "u" else np.nan
+            column[row, position] = value
+        self._heads[row] = (position + 1) % self.capacity
+        self._sizes[row] = min(self._sizes[row] + 1, self.capacity)
+
+    def append_server_info(
+        self,
+        key: str,
+        server_info: Mapping[str, Any],
+        timestamp: Optional[float] = None,
+    ) -> None:
+        """
+        Add sample from `serverInfo` of api_subscribe_to_server_info payload.
+        :param key: instance, e.g. host
+        :param server_info: dict with cpuUsage, ramTotal etc.
+        :param timestamp: UNIX time of sample, current time if None
+        """
+        values = {
+            metric: server_info.get(field)
+            for field, metric in SERVER_INFO_FIELDS.items()
+        }
+        self.append(key, values, timestamp)
+
+    def append_statistics(
+        self, payload: Mapping[str, Any], timestamp: Optional[float] = None
+    ) -> None:
+        """
+        Add samples of every client of dashboard_subscribe_to_statistics payload.
+        Clients are keyed by their id.
+
+        :param payload: data of subscription, with `statistics` list
+        :param timestamp: UNIX time of samples, current time if None
+        """
+        for client in payload["statistics"]:
+            data = (client.get("statistics") or {}).get("data")
+            if not data:
+                continue
+            values = {
+                metric: (data.get("serverInfo") or {}).get(field)
+                for field, metric in SERVER_INFO_FIELDS.items()
+            }
+            for direction in ("inputs", "outputs"):
+                for item in data.get(direction) or ():
+                    values[f"{direction}_{item['status'].lower()}"] = item["count"]
+            self.append(client["id"], values, timestamp)
+
+    def series(
+        self,
+        key: str,
+        column: str,
+        window: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        Samples of one instance in chronological order.
+        :param key: instance
+        :param column: metric
+        :param window: only samples of the last `window` seconds, all if None
+        :param now: UNIX time the window ends at, current time if None
+        :return: UNIX timestamps (float64) and values
+        """
+        row = self.keys[key]
+        timestamps = self._timestamps[row] / 1000 + self._bases[row]
+        values = self._column(column)[row]
+        if self._sizes[row] == self.capacity:
+            # the oldest sample is at head
+            order = np.roll(np.arange(self.capacity), -self._heads[row])
+            timestamps, values = timestamps[order], values[order]
+        else:
+            timestamps = timestamps[: self._sizes[row]]
+            values = values[: self._sizes[row]]
+        if window is not None:
+            end = time.time() if now is None else now
+            selected = (timestamps >= end - window) & (timestamps <= end)
+            timestamps, values = timestamps[selected], values[selected]
+        return timestamps, values.copy()
+
+    def _window(
+        self, column: str, window: float, now: Optional[float]
+    ) -> Tuple["np.ndarray", "np.ndarray"]:
+        rows = len(self.keys)
+        # window in offsets of every row
+        end = ((time.time() if now is None else now) - self._bases[:rows]) * 1000
+        start = end - window * 1000
+        timestamps = self._timestamps[:rows]
+        mask = self._filled(rows)
+        mask &= timestamps >= start[:, None]
+        mask &= timestamps <= end[:, None]
+        values = self._column(column)[:rows]
+        if values.dtype.kind == "f":
+            mask &= ~np.isnan(values)
+        return mask, values
+
+    def _by_key(self, results: "np.ndarray") -> Dict[str, float]:
+        return {key: float(results[row]) for key, row in self.keys.items()}
+
+    def mean(
+        self, column: str, window: float, now: Optional[float] = None
+    ) -> Dict[str, float]:
+        """
+        Average of metric over window, for every instance.
+        :param column: metric
+        :param window: seconds before `now`
+        :param now: UNIX time the window ends at, current time if None
+        :return: {key: average}, NaN if there are no samples
+        """
+        mask, values = self._window(column, window, now)
+        counts = mask.sum(axis=1)
+        sums = np.where(mask, values, 0).sum(axis=1, dtype=np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self._by_key(sums / counts)
+
+    def percentile(
+        self, column: str, q: float, window: float, now: Optional[float] = None
+    ) -> Dict[str, float]:
+        """
+        Percentile of metric over window, for every instance.
+        :param column: metric
+        :param q: percentile, between 0 and 100
+        :param window: seconds before `now`
+        :param now: UNIX time the window ends at, current time if None
+        :return: {key: percentile}, NaN if there are no samples
+        """
+        mask, values = self._window(column, window, now)
+        masked = np.where(mask, values.astype(np.float32), np.nan)
+        empty = ~mask.any(axis=1)
+        masked[empty] = 0  # avoid warnings of all-NaN rows
+        results = np.nanpercentile(masked, q, axis=1)
+        results[empty] = np.nan
+        return self._by_key(results)
+
+    def rate(
+        self, column: str, window: float, now: Optional[float] = None
+    ) -> Dict[str, float]:
+        """
+        Change of metric per second over window, between its first and
+        last samples, for every instance.
+        :param column: metric
+        :param window: seconds before `now`
+        :param now: UNIX time the window ends at, current time if None
+        :return: {key: change per second}, NaN if there are less than 2 samples
+        """
+        mask, values = self._window(column, window, now)
+        rows = np.arange(len(self.keys))
+        timestamps = self._timestamps[: len(rows)]
+        first = np.where(mask, timestamps, np.inf).argmin(axis=1)
+        last = np.where(mask, timestamps, -np.inf).argmax(axis=1)
+        values = values.astype(np.float64)
+        elapsed = (
+            timestamps[rows, last].astype(np.float64) - timestamps[rows, first]
+        ) / 1000
+        with np.errstate(invalid="ignore", divide="ignore"):
+            results = (values[rows, last] - values[rows, first]) / elapsed
+        results[mask.sum(axis=1) < 2] = np.nan
+        return self._by_key(results)
+
+    def downsample(
+        self,
+        key: str,
+        column: str,
+        step: float,
+        window: Optional[float] = None,
+        now: Optional[float] = None,
+        how: str = "mean",
+    ) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        Samples of one instance aggregated into buckets of `step` seconds.
+        :param key: instance
+        :param column: metric
+        :param step: length of bucket in seconds
+        :param window: only samples of the last `window` seconds, all if None
+        :param now: UNIX time the window ends at, current time if None
+        :param how: aggregation of bucket - "mean", "min", "max" or "last"
+        :return: UNIX timestamps of buckets' starts and aggregated values
+        """
+        timestamps, values = self.series(key, column, window, now)
+        if values.dtype.kind == "f":
+            present = ~np.isnan(values)
+            timestamps, values = timestamps[present], values[present]
+        if not len(values):
+            return timestamps, values.astype(np.float64)
+        order = np.argsort(timestamps, kind="stable")
+        timestamps, values = timestamps[order], values[order].astype(np.float64)
+
+        buckets = np.floor((timestamps - timestamps[0]) / step).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        if how == "mean":
+            aggregated = np.add.reduceat(values, starts) / np.diff(
+                np.r_[starts, len(values)]
+            )
+        elif how == "min":
+            aggregated = np.minimum.reduceat(values, starts)
+        elif how == "max":
+            aggregated = np.maximum.reduceat(values, starts)
+        elif how == "last":
+            aggregated = values[np.r_[starts[1:] - 1, len(values) - 1]]
+        else:
+            raise ValueError(f"Unknown aggregation {how!r}.")
+        return timestamps[0] + buckets[starts] * step, aggregated
+
+    def remove(self, keys: Iterable[str]) -> None:
+        """Forget samples of instances, their rows are reused."""
+        removed = set(keys)
+        kept = [(key, row) for key, row in self.keys.items() if key not in removed]
+        rows = [row for _, row in kept]
+        self.keys = {key: index for index, (key, _) in enumerate(kept)}
+        for column in (self._timestamps, *self._columns.values()):
+            column[: len(rows)] = column[rows]
+            column[len(rows) :] = np.nan if column.dtype.kind == "f" else 0
+        for counters in (self._bases, self._heads, self._sizes):
+            counters[: len(rows)] = counters[rows]
+            counters[len(rows) :] = 0
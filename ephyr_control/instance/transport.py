@@ -0,0 +1,125 @@
+"""
+Transports that send pre-encoded request bodies.
+
+gql transports print the GraphQL document and encode the whole request body
+on every call. Operations of this library are constants, so their text is
+printed once (see AssignedMethodCall.encode_body), and transports below only
+send ready bytes.
+"""
+
+from typing import Any, Optional, Tuple
+
+import requests
+from gql.transport.exceptions import (
+    TransportClosed,
+    TransportProtocolError,
+    TransportQueryError,
+    TransportServerError,
+)
+from gql.transport.requests import RequestsHTTPTransport
+from graphql import ExecutionResult
+
+__all__ = (
+    "JSON_HEADERS",
+    "PreparedRequestsHTTPTransport",
+    "answer_to_result",
+    "unwrap_result",
+)
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def answer_to_result(answer: Any) -> Optional[ExecutionResult]:
+    """
+    Convert decoded server answer to ExecutionResult.
+    :param answer: decoded JSON
+    :return: None if answer is not a GraphQL result
+    """
+    if not isinstance(answer, dict) or (
+        "errors" not in answer and "data" not in answer
+    ):
+        return None
+    return ExecutionResult(
+        errors=answer.get("errors"),
+        data=answer.get("data"),
+        extensions=answer.get("extensions"),
+    )
+
+
+def unwrap_result(result: ExecutionResult) -> dict:
+    """
+    Get data from result, the same way gql.Client.execute does.
+    :raises TransportQueryError: if server returned errors
+    :param result: result of execution
+    :return: data
+    """
+    if result.errors:
+        raise TransportQueryError(
+            str(result.errors[0]),
+            errors=result.errors,
+            data=result.data,
+            extensions=result.extensions,
+        )
+    return result.data
+
+
+class PreparedRequestsHTTPTransport(RequestsHTTPTransport):
+    """Synchronous transport accepting pre-encoded request bodies.
+
+    Connect it once and keep connected - underlying requests.Session
+    keeps connections alive between calls.
+    """
+
+    def execute_prepared(
+        self, body: bytes, timeout: Optional[int] = None
+    ) -> ExecutionResult:
+        """
+        Send pre-encoded GraphQL request.
+
+        :param body: JSON encoded request body
+        :param timeout: overrides default timeout for requests
+        :return: The result of execution.
+        """
+        return self.execute_prepared_sized(body, timeout=timeout)[0]
+
+    def execute_prepared_sized(
+        self, body: bytes, timeout: Optional[int] = None
+    ) -> Tuple[ExecutionResult, int]:
+        """
+        Send pre-encoded GraphQL request, measuring response.
+
+        :param body: JSON encoded request body
+        :param timeout: overrides default timeout for requests
+        :return: The result of execution and size of response body in bytes.
+        """
+        if self.session is None:
+            raise TransportClosed("Transport is not connected")
+
+        post_args = {
+            "headers": {**self.headers, **JSON_HEADERS}
+            if self.headers
+            else JSON_HEADERS,
+            "auth": self.auth,
+            "cookies": self.cookies,
+            "timeout": timeout or self.default_timeout,
+            "verify": self.verify,
+            "data": body,
+        }
+        post_args.update(self.kwargs)
+
+        response = self.session.request(self.method, self.url, **post_args)
+        self.response_headers = response.headers
+
+        try:
+            result = answer_to_result(response.json())
+        except ValueError:
+            result = None
+        if result is None:
+            try:
+                response.raise_for_status()
+            except requests.HTTPError as exc:
+                raise TransportServerError(str(exc), response.status_code) from exc
+            raise TransportProtocolError(
+                f"Server did not return a GraphQL result: {response.text}"
+            )
+        return result, len(response.content)
@@ -1,3 +1,5 @@
+from .decode import decode_restream, decode_restreams, decode_state
+from .diff import PatchOp, PatchOperation, apply_patch, diff_states
 from .restream import *
 from .settings import Settings
 from .state import State
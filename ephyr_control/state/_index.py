@@ -0,0 +1,209 @@
+import bisect
+from typing import Any, ClassVar, Dict, Hashable, Iterator, List, Optional, Tuple
+
+__all__ = ("ListIndex", "IndexedMixin", "get_index")
+
+
+class ListIndex:
+    """
+    Index of list elements by value of their attribute.
+
+    Kept up to date by owner's methods that mutate the list (add_*, remove_*),
+    so lookups, hits and misses alike, never scan the list. Index maps values
+    to slots - positions the elements had when they were indexed. Removal
+    does not shift slots of following elements, it is recorded instead,
+    and slots are compacted by rebuilding once removals outnumber elements.
+
+    If the list was replaced or resized directly, index is rebuilt on
+    next lookup. Other direct changes of the list or of indexed attributes
+    of its elements must be followed by owner's reindex(); until then
+    an element whose value changed is not returned, but a renamed element
+    is not found either.
+    Elements with None value are not indexed, first of equal values wins.
+    """
+
+    __slots__ = ("attribute", "_items", "_length", "_index", "_removed", "_unique")
+
+    def __init__(self, attribute: str):
+        self.attribute = attribute
+        self._items: Optional[list] = None
+        self._length = 0
+        # value -> slot
+        self._index: Dict[Hashable, int] = {}
+        # sorted slots of elements removed since rebuild
+        self._removed: List[int] = []
+        self._unique = True
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def rebuild(self, items: List[Any]) -> bool:
+        """
+        Index all elements of the list.
+        :param items: list of elements
+        :return: False if some values are not unique
+        """
+        index: Dict[Hashable, int] = {}
+        unique = True
+        for position, item in enumerate(items):
+            value = getattr(item, self.attribute, None)
+            if value is None:
+                continue
+            if value in index:
+                unique = False
+                continue
+            index[value] = position
+        self._items, self._length, self._index = items, len(items), index
+        self._removed = []
+        self._unique = unique
+        return unique
+
+    def _position(self, slot: int) -> int:
+        return slot - bisect.bisect_left(self._removed, slot)
+
+    def _slot(self, position: int) -> int:
+        # slot of live element is its position plus number of removed slots
+        # before it; removed[k] - k is the number of live slots before removed[k]
+        removed = self._removed
+        low, high = 0, len(removed)
+        while low < high:
+            middle = (low + high) // 2
+            if removed[middle] - middle <= position:
+                low = middle + 1
+            else:
+                high = middle
+        return position + low
+
+    def _sync(self, items: List[Any]) -> None:
+        if items is not self._items or len(items) != self._length:
+            self.rebuild(items)
+
+    def get(self, items: List[Any], value: Hashable) -> Optional[Any]:
+        """
+        Find element of the list by value of attribute.
+        :param items: indexed list
+        :param value: value of attribute
+        :return: element or None
+        """
+        self._sync(items)
+        slot = self._index.get(value)
+        if slot is None:
+            return None
+        item = items[self._position(slot)]
+        if getattr(item, self.attribute, None) != value:
+            return None
+        return item
+
+    def contains(self, items: List[Any], value: Hashable) -> bool:
+        return value is not None and self.get(items, value) is not None
+
+    def position(self, items: List[Any], item: Any) -> Optional[int]:
+        """
+        Find position of element in the list.
+        :param items: indexed list
+        :param item: element of the list
+        :return: position, None if element is not indexed
+        """
+        self._sync(items)
+        slot = self._index.get(getattr(item, self.attribute, None))
+        if slot is None:
+            return None
+        position = self._position(slot)
+        return position if items[position] is item else None
+
+    def appended(self, items: List[Any], item: Any) -> None:
+        """Register element just appended to the list."""
+        if items is self._items and len(items) == self._length + 1:
+            value = getattr(item, self.attribute, None)
+            if value in self._index:
+                self._unique = False
+            elif value is not None:
+                self._index[value] = self._length + len(self._removed)
+            self._length += 1
+
+    def removed(self, items: List[Any], item: Any, position: int) -> None:
+        """
+        Unregister element just removed from the list.
+        :param items: indexed list
+        :param item: removed element
+        :param position: position element had in the list
+        """
+        if items is not self._items or len(items) != self._length - 1:
+            return
+        slot = self._slot(position)
+        value = getattr(item, self.attribute, None)
+        if self._index.get(value) == slot:
+            del self._index[value]
+            if not self._unique:
+                # another element may have the same value, rebuilt on lookup
+                self._items = None
+                return
+        bisect.insort(self._removed, slot)
+        self._length -= 1
+        if len(self._removed) > self._length:
+            self.rebuild(items)
+
+
+def get_index(owner: Any, name: str, attribute: str) -> ListIndex:
+    """
+    Get index stored in private attribute of owner, creating it on first use.
+    :param owner: object holding indexed list
+    :param name: name of private attribute
+    :param attribute: indexed attribute of list elements
+    :return: ListIndex
+    """
+    index = getattr(owner, name, None)
+    if index is None:
+        index = ListIndex(attribute)
+        setattr(owner, name, index)
+    return index
+
+
+class IndexedMixin:
+    """
+    Mixin for entities holding lists of keyed elements.
+
+    Indexes are stored in private attributes, declared by INDEXES.
+    """
+
+    __slots__ = ()
+
+    # private attribute -> (list field, indexed attribute of elements)
+    INDEXES: ClassVar[Dict[str, Tuple[str, str]]] = {}
+
+    def _lookup(self, name: str, value: Hashable) -> Optional[Any]:
+        field, attribute = self.INDEXES[name]
+        return get_index(self, name, attribute).get(getattr(self, field), value)
+
+    def _append_to(self, field: str, item: Any) -> None:
+        items = getattr(self, field)
+        items.append(item)
+        for index in self._indexes_of(field):
+            index.appended(items, item)
+
+    def _remove_from(self, field: str, item: Any) -> None:
+        items = getattr(self, field)
+        position = None
+        for index in self._indexes_of(field):
+            position = index.position(items, item)
+            if position is not None:
+                break
+        if position is None:
+            # by identity, dataclasses compare by value
+            position = next(i for i, element in enumerate(items) if element is item)
+        del items[position]
+        for index in self._indexes_of(field):
+            index.removed(items, item, position)
+
+    def _indexes_of(self, field: str) -> Iterator[ListIndex]:
+        for name, (indexed_field, _) in self.INDEXES.items():
+            index = getattr(self, name, None)
+            if index is not None and indexed_field == field:
+                yield index
+
+    def reindex(self) -> None:
+        """Rebuild indexes after elements of lists were changed in place."""
+        for name, (field, _) in self.INDEXES.items():
+            index = getattr(self, name, None)
+            if index is not None:
+                index.rebuild(getattr(self, field))
@@ -0,0 +1,68 @@
+import dataclasses
+from typing import Iterable, Set
+
+__all__ = ("add_slots",)
+
+
+def _inherited_slots(cls: type) -> Set[str]:
+    names = set()
+    for base in cls.__mro__[1:]:
+        slots = base.__dict__.get("__slots__", ())
+        names.update((slots,) if isinstance(slots, str) else slots)
+    return names
+
+
+def _fix_class_cells(function, old_cls: type, new_cls: type) -> None:
+    # zero-argument super() reads class from __class__ closure cell
+    for cell in getattr(function, "__closure__", None) or ():
+        try:
+            if cell.cell_contents is old_cls:
+                cell.cell_contents = new_cls
+        except ValueError:  # empty cell
+            continue
+
+
+def add_slots(cls: type = None, *, reserve: Iterable[str] = ()):
+    """
+    Recreate dataclass with __slots__, so its instances have no __dict__.
+    Must be applied above @dataclasses.dataclass, to every class of hierarchy.
+    Works like dataclass(slots=True) of Python 3.10+.
+
+    Slots are added for fields and private attributes of INDEXES
+    not having a slot in base classes yet.
+
+    :param reserve: additional slots, for attributes of subclasses that
+    can not add slots themselves: two bases adding slots to the same class
+    can not be combined by multiple inheritance
+    """
+
+    def wrap(cls: type) -> type:
+        inherited = _inherited_slots(cls)
+        names = [field.name for field in dataclasses.fields(cls)]
+        names.extend(getattr(cls, "INDEXES", {}))
+        names.extend(reserve)
+
+        cls_dict = dict(cls.__dict__)
+        cls_dict["__slots__"] = tuple(
+            dict.fromkeys(name for name in names if name not in inherited)
+        )
+        # class attributes holding defaults would shadow slots
+        for field in dataclasses.fields(cls):
+            cls_dict.pop(field.name, None)
+        cls_dict.pop("__dict__", None)
+        cls_dict.pop("__weakref__", None)
+
+        new_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+        new_cls.__qualname__ = cls.__qualname__
+
+        for value in cls_dict.values():
+            if isinstance(value, (classmethod, staticmethod)):
+                value = value.__func__
+            elif isinstance(value, property):
+                for accessor in (value.fget, value.fset, value.fdel):
+                    _fix_class_cells(accessor, cls, new_cls)
+                continue
+            _fix_class_cells(value, cls, new_cls)
+        return new_cls
+
+    return wrap if cls is None else wrap(cls)
@@ -0,0 +1,210 @@
+"""
+Decoding of State trees from data returned by Ephyr server.
+
+Understands both export spec (`RemoteEphyrInstance.export()`, snake_case)
+and payloads of `api_subscribe_to_state` subscription (camelCase,
+`src { url }` / `src { inputs }`). Unknown keys are ignored.
+
+Field plans of every class are compiled once, at import, so decoding
+only looks up keys of dicts and calls constructors, without
+reflection on dataclasses.
+"""
+
+import dataclasses
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from .restream import (
+    Endpoint,
+    InputSource,
+    PullSource,
+    UuidFailoverInput,
+    UuidInput,
+    UuidMixin,
+    UuidOutputWithMixins,
+    UuidRestream,
+    Volume,
+)
+from .settings import Settings
+from .state import State
+
+__all__ = (
+    "decode_state",
+    "decode_restreams",
+    "decode_restream",
+)
+
+Decoder = Callable[[dict], Any]
+
+
+@dataclasses.dataclass(frozen=True)
+class _FieldPlan:
+    """
+    How to fill one field of dataclass.
+
+    :param name: name of field
+    :param keys: keys of data to read value from, first present one is used
+    :param convert: applied to values other than None
+    :param missing: factory of value if no key is present, class default if None
+    """
+
+    name: str
+    keys: Tuple[str, ...]
+    convert: Optional[Callable[[Any], Any]] = None
+    missing: Optional[Callable[[], Any]] = None
+
+
+def _compile(cls: type, *plans: _FieldPlan) -> Decoder:
+    """
+    Generate decoder function of class, the same way dataclasses generate __init__.
+    """
+    known = {field.name for field in dataclasses.fields(cls)}
+    unknown = [plan.name for plan in plans if plan.name not in known]
+    if unknown:
+        raise TypeError(f"{cls.__name__} has no fields {unknown}")
+
+    namespace = {"cls": cls}
+    lines = [f"def decode_{cls.__name__}(data):", "    kwargs = {}"]
+    for index, plan in enumerate(plans):
+        namespace[f"convert_{index}"] = plan.convert
+        namespace[f"missing_{index}"] = plan.missing
+        for position, key in enumerate(plan.keys):
+            lines.append(f"    {'if' if position == 0 else 'elif'} {key!r} in data:")
+            if plan.convert is None:
+                lines.append(f"        kwargs[{plan.name!r}] = data[{key!r}]")
+            else:
+                lines.append(f"        value = data[{key!r}]")
+                lines.append(
+                    f"        kwargs[{plan.name!r}] = "
+                    f"None if value is None else convert_{index}(value)"
+                )
+        if plan.missing is not None:
+            lines.append("    else:")
+            lines.append(f"        kwargs[{plan.name!r}] = missing_{index}()")
+    lines.append("    return cls(**kwargs)")
+
+    exec("\n".join(lines), namespace)  # noqa: S102
+    return namespace[f"decode_{cls.__name__}"]
+
+
+def _list_of(decoder: Decoder) -> Callable[[list], list]:
+    return lambda items: [decoder(item) for item in items]
+
+
+def _none() -> None:
+    return None
+
+
+def _field(name: str, *aliases: str, **kwargs) -> _FieldPlan:
+    return _FieldPlan(name=name, keys=(name,) + aliases, **kwargs)
+
+
+_decode_volume = _compile(Volume, _field("level"), _field("muted"))
+
+_decode_endpoint = _compile(Endpoint, _field("kind", convert=str.lower))
+
+_decode_pull_source = _compile(PullSource, _field("remote_url", "url"))
+
+_decode_mixin = _compile(
+    UuidMixin,
+    _field("id", convert=uuid.UUID),
+    _field("src"),
+    _field("volume", convert=_decode_volume),
+    _field("delay"),
+    _field("sidechain"),
+)
+
+_decode_output = _compile(
+    UuidOutputWithMixins,
+    _field("id", convert=uuid.UUID),
+    _field("dst"),
+    _field("label"),
+    _field("enabled"),
+    _field("preview_url", "previewUrl"),
+    _field("volume", convert=_decode_volume),
+    _field("mixins", convert=_list_of(_decode_mixin), missing=list),
+)
+
+_decode_failover_input = _compile(
+    UuidFailoverInput,
+    _field("id", convert=uuid.UUID),
+    _field("key"),
+    _field("endpoints", convert=_list_of(_decode_endpoint), missing=list),
+    _field("enabled"),
+    _field("src", convert=_decode_pull_source, missing=_none),
+)
+
+_decode_input_source = _compile(
+    InputSource,
+    _field("failover_inputs", "inputs", convert=_list_of(_decode_failover_input)),
+)
+
+
+def _decode_input_src(data: dict) -> Union[InputSource, PullSource]:
+    if "remote_url" in data or "url" in data:
+        return _decode_pull_source(data)
+    return _decode_input_source(data)
+
+
+_decode_input = _compile(
+    UuidInput,
+    _field("id", convert=uuid.UUID),
+    _field("key"),
+    _field("endpoints", convert=_list_of(_decode_endpoint), missing=list),
+    _field("enabled"),
+    _field("src", convert=_decode_input_src, missing=_none),
+)
+
+_decode_restream = _compile(
+    UuidRestream,
+    _field("id", convert=uuid.UUID),
+    _field("key"),
+    _field("label"),
+    _field("input", convert=_decode_input),
+    _field("outputs", convert=_list_of(_decode_output), missing=list),
+)
+
+_decode_settings = _compile(
+    Settings,
+    _field("title"),
+    _field("delete_confirmation", "deleteConfirmation"),
+    _field("enable_confirmation", "enableConfirmation"),
+)
+
+_decode_state = _compile(
+    State,
+    _field(
+        "restreams", "allRestreams", convert=_list_of(_decode_restream), missing=list
+    ),
+    _field("settings", "info", convert=_decode_settings),
+    _field("version"),
+)
+
+
+def decode_restream(data: Dict[str, Any]) -> UuidRestream:
+    """
+    Decode one restream.
+    :param data: restream of export spec or subscription payload
+    :return: UuidRestream
+    """
+    return _decode_restream(data)
+
+
+def decode_restreams(items: List[Dict[str, Any]]) -> List[UuidRestream]:
+    """
+    Decode list of restreams, e.g. `allRestreams` of subscription payload.
+    :param items: list of restreams
+    :return: list of UuidRestream
+    """
+    return [_decode_restream(item) for item in items]
+
+
+def decode_state(data: Dict[str, Any]) -> State:
+    """
+    Decode whole State.
+
+    :param data: result of RemoteEphyrInstance.export(),
+    or payload of api_subscribe_to_state subscription
+    :return: State
+    """
+    return _decode_state(data)
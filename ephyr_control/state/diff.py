@@ -0,0 +1,287 @@
+"""
+Structural diff and patch of State trees.
+
+Children in lists are matched by id (when both have one) or by natural key
+(Restream and FailoverInput by key, Output by dst, Mixin by src,
+Endpoint by kind), never by position.
+
+Subtrees equal in both states are skipped after comparing them with `==`,
+without diffing their children.
+"""
+
+import copy
+import dataclasses
+import enum
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from ._index import IndexedMixin
+from .state import State
+
+__all__ = (
+    "PatchOp",
+    "PatchOperation",
+    "diff_states",
+    "apply_patch",
+)
+
+# element of list is selected by (attribute name, value)
+Selector = Tuple[str, Any]
+Path = Tuple[Union[str, Selector], ...]
+
+# attributes identifying element of list, first existing one is used
+NATURAL_KEYS = ("key", "dst", "src", "kind")
+
+
+class PatchOp(enum.Enum):
+    ADD = "add"
+    REMOVE = "remove"
+    MODIFY = "modify"
+    REORDER = "reorder"
+
+
+@dataclasses.dataclass(frozen=True)
+class PatchOperation:
+    """
+    One change of State tree.
+
+    * ADD: insert value into list at path, at index
+    * REMOVE: remove element at path (path ends with selector)
+    * MODIFY: set value at path
+    * REORDER: order list at path as value (list of selectors)
+    """
+
+    op: PatchOp
+    path: Path
+    value: Any = None
+    index: Optional[int] = None
+
+
+_fields_cache: Dict[type, Tuple[str, ...]] = {}
+
+# kinds of values, by type
+_SCALAR, _SEQUENCE, _NODE = range(3)
+_kinds: Dict[type, int] = {list: _SEQUENCE, tuple: _SEQUENCE}
+
+
+def _field_names(cls: type) -> Tuple[str, ...]:
+    names = _fields_cache.get(cls)
+    if names is None:
+        names = tuple(field.name for field in dataclasses.fields(cls))
+        _fields_cache[cls] = names
+    return names
+
+
+def _kind(cls: type) -> int:
+    kind = _kinds.get(cls)
+    if kind is None:
+        kind = _NODE if dataclasses.is_dataclass(cls) else _SCALAR
+        _kinds[cls] = kind
+    return kind
+
+
+def _is_dataclass_instance(value: Any) -> bool:
+    return _kind(type(value)) == _NODE
+
+
+def _natural_key(node: Any) -> Optional[Selector]:
+    names = _field_names(type(node))
+    for name in NATURAL_KEYS:
+        if name in names:
+            return name, getattr(node, name)
+    return None
+
+
+def _selector(node: Any) -> Optional[Selector]:
+    node_id = getattr(node, "id", None)
+    if node_id is not None:
+        return "id", node_id
+    return _natural_key(node)
+
+
+def _matched_selector(old: Any, new: Any) -> Optional[Selector]:
+    # selects element in the middle of patching, so it must not depend on
+    # attributes changed by MODIFY; matched elements share id or natural key
+    old_id = getattr(old, "id", None)
+    if old_id is not None and old_id == getattr(new, "id", None):
+        return "id", old_id
+    return _natural_key(old)
+
+
+class _Differ:
+    def __init__(self):
+        self.operations: List[PatchOperation] = []
+
+    def diff_node(self, old: Any, new: Any, path: Path) -> None:
+        if old == new:
+            return
+        if type(old) is not type(new):
+            self.operations.append(PatchOperation(PatchOp.MODIFY, path, new))
+            return
+
+        for name in _field_names(type(old)):
+            old_value, new_value = getattr(old, name), getattr(new, name)
+            self.diff_value(old_value, new_value, path + (name,))
+
+    def diff_value(self, old: Any, new: Any, path: Path) -> None:
+        if _is_dataclass_instance(old) and _is_dataclass_instance(new):
+            self.diff_node(old, new, path)
+        elif (
+            isinstance(old, list)
+            and isinstance(new, list)
+            and all(map(_is_dataclass_instance, old))
+            and all(map(_is_dataclass_instance, new))
+        ):
+            self.diff_list(old, new, path)
+        elif old != new:
+            self.operations.append(PatchOperation(PatchOp.MODIFY, path, new))
+
+    def diff_list(self, old: list, new: list, path: Path) -> None:
+        matches = self._match(old, new)
+        if matches is None:
+            # elements can not be identified - replace whole list
+            if old != new:
+                self.operations.append(PatchOperation(PatchOp.MODIFY, path, new))
+            return
+
+        matched_old = {id(old_item) for old_item in matches.values()}
+        for old_item in old:
+            if id(old_item) not in matched_old:
+                self.operations.append(
+                    PatchOperation(PatchOp.REMOVE, path + (_selector(old_item),))
+                )
+
+        for new_item in new:
+            old_item = matches.get(id(new_item))
+            if old_item is not None:
+                selector = _matched_selector(old_item, new_item)
+                self.diff_node(old_item, new_item, path + (selector,))
+
+        for index, new_item in enumerate(new):
+            if id(new_item) not in matches:
+                self.operations.append(
+                    PatchOperation(PatchOp.ADD, path, new_item, index=index)
+                )
+
+        kept_order = [id(matches[id(item)]) for item in new if id(item) in matches]
+        old_order = [id(item) for item in old if id(item) in matched_old]
+        if kept_order != old_order:
+            # applied after all other operations, when elements are as new ones
+            order = [_selector(item) for item in new]
+            self.operations.append(PatchOperation(PatchOp.REORDER, path, order))
+
+    @staticmethod
+    def _match(old: list, new: list) -> Optional[Dict[int, Any]]:
+        """
+        Match elements of new list with elements of old one.
+        :return: id(new element) -> old element, None if elements are not unique
+        """
+        by_id: Dict[Any, Any] = {}
+        by_key: Dict[Any, Any] = {}
+        for old_item in old:
+            old_id = getattr(old_item, "id", None)
+            if old_id is not None:
+                if old_id in by_id:
+                    return None
+                by_id[old_id] = old_item
+            key = _natural_key(old_item)
+            if key is None or key in by_key:
+                return None
+            by_key[key] = old_item
+
+        matches: Dict[int, Any] = {}
+        matched_old = set()
+        seen_keys = set()
+        for new_item in new:
+            key = _natural_key(new_item)
+            if key is None or key in seen_keys:
+                return None
+            seen_keys.add(key)
+            new_id = getattr(new_item, "id", None)
+            old_item = by_id.get(new_id) if new_id is not None else None
+            if old_item is None:
+                old_item = by_key.get(key)
+                old_id = getattr(old_item, "id", None)
+                if new_id is not None and old_id is not None and old_id != new_id:
+                    # both have ids and they differ - it is another entity
+                    old_item = None
+            if old_item is not None and id(old_item) not in matched_old:
+                matched_old.add(id(old_item))
+                matches[id(new_item)] = old_item
+        return matches
+
+
+def diff_states(old: State, new: State) -> List[PatchOperation]:
+    """
+    Find operations that turn old State into new one.
+
+    :param old: current State
+    :param new: desired State
+    :return: list of operations, empty if states are equal
+    """
+    if type(old) is not type(new):
+        raise ValueError("Can only compare states of the same type.")
+    differ = _Differ()
+    differ.diff_node(old, new, ())
+    return differ.operations
+
+
+def _find(items: list, selector: Selector) -> Tuple[int, Any]:
+    name, value = selector
+    for index, item in enumerate(items):
+        if getattr(item, name, None) == value:
+            return index, item
+    raise KeyError(f"Element with {name}={value!r} not found.")
+
+
+def _resolve(root: Any, path: Path, visited: Dict[int, Any]) -> Any:
+    node = root
+    for step in path:
+        if isinstance(step, tuple):
+            node = _find(node, step)[1]
+        else:
+            visited[id(node)] = node
+            node = getattr(node, step)
+    return node
+
+
+def _apply_one(
+    state: State, operation: PatchOperation, visited: Dict[int, Any]
+) -> None:
+    path = operation.path
+    if operation.op == PatchOp.ADD:
+        items = _resolve(state, path, visited)
+        items.insert(min(operation.index, len(items)), copy.deepcopy(operation.value))
+    elif operation.op == PatchOp.REMOVE:
+        items = _resolve(state, path[:-1], visited)
+        del items[_find(items, path[-1])[0]]
+    elif operation.op == PatchOp.REORDER:
+        items = _resolve(state, path, visited)
+        position = {selector: index for index, selector in enumerate(operation.value)}
+        items.sort(key=lambda item: position.get(_selector(item), len(position)))
+    elif isinstance(path[-1], tuple):
+        items = _resolve(state, path[:-1], visited)
+        items[_find(items, path[-1])[0]] = copy.deepcopy(operation.value)
+    else:
+        parent = _resolve(state, path[:-1], visited)
+        setattr(parent, path[-1], copy.deepcopy(operation.value))
+
+
+def apply_patch(state: State, operations: List[PatchOperation]) -> State:
+    """
+    Replay operations on State, in place.
+    Added and modified values are copied, so patched State does not share
+    objects with State the operations were computed from.
+
+    :raises KeyError: if operation refers to element that does not exist
+    :param state: State to patch
+    :param operations: result of diff_states
+    :return: the same, patched, State
+    """
+    visited: Dict[int, Any] = {}
+    for operation in operations:
+        _apply_one(state, operation, visited)
+    # lists and keys were changed bypassing supported API
+    for node in visited.values():
+        if isinstance(node, IndexedMixin):
+            node.reindex()
+    return state
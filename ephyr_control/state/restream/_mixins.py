@@ -1,10 +1,12 @@
 import dataclasses
 from typing import ClassVar
 
+from ephyr_control.state._slots import add_slots
 from ephyr_control.state.constant import INPUT_KEY_MAXLENGTH, RESTREAM_KEY_MAXLENGTH
 from ephyr_control.utils import generate_random_key_of_length
 
 
+@add_slots
 @dataclasses.dataclass
 class _KeyedMixin:
     """
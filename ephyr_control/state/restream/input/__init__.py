@@ -1,5 +1,5 @@
 from .endpoint import Endpoint
 from .failover_input import FailoverInput, UuidFailoverInput
-from .input import Input
+from .input import Input, UuidInput
 from .input_source import InputSource
 from .pull_source import PullSource
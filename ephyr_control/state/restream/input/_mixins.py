@@ -1,6 +1,8 @@
 import dataclasses
 from typing import ClassVar, List, cast
 
+from ephyr_control.state._slots import add_slots
+
 from ...constant import INPUT_KEY_MAXLENGTH
 from .._mixins import _KeyedMixin
 from .endpoint import Endpoint, rtmp_endpoint_factory
@@ -8,6 +10,7 @@ from .endpoint import Endpoint, rtmp_endpoint_factory
 __all__ = ("_Input",)
 
 
+@add_slots
 @dataclasses.dataclass
 class _Input(_KeyedMixin):
     endpoints: List[Endpoint] = dataclasses.field(
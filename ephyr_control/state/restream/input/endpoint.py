@@ -1,12 +1,15 @@
 import dataclasses
 
+from ephyr_control.state._slots import add_slots
+
 __all__ = ("Endpoint",)
 
 
+@add_slots
 @dataclasses.dataclass
 class Endpoint:
     kind: str
 
 
 def rtmp_endpoint_factory():
-    Endpoint(kind="rtmp")
+    return Endpoint(kind="rtmp")
@@ -1,7 +1,8 @@
 import dataclasses
-from typing import cast
+from typing import ClassVar, Tuple, cast
 
 from ephyr_control.custom_typing import UUID4
+from ephyr_control.state._slots import add_slots
 from ephyr_control.state.restream.input.pull_source import PullSource
 
 from ._mixins import _Input
@@ -12,6 +13,7 @@ __all__ = (
 )
 
 
+@add_slots
 @dataclasses.dataclass
 class FailoverInput(_Input):
     src: PullSource = None
@@ -40,7 +42,10 @@ def backup_input_factory(key_random_chars: int = 0) -> FailoverInput:
     )
 
 
+@add_slots
 @dataclasses.dataclass
 class UuidFailoverInput(FailoverInput):
     # id field is read-only
     id: UUID4 = None
+
+    CLEANUP_OMITTED_FIELDS: ClassVar[Tuple[str, ...]] = ("id",)
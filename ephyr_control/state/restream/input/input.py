@@ -1,7 +1,8 @@
 import dataclasses
-from typing import List, cast
+from typing import ClassVar, List, Tuple, cast
 
 from ephyr_control.custom_typing import UUID4
+from ephyr_control.state._slots import add_slots
 
 from ._mixins import _Input
 from .endpoint import Endpoint, rtmp_endpoint_factory
@@ -15,6 +16,7 @@ class NoFailoverInput(Exception):
     pass
 
 
+@add_slots
 @dataclasses.dataclass
 class Input(_Input):
     KEY_DEFAULT = "origin"
@@ -84,7 +86,10 @@ class Input(_Input):
         )
 
 
+@add_slots
 @dataclasses.dataclass
 class UuidInput(Input):
     # id field is read-only
     id: UUID4 = None
+
+    CLEANUP_OMITTED_FIELDS: ClassVar[Tuple[str, ...]] = ("id",)
@@ -1,31 +1,48 @@
 import dataclasses
-from typing import List
+from typing import ClassVar, Dict, List, Tuple
 
+from ephyr_control.state._slots import add_slots
+
+from ..._index import IndexedMixin, ListIndex
 from .failover_input import FailoverInput, backup_input_factory, main_input_factory
 
 __all__ = ("InputSource",)
 
 
+@add_slots
 @dataclasses.dataclass
-class InputSource:
+class InputSource(IndexedMixin):
     failover_inputs: List[FailoverInput] = dataclasses.field(
         default_factory=lambda: [main_input_factory(), backup_input_factory()]
     )
 
     FI_KEYS_DEFAULT = (FailoverInput.KEY_MAIN, FailoverInput.KEY_BACKUP)
 
+    INDEXES: ClassVar[Dict[str, Tuple[str, str]]] = {
+        "_foinputs_by_key": ("failover_inputs", "key"),
+    }
+
     def __post_init__(self):
         # ensure unique restream keys
-        if len({foi.key for foi in self.failover_inputs}) < len(self.failover_inputs):
+        self._foinputs_by_key = ListIndex("key")
+        if not self._foinputs_by_key.rebuild(self.failover_inputs):
             raise ValueError("Not all FailoverInput keys are unique.")
 
     def get_foinput_by_key(self, foinput_key: str):
-        try:
-            return next(
-                filter(lambda foi: foi.key == foinput_key, self.failover_inputs)
-            )
-        except StopIteration:
+        foinput = self._lookup("_foinputs_by_key", foinput_key)
+        if foinput is None:
             raise KeyError(f'FailoverInput with key="{foinput_key}" not found.')
+        return foinput
+
+    def add_foinput(self, foinput: FailoverInput) -> None:
+        if self._lookup("_foinputs_by_key", foinput.key) is not None:
+            raise ValueError(f'FailoverInput with key="{foinput.key}" already exists.')
+        self._append_to("failover_inputs", foinput)
+
+    def remove_foinput(self, foinput_key: str) -> FailoverInput:
+        foinput = self.get_foinput_by_key(foinput_key)
+        self._remove_from("failover_inputs", foinput)
+        return foinput
 
     @property
     def main_input(self) -> FailoverInput:
@@ -1,8 +1,11 @@
 import dataclasses
 
+from ephyr_control.state._slots import add_slots
+
 __all__ = ("PullSource",)
 
 
+@add_slots
 @dataclasses.dataclass
 class PullSource:
     remote_url: str
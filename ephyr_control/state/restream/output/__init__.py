@@ -1,3 +1,3 @@
-from .mixin_output import Mixin, OutputWithMixins, UuidOutputWithMixins
+from .mixin_output import Mixin, OutputWithMixins, UuidMixin, UuidOutputWithMixins
 from .output import Output, UuidOutput
 from .volume import Volume
@@ -1,14 +1,17 @@
 import dataclasses
-from typing import List
+from typing import Any, ClassVar, Dict, List, Tuple
 
 from ephyr_control.custom_typing import UUID4
+from ephyr_control.state._index import IndexedMixin
+from ephyr_control.state._slots import add_slots
 
 from .output import Output, UuidOutput
 from .volume import Volume
 
-__all__ = ("Mixin", "OutputWithMixins", "UuidOutputWithMixins")
+__all__ = ("Mixin", "UuidMixin", "OutputWithMixins", "UuidOutputWithMixins")
 
 
+@add_slots
 @dataclasses.dataclass
 class Mixin:
     """Mixin is Ephyr's name for entity that mixes audio and video.
@@ -24,6 +27,12 @@ class Mixin:
     delay: str = "3s 500ms"
     sidechain: bool = False
 
+    # server defaults, not serialized by to_json(cleanup=True)
+    CLEANUP_DEFAULTS: ClassVar[Dict[str, Any]] = {
+        "volume": Volume(),
+        "sidechain": False,
+    }
+
     @classmethod
     def from_dict(cls, d: dict) -> "Mixin":
         if "volume" in d:
@@ -33,12 +42,46 @@ class Mixin:
         return cls(**d, volume=volume)
 
 
+@add_slots
+@dataclasses.dataclass
+class UuidMixin(Mixin):
+    # id field is read-only
+    id: UUID4 = None
+
+    CLEANUP_OMITTED_FIELDS: ClassVar[Tuple[str, ...]] = ("id",)
+
+
+@add_slots
 @dataclasses.dataclass
-class OutputWithMixins(Output):
+class OutputWithMixins(Output, IndexedMixin):
     mixins: List[Mixin] = dataclasses.field(default_factory=list)
 
+    CLEANUP_DEFAULTS: ClassVar[Dict[str, Any]] = {
+        **Output.CLEANUP_DEFAULTS,
+        "mixins": [],
+    }
 
+    INDEXES: ClassVar[Dict[str, Tuple[str, str]]] = {
+        "_mixins_by_id": ("mixins", "id"),
+    }
+
+    def get_mixin_by_id(self, mixin_id: UUID4) -> Mixin:
+        mixin = self._lookup("_mixins_by_id", mixin_id)
+        if mixin is None:
+            raise KeyError(f'Mixin with id="{mixin_id}" not found.')
+        return mixin
+
+    def add_mixin(self, mixin: Mixin) -> None:
+        self._append_to("mixins", mixin)
+
+    def remove_mixin(self, mixin: Mixin) -> None:
+        self._remove_from("mixins", mixin)
+
+
+@add_slots
 @dataclasses.dataclass
 class UuidOutputWithMixins(OutputWithMixins, UuidOutput):
     # id field is read-only
     id: UUID4 = None
+
+    CLEANUP_OMITTED_FIELDS: ClassVar[Tuple[str, ...]] = ("id",)
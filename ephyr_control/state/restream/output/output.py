@@ -1,12 +1,15 @@
 import dataclasses
+from typing import Any, ClassVar, Dict, Tuple
 
 from ephyr_control.custom_typing import UUID4
+from ephyr_control.state._slots import add_slots
 
 from .volume import Volume
 
 __all__ = ("Output", "UuidOutput")
 
 
+@add_slots(reserve=("mixins", "_mixins_by_id"))
 @dataclasses.dataclass
 class Output:
     dst: str
@@ -15,8 +18,14 @@ class Output:
     preview_url: str = None
     volume: Volume = dataclasses.field(default_factory=Volume)
 
+    # server defaults, not serialized by to_json(cleanup=True)
+    CLEANUP_DEFAULTS: ClassVar[Dict[str, Any]] = {"volume": Volume()}
 
+
+@add_slots
 @dataclasses.dataclass
 class UuidOutput(Output):
     # id field is read-only
     id: UUID4 = None
+
+    CLEANUP_OMITTED_FIELDS: ClassVar[Tuple[str, ...]] = ("id",)
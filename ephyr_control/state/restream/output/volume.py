@@ -1,8 +1,11 @@
 import dataclasses
 
+from ephyr_control.state._slots import add_slots
+
 __all__ = ("Volume",)
 
 
+@add_slots
 @dataclasses.dataclass
 class Volume:
     level: int = 100  # percentage
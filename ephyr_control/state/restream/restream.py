@@ -1,9 +1,11 @@
 import dataclasses
-from typing import ClassVar, List
+from typing import ClassVar, Dict, List, Tuple
 
 from ephyr_control.custom_typing import UUID4
+from ephyr_control.state._slots import add_slots
 from ephyr_control.utils import build_rtmp_uri, generate_random_key_of_length
 
+from .._index import IndexedMixin
 from ..constant import RESTREAM_KEY_MAXLENGTH
 from ._mixins import _KeyedMixin
 from .input import FailoverInput, Input
@@ -12,8 +14,9 @@ from .output import Output
 __all__ = ("Restream", "UuidRestream", "HostAwareRestream")
 
 
+@add_slots
 @dataclasses.dataclass
-class Restream(_KeyedMixin):
+class Restream(_KeyedMixin, IndexedMixin):
     key: str = dataclasses.field(
         default_factory=lambda: generate_random_key_of_length(length=4)
     )
@@ -24,6 +27,11 @@ class Restream(_KeyedMixin):
     # Ephyr restrictions
     KEY_MAXLENGTH: ClassVar[int] = RESTREAM_KEY_MAXLENGTH
 
+    INDEXES: ClassVar[Dict[str, Tuple[str, str]]] = {
+        "_outputs_by_id": ("outputs", "id"),
+        "_outputs_by_dst": ("outputs", "dst"),
+    }
+
     @property
     def main_input(self) -> FailoverInput:
         return self.input.main_input
@@ -32,6 +40,24 @@ class Restream(_KeyedMixin):
     def backup_input(self) -> FailoverInput:
         return self.input.backup_input
 
+    def get_output_by_id(self, output_id: UUID4) -> Output:
+        output = self._lookup("_outputs_by_id", output_id)
+        if output is None:
+            raise KeyError(f'Output with id="{output_id}" not found.')
+        return output
+
+    def get_output_by_dst(self, dst: str) -> Output:
+        output = self._lookup("_outputs_by_dst", dst)
+        if output is None:
+            raise KeyError(f'Output with dst="{dst}" not found.')
+        return output
+
+    def add_output(self, output: Output) -> None:
+        self._append_to("outputs", output)
+
+    def remove_output(self, output: Output) -> None:
+        self._remove_from("outputs", output)
+
     @property
     def path(self) -> str:
         return self.key
@@ -71,12 +97,16 @@ class Restream(_KeyedMixin):
         )
 
 
+@add_slots
 @dataclasses.dataclass
 class UuidRestream(Restream):
     # id field is read-only
     id: UUID4 = None
 
+    CLEANUP_OMITTED_FIELDS: ClassVar[Tuple[str, ...]] = ("id",)
+
 
+@add_slots
 @dataclasses.dataclass
 class HostAwareRestream(Restream):
     """This class remembers it's host for easier URI generation,
@@ -85,6 +115,8 @@ class HostAwareRestream(Restream):
 
     host: str = None  # well, actually, its required.
 
+    CLEANUP_OMITTED_FIELDS: ClassVar[Tuple[str, ...]] = ("host",)
+
     def pull_from_uri(self) -> str:
         return super().pull_from_uri(host=self.host)
 
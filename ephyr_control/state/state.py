@@ -1,6 +1,17 @@
 import dataclasses
+from typing import ClassVar, Dict, Tuple
 
-from ..utils.serialization import dtcls_to_json, pretty_dtcls_to_json
+from ephyr_control.state._slots import add_slots
+
+from ..custom_typing import UUID4
+from ..utils.serialization import (
+    clean_dtcls_to_json,
+    compact_dtcls_to_json,
+    dtcls_to_json,
+    pretty_clean_dtcls_to_json,
+    pretty_dtcls_to_json,
+)
+from ._index import IndexedMixin, ListIndex
 from .constant import EPHYR_CONFIG_VERSION
 from .restream import Restream
 from .settings import Settings
@@ -8,26 +19,74 @@ from .settings import Settings
 __all__ = ("State",)
 
 
+@add_slots
 @dataclasses.dataclass
-class State:
+class State(IndexedMixin):
     restreams: [Restream, ...] = dataclasses.field(default_factory=list)
     settings: Settings = None
     version: str = EPHYR_CONFIG_VERSION
 
+    INDEXES: ClassVar[Dict[str, Tuple[str, str]]] = {
+        "_restreams_by_key": ("restreams", "key"),
+        "_restreams_by_id": ("restreams", "id"),
+    }
+
     def __post_init__(self):
         # ensure unique restream keys
-        if len({r.key for r in self.restreams}) < len(self.restreams):
+        self._restreams_by_key = ListIndex("key")
+        if not self._restreams_by_key.rebuild(self.restreams):
             raise ValueError("Not all restream keys are unique.")
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "State":
+        """
+        Decode State exported from server, see ephyr_control.state.decode.
+        :param data: result of RemoteEphyrInstance.export()
+        :return: State with UuidRestream objects
+        """
+        from .decode import decode_state
+
+        return decode_state(data)
+
     def get_restream_by_key(self, restream_key: str) -> Restream:
-        try:
-            return next(filter(lambda r: r.key == restream_key, self.restreams))
-        except StopIteration:
+        restream = self._lookup("_restreams_by_key", restream_key)
+        if restream is None:
             raise KeyError(f'Restream with key="{restream_key}" not found.')
+        return restream
+
+    def get_restream_by_id(self, restream_id: UUID4) -> Restream:
+        restream = self._lookup("_restreams_by_id", restream_id)
+        if restream is None:
+            raise KeyError(f'Restream with id="{restream_id}" not found.')
+        return restream
+
+    def add_restream(self, restream: Restream) -> None:
+        if self._lookup("_restreams_by_key", restream.key) is not None:
+            raise ValueError(f'Restream with key="{restream.key}" already exists.')
+        self._append_to("restreams", restream)
+
+    def remove_restream(self, restream_key: str) -> Restream:
+        restream = self.get_restream_by_key(restream_key)
+        self._remove_from("restreams", restream)
+        return restream
 
-    def to_json(self, cleanup: bool = True, prettify: bool = False) -> str:
-        # FIXME: ignore cleanup
+    def to_json(
+        self, cleanup: bool = True, prettify: bool = False, compact: bool = False
+    ) -> str:
+        """
+        :param cleanup: omit None values, read-only ids and values equal to
+        server defaults - minimal spec for import mutation
+        :param prettify: indented JSON with sorted keys, for humans
+        :param compact: JSON without whitespace, for uploading,
+        uses orjson if it is installed
+        """
         if prettify:
+            if cleanup:
+                return pretty_clean_dtcls_to_json(self)
             return pretty_dtcls_to_json(self)
+        elif compact:
+            return compact_dtcls_to_json(self, cleanup=cleanup)
+        elif cleanup:
+            return clean_dtcls_to_json(self)
         else:
             return dtcls_to_json(self)
@@ -1,7 +1,21 @@
 """Utilities.
 
 Small-ish functionality here.
+Pinger is imported on first access, because it needs `requests`.
 """
-from .pinger import Pinger
-from .serialization import dtcls_to_json, pretty_dtcls_to_json
+from typing import TYPE_CHECKING
+
+from .backoff import Backoff
+from .serialization import compact_dtcls_to_json, dtcls_to_json, pretty_dtcls_to_json
 from .utils import build_rtmp_uri, generate_random_key_of_length, random_ascii_string
+
+if TYPE_CHECKING:
+    from .pinger import Pinger
+
+
+def __getattr__(name: str):
+    if name == "Pinger":
+        from . import pinger
+
+        return pinger.Pinger
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,47 @@
+import dataclasses
+import random
+from typing import Iterator
+
+__all__ = ("Backoff",)
+
+
+@dataclasses.dataclass(frozen=True)
+class Backoff:
+    """
+    Jittered exponential backoff: delays between repeated attempts.
+
+    Jitter spreads attempts of many clients that failed at the same moment
+    (e.g. on server restart), so they do not reconnect all at once.
+
+    :param initial: delay before the second attempt, seconds
+    :param maximum: upper limit of delay, seconds
+    :param multiplier: growth of delay with every attempt
+    :param jitter: fraction of delay that is randomized,
+    0 for fixed delays, 1 for delays between 0 and computed one
+    """
+
+    initial: float = 0.5
+    maximum: float = 30.0
+    multiplier: float = 2.0
+    jitter: float = 0.5
+
+    def __post_init__(self):
+        if not 0 <= self.jitter <= 1:
+            raise ValueError("jitter must be between 0 and 1.")
+
+    def delay(self, attempt: int) -> float:
+        """
+        Delay after failed attempt.
+        :param attempt: number of consecutive failures before, starting from 0
+        :return: seconds
+        """
+        # exponent is limited, delay reaches maximum long before it
+        delay = min(self.maximum, self.initial * self.multiplier ** min(attempt, 64))
+        return delay * (1 - self.jitter * random.random())  # noqa: S311
+
+    def delays(self) -> Iterator[float]:
+        """Infinite iterator of delays of consecutive attempts."""
+        attempt = 0
+        while True:
+            yield self.delay(attempt)
+            attempt += 1
@@ -1,31 +1,132 @@
 import dataclasses
 import json
+import sys
+import uuid
 from functools import partial
+from typing import Any, Callable, Dict, List
 
-import gql
-import yarl
+try:
+    import orjson
+except ImportError:  # optional accelerator
+    orjson = None
+
+__all__ = (
+    "dtcls_to_json",
+    "pretty_dtcls_to_json",
+    "compact_dtcls_to_json",
+    "clean_dtcls_to_json",
+    "pretty_clean_dtcls_to_json",
+)
+
+# Cleanup rules, declared as ClassVar by dataclasses:
+# fields that are never serialized (e.g. read-only ids)
+CLEANUP_OMITTED_FIELDS = "CLEANUP_OMITTED_FIELDS"
+# {field name: default value}, field is not serialized if equals to default
+CLEANUP_DEFAULTS = "CLEANUP_DEFAULTS"
+
+
+def _generate(name: str, lines: List[str], namespace: dict) -> Callable:
+    exec("\n".join([f"def {name}(o):"] + lines), namespace)  # noqa: S102
+    return namespace[name]
+
+
+def _compile_to_dict(cls: type) -> Callable[[Any], dict]:
+    """
+    Generate function building shallow dict of dataclass fields.
+    Unlike dataclasses.asdict, nested values are not copied -
+    JSON encoder calls default() for nested dataclasses itself.
+    """
+    names = [field.name for field in dataclasses.fields(cls)]
+    items = ", ".join(f"{name!r}: o.{name}" for name in names)
+    return _generate(f"to_dict_{cls.__name__}", [f"    return {{{items}}}"], {})
+
+
+def _compile_to_clean_dict(cls: type) -> Callable[[Any], dict]:
+    """
+    Generate function building shallow dict of dataclass fields,
+    skipping None values, omitted fields and fields equal to defaults.
+    """
+    omitted = set(getattr(cls, CLEANUP_OMITTED_FIELDS, ()))
+    defaults = getattr(cls, CLEANUP_DEFAULTS, {})
+    namespace = {}
+    lines = ["    d = {}"]
+    for field in dataclasses.fields(cls):
+        if field.name in omitted:
+            continue
+        lines.append(f"    v = o.{field.name}")
+        if field.name in defaults:
+            namespace[f"default_{field.name}"] = defaults[field.name]
+            lines.append(f"    if v is not None and v != default_{field.name}:")
+        else:
+            lines.append("    if v is not None:")
+        lines.append(f"        d[{field.name!r}] = v")
+    lines.append("    return d")
+    return _generate(f"to_clean_dict_{cls.__name__}", lines, namespace)
+
+
+def _make_default(compile_to_dict: Callable[[type], Callable[[Any], dict]]):
+    converters: Dict[type, Callable[[Any], dict]] = {}
+
+    def default(o):  # noqa: WPS111
+        """Convert object that JSON encoder does not support, or raise TypeError."""
+        to_dict = converters.get(type(o))
+        if to_dict is not None:
+            return to_dict(o)
+        if dataclasses.is_dataclass(o) and not isinstance(o, type):
+            to_dict = converters[type(o)] = compile_to_dict(type(o))
+            return to_dict(o)
+        elif isinstance(o, uuid.UUID):
+            return str(o)
+        elif _is_instance_of_loaded(o, "yarl", "URL"):
+            return {"yarl.URL": f"yarl.URL('{o}')"}
+        elif _is_instance_of_loaded(o, "gql", "Client"):
+            return {"gql.Client": None}
+        raise TypeError(
+            f"Object of type {o.__class__.__name__} is not JSON serializable"
+        )
+
+    return default
 
-__all__ = ("dtcls_to_json", "pretty_dtcls_to_json")
+
+_default = _make_default(_compile_to_dict)
+_clean_default = _make_default(_compile_to_clean_dict)
 
 
 class EnhancedJSONEncoder(json.JSONEncoder):
     """JSON encoder.
 
     Extended to process specific object types as well.
+    Dataclasses are converted by functions generated once per class.
     Credit: https://stackoverflow.com/a/51286749/6233648
     """
 
     def default(self, o):  # noqa: WPS111
-        if dataclasses.is_dataclass(o):
-            return dataclasses.asdict(o)
-        elif isinstance(o, yarl.URL):
-            return {"yarl.URL": f"yarl.URL('{o}')"}
-        elif isinstance(o, gql.Client):
-            return {"gql.Client": None}
-        return super().default(o)
+        try:
+            return _default(o)
+        except TypeError:
+            return super().default(o)
+
+
+class CleanJSONEncoder(json.JSONEncoder):
+    """JSON encoder omitting None values of dataclasses, and fields
+    listed in their CLEANUP_OMITTED_FIELDS and CLEANUP_DEFAULTS.
+    """
+
+    def default(self, o):  # noqa: WPS111
+        try:
+            return _clean_default(o)
+        except TypeError:
+            return super().default(o)
+
+
+def _is_instance_of_loaded(o, module_name: str, class_name: str) -> bool:  # noqa
+    # avoid importing module: if it was not imported, there are no its objects
+    module = sys.modules.get(module_name)
+    return module is not None and isinstance(o, getattr(module, class_name))
 
 
 dtcls_to_json = partial(json.dumps, cls=EnhancedJSONEncoder)
+clean_dtcls_to_json = partial(json.dumps, cls=CleanJSONEncoder)
 
 # pretty JSON https://docs.python.org/3/library/json.html
 pretty_dtcls_to_json = partial(
@@ -34,3 +135,31 @@ pretty_dtcls_to_json = partial(
     sort_keys=True,
     indent=2,
 )
+pretty_clean_dtcls_to_json = partial(
+    json.dumps,
+    cls=CleanJSONEncoder,
+    sort_keys=True,
+    indent=2,
+)
+
+
+def compact_dtcls_to_json(o, cleanup: bool = False) -> str:  # noqa: WPS111
+    """
+    JSON without whitespace and with non-ASCII characters as is.
+    Uses orjson if it is installed. Both encode the same values, and the same
+    text except for floats: below 1e-4 or from 1e16 on, orjson may write them
+    without exponent padding or sign (0.00001 or 1e-7 for 1e-05 or 1e-07,
+    1e16 for 1e+16), and it writes NaN and infinities as null.
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            o,
+            default=_clean_default if cleanup else _default,
+            option=orjson.OPT_PASSTHROUGH_DATACLASS,
+        ).decode()
+    return json.dumps(
+        o,
+        cls=CleanJSONEncoder if cleanup else EnhancedJSONEncoder,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
@@ -1,8 +1,6 @@
 import random
 import string
 
-import yarl
-
 __all__ = (
     "random_ascii_string",
     "generate_random_key_of_length",
@@ -37,6 +35,8 @@ def generate_random_key_of_length(length: int) -> str:
 
 
 def build_rtmp_uri(host: str, path: str, key: str) -> str:
+    import yarl  # noqa: WPS433 - keep state model import light
+
     url_obj = yarl.URL.build(
         scheme="rtmp",
         host=host,
@@ -0,0 +1,29 @@
+"""
+Example
+
+Connect to many Ephyr servers at once and retrieve basic info.
+"""
+
+import asyncio
+import json
+
+from ephyr_control.instance.remote_async import AsyncRemoteEphyrInstance
+
+IPv4_LIST = ["13.14.15.16", "13.14.15.17"]  # use public IP addresses of your servers
+
+
+async def main():
+    instances = [AsyncRemoteEphyrInstance(ipv4=ip, https=False) for ip in IPv4_LIST]
+    try:
+        # all requests are executed concurrently, in the same thread
+        infos = await asyncio.gather(*(inst.get_info() for inst in instances))
+    finally:
+        # release connections
+        await asyncio.gather(*(inst.close() for inst in instances))
+
+    for info in infos:
+        print(json.dumps(info, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
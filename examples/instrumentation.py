@@ -0,0 +1,21 @@
+"""
+Example of instrumentation.
+
+MetricsCollector records latency, sizes and errors of every request,
+snapshot can be printed as text or exported as JSON.
+"""
+
+from ephyr_control.instance.instrumentation import MetricsCollector
+from ephyr_control.instance.remote import RemoteEphyrInstance
+
+metrics = MetricsCollector()
+instance = RemoteEphyrInstance(
+    ipv4="142.132.160.160", https=False, instrumentation=metrics
+)
+
+for _ in range(10):
+    instance.get_info()
+instance.export()
+
+print(metrics.to_text())
+print(metrics.to_json(indent=2))
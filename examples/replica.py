@@ -0,0 +1,27 @@
+"""
+Example of local read replica.
+
+State is exported once and then kept current by subscription,
+so reading it many times does not call the server.
+"""
+
+import asyncio
+
+from ephyr_control.instance.remote_async import AsyncRemoteEphyrInstance
+from ephyr_control.instance.replica import StateReplica
+
+
+async def main():
+    async with AsyncRemoteEphyrInstance(ipv4="142.132.160.160", https=False) as inst:
+        async with StateReplica(inst) as replica:
+            for _ in range(10):
+                for restream in replica.restreams:
+                    statuses = [replica.get_status(o.id) for o in restream.outputs]
+                    print(restream.key, statuses)
+                # age shows how long ago state was known to be current
+                print(f"updated {replica.age:.1f}s ago")
+                await asyncio.sleep(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
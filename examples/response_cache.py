@@ -0,0 +1,20 @@
+"""
+Example of response cache.
+
+Repeated queries are served from memory until their TTL passes,
+mutations clear the cache.
+"""
+
+from ephyr_control.instance.cache import ResponseCache
+from ephyr_control.instance.remote import RemoteEphyrInstance
+
+# info rarely changes, keep it for a minute
+cache = ResponseCache(ttl=5, ttls={"Info": 60})
+instance = RemoteEphyrInstance(
+    ipv4="142.132.160.160", https=False, response_cache=cache
+)
+
+for _ in range(10):
+    # only the first call goes to server
+    instance.verify_ipv4_domain_match()
+print(f"hits={cache.hits} misses={cache.misses}")
@@ -33,8 +33,7 @@ async def watch(sub):
         # iterate() accepts variables, it provide async iterator
         async for upd in s.iterate():
             print(upd)
-            # Idea: you can use library "deepdiff" to narrow down
-            # which changes are important.
+            # To receive only what changed, see examples/subscribe_events.py
 
 
 if __name__ == "__main__":
@@ -0,0 +1,28 @@
+"""
+Example of buffered subscription for slow consumer.
+
+Server info is sent often, while only its latest value matters:
+conflation keeps one update, replacing it with newer ones until consumed.
+"""
+
+import asyncio
+
+from ephyr_control.instance.buffer import BufferPolicy, buffered
+from ephyr_control.instance.instance import EphyrInstance
+from ephyr_control.instance.queries import api_subscribe_to_server_info
+from ephyr_control.instance.subscribe import Subscription
+
+
+async def main():
+    instance = EphyrInstance(ipv4="142.132.160.160", https=False)
+    sub = Subscription(instance=instance, method_call=api_subscribe_to_server_info)
+
+    async with sub.session() as s:
+        async with buffered(s.iterate(), BufferPolicy.CONFLATE) as updates:
+            async for upd in updates:
+                print(upd, f"conflated so far: {updates.conflated}")
+                await asyncio.sleep(5)  # slow consumer, e.g. writing to database
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
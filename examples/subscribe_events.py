@@ -0,0 +1,29 @@
+"""
+Example of state events.
+
+Instead of full state sent by server on every change,
+only what changed is printed: added and removed restreams, outputs and mixins,
+changed statuses and volumes.
+"""
+
+import asyncio
+
+from ephyr_control.instance.events import StateEventsTracker, iterate_state_events
+from ephyr_control.instance.instance import EphyrInstance
+from ephyr_control.instance.queries import api_subscribe_to_state
+from ephyr_control.instance.subscribe import Subscription
+
+
+async def main():
+    instance = EphyrInstance(ipv4="142.132.160.160", https=False)
+    sub = Subscription(instance=instance, method_call=api_subscribe_to_state)
+
+    # the first payload is only a baseline, existing restreams are not reported
+    tracker = StateEventsTracker(emit_initial=False)
+    async with sub.resilient() as updates:
+        async for event in iterate_state_events(updates, tracker):
+            print(event.kind.value, event.restream_id, event.output_id, event.new)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
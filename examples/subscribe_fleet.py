@@ -0,0 +1,30 @@
+"""
+Example of fleet subscription.
+
+Server info of many instances is merged into one stream,
+every update is tagged by instance it came from.
+"""
+
+import asyncio
+
+from ephyr_control.instance.fleet_subscription import FleetSubscription
+from ephyr_control.instance.instance import EphyrInstance
+from ephyr_control.instance.queries import api_subscribe_to_server_info
+
+
+async def main():
+    instances = [
+        EphyrInstance(ipv4="142.132.160.160", https=False),
+        EphyrInstance(ipv4="142.132.160.161", https=False),
+    ]
+
+    fleet = FleetSubscription(instances, api_subscribe_to_server_info)
+    async with fleet:
+        async for upd in fleet:
+            print(upd.instance.host, upd.data)
+            # lag shows how long updates wait for this consumer
+            print(fleet.lags())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,41 @@
+"""
+Example of subscription hub.
+
+Several components watch state of the same instance,
+while only one websocket is opened and every payload is decoded once.
+"""
+
+import asyncio
+
+from ephyr_control.instance.hub import SubscriptionHub
+from ephyr_control.instance.instance import EphyrInstance
+from ephyr_control.instance.queries import api_subscribe_to_state
+from ephyr_control.instance.subscribe import Subscription
+from ephyr_control.state.decode import decode_state
+
+
+async def main():
+    instance = EphyrInstance(ipv4="142.132.160.160", https=False)
+    sub = Subscription(instance=instance, method_call=api_subscribe_to_state)
+
+    # payloads of "State" operation are decoded into State objects
+    async with SubscriptionHub(decoders={"State": decode_state}) as hub:
+        await asyncio.gather(
+            count_restreams(hub, sub),
+            print_keys(hub, sub),
+        )
+
+
+async def count_restreams(hub, sub):
+    async for upd in hub.subscribe(sub):
+        print(f"{len(upd.data.restreams)} restreams")
+
+
+async def print_keys(hub, sub):
+    async for upd in hub.subscribe(sub):
+        # decoded State is shared by all subscribers, it must not be modified
+        print([restream.key for restream in upd.data.restreams])
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,48 @@
+"""
+Example of multiplexed subscriptions.
+
+Three subscriptions of the same instance share one websocket connection.
+It is connected on the first subscription and closed after the last one stops.
+"""
+
+import asyncio
+
+from ephyr_control.instance.instance import EphyrInstance
+from ephyr_control.instance.multiplex import SubscriptionMultiplexer
+from ephyr_control.instance.queries import (
+    api_subscribe_to_info,
+    api_subscribe_to_server_info,
+    api_subscribe_to_state,
+)
+from ephyr_control.instance.subscribe import Subscription
+
+
+async def main():
+    instance = EphyrInstance(ipv4="142.132.160.160", https=False)
+
+    async with SubscriptionMultiplexer() as multiplexer:
+        tasks = [
+            asyncio.ensure_future(watch(multiplexer, instance, method_call))
+            for method_call in (
+                api_subscribe_to_state,
+                api_subscribe_to_info,
+                api_subscribe_to_server_info,
+            )
+        ]
+        await asyncio.sleep(5)
+        print(f"connections: {len(multiplexer.connections)}")
+
+        # stopping subscriptions one by one, the last one closes connection
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def watch(multiplexer, instance, method_call):
+    subscription = Subscription(instance=instance, method_call=method_call)
+    async for upd in multiplexer.subscribe(subscription):
+        print(upd)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
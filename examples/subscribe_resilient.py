@@ -0,0 +1,34 @@
+"""
+Example of subscription surviving dropped connections.
+
+If Ephyr server restarts, subscription reconnects with growing delays
+and re-issues operation. First update after reconnection is marked as resync:
+updates made while disconnected were lost, and it carries the full state.
+"""
+
+import asyncio
+
+from ephyr_control.instance.instance import EphyrInstance
+from ephyr_control.instance.queries import api_subscribe_to_state
+from ephyr_control.instance.subscribe import Subscription
+from ephyr_control.utils import Backoff
+
+
+async def main():
+    instance = EphyrInstance(ipv4="142.132.160.160", https=False)
+    sub = Subscription(instance=instance, method_call=api_subscribe_to_state)
+
+    # delays grow from 0.5 up to 10 seconds, randomized to spread reconnections
+    updates = sub.resilient(backoff=Backoff(initial=0.5, maximum=10))
+    async with updates:
+        async for upd in updates:
+            if upd.resync:
+                print(
+                    f"reconnected {updates.reconnects} times, "
+                    f"{updates.downtime:.1f}s without updates in total"
+                )
+            print(upd.data)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
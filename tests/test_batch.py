@@ -0,0 +1,129 @@
+import graphql
+import pytest
+from gql.transport.exceptions import TransportQueryError
+
+from ephyr_control.instance import queries
+from ephyr_control.instance.batch import BatchExecutionError, MethodCallBatch
+from ephyr_control.instance.constants import EphyrApiPaths
+
+
+def tune_volume(output_id, level):
+    return {
+        "restream_id": "r",
+        "output_id": output_id,
+        "mixin_id": None,
+        "level": level,
+        "muted": False,
+    }
+
+
+def tune_delay(output_id, delay):
+    return {"restream_id": "r", "output_id": output_id, "mixin_id": "m", "delay": delay}
+
+
+class FakeClients:
+    def __init__(self, data=None, error=None):
+        self.data = data
+        self.error = error
+        self.sent = []
+
+    def execute(self, method_call, variable_values=None):
+        self.sent.append((method_call, variable_values))
+        if self.error is not None:
+            raise self.error
+        return self.data
+
+
+def build_batch():
+    batch = MethodCallBatch()
+    batch.add(queries.mixin_tune_volume, tune_volume("o1", 10))
+    batch.add(queries.mixin_tune_delay, tune_delay("o2", 500))
+    batch.add(queries.mixin_tune_volume, tune_volume("o3", 30))
+    return batch
+
+
+def test_build_renames_variables_and_aliases_fields():
+    batch = build_batch()
+    merged, variables = batch.build()
+    assert merged.api_path == EphyrApiPaths.MIXIN
+    assert merged.operation_type == graphql.OperationType.MUTATION
+    assert variables["b0_level"] == 10
+    assert variables["b1_delay"] == 500
+    assert variables["b2_output_id"] == "o3"
+    assert len(variables) == 5 + 4 + 5
+    # merged document is valid: every used variable is defined exactly once
+    operation = merged.query.definitions[0]
+    defined = [node.variable.name.value for node in operation.variable_definitions]
+    assert sorted(defined) == sorted(variables)
+    aliases = [node.alias.value for node in operation.selection_set.selections]
+    assert aliases == ["b0_tuneVolume", "b1_tuneDelay", "b2_tuneVolume"]
+    # original operations are not modified
+    assert "b0_" not in queries.mixin_tune_volume.query_string
+
+
+def test_split_restores_keys_of_every_operation():
+    batch = build_batch()
+    data = {"b0_tuneVolume": True, "b1_tuneDelay": False, "b2_tuneVolume": None}
+    assert batch.split(data) == [
+        {"tuneVolume": True},
+        {"tuneDelay": False},
+        {"tuneVolume": None},
+    ]
+
+
+def test_split_of_partial_data():
+    batch = build_batch()
+    assert batch.split({"b1_tuneDelay": True}) == [None, {"tuneDelay": True}, None]
+    assert batch.split(None) == [None, None, None]
+
+
+def test_execute_sends_one_request():
+    batch = build_batch()
+    clients = FakeClients(
+        data={"b0_tuneVolume": True, "b1_tuneDelay": True, "b2_tuneVolume": True}
+    )
+    assert batch.execute(clients) == [
+        {"tuneVolume": True},
+        {"tuneDelay": True},
+        {"tuneVolume": True},
+    ]
+    [(merged, variables)] = clients.sent
+    assert merged.query_string.startswith("mutation Batch(")
+    assert b'"b2_level":30' in merged.encode_body(variables)
+
+
+def test_execute_maps_errors_to_operations():
+    batch = build_batch()
+    error = TransportQueryError(
+        "failed",
+        errors=[
+            {"message": "no output", "path": ["b1_tuneDelay"]},
+            {"message": "unknown"},
+        ],
+        data={"b0_tuneVolume": True, "b2_tuneVolume": True},
+    )
+    with pytest.raises(BatchExecutionError) as info:
+        batch.execute(FakeClients(error=error))
+    assert sorted(info.value.errors) == [-1, 1]
+    assert info.value.errors[1] == [{"message": "no output", "path": ["b1_tuneDelay"]}]
+    assert info.value.results == [{"tuneVolume": True}, None, {"tuneVolume": True}]
+
+
+def test_add_rejects_operations_that_do_not_fit():
+    batch = MethodCallBatch()
+    with pytest.raises(ValueError):
+        batch.add(queries.api_subscribe_to_info)
+    batch.add(queries.mixin_tune_volume, tune_volume("o", 1))
+    with pytest.raises(ValueError):
+        batch.add(queries.api_remove_restream, {"id": "r"})
+    assert len(batch) == 1
+
+    batch = MethodCallBatch(api_path=EphyrApiPaths.API)
+    batch.add(queries.api_remove_restream, {"id": "r"})
+    with pytest.raises(ValueError):
+        batch.add(queries.api_get_info)
+
+
+def test_empty_batch_can_not_be_built():
+    with pytest.raises(ValueError):
+        MethodCallBatch().build()
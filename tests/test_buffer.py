@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from ephyr_control.instance.buffer import BufferPolicy, UpdatesBuffer, buffered
+
+
+def drain(buffer):
+    async def collect():
+        return [update async for update in buffer]
+
+    return asyncio.run(collect())
+
+
+def filled(policy, updates, **kwargs):
+    buffer = UpdatesBuffer(policy=policy, maxsize=3, **kwargs)
+    for update in updates:
+        buffer.put_nowait(update)
+    buffer.close()
+    return buffer
+
+
+def test_fifo_keeps_first_updates():
+    buffer = filled(BufferPolicy.FIFO, range(5))
+    assert drain(buffer) == [0, 1, 2]
+    assert (buffer.received, buffer.delivered, buffer.dropped) == (5, 3, 2)
+
+
+def test_drop_oldest_keeps_latest_updates():
+    buffer = filled(BufferPolicy.DROP_OLDEST, range(5))
+    assert drain(buffer) == [2, 3, 4]
+    assert buffer.dropped == 2
+
+
+def test_conflate_keeps_latest_update_per_key():
+    updates = [("a", 1), ("b", 1), ("a", 2), ("c", 1), ("a", 3), ("d", 1)]
+    buffer = filled(BufferPolicy.CONFLATE, updates, key=lambda update: update[0])
+    # "a" keeps its position, so it is the oldest key when "d" does not fit
+    assert drain(buffer) == [("b", 1), ("c", 1), ("d", 1)]
+    assert (buffer.conflated, buffer.dropped) == (2, 1)
+
+
+def test_conflate_with_single_key():
+    buffer = filled(BufferPolicy.CONFLATE, range(5))
+    assert drain(buffer) == [4]
+
+
+def test_error_is_raised_after_buffered_updates():
+    buffer = UpdatesBuffer()
+    buffer.put_nowait(1)
+    buffer.close(ValueError("lost"))
+
+    async def consume():
+        assert await buffer.get() == 1
+        with pytest.raises(ValueError):
+            await buffer.get()
+        with pytest.raises(StopAsyncIteration):
+            await buffer.get()
+
+    asyncio.run(consume())
+
+
+def test_maxsize_must_be_positive():
+    with pytest.raises(ValueError):
+        UpdatesBuffer(maxsize=0)
+
+
+def test_slow_consumer_gets_latest_updates():
+    async def source():
+        for number in range(100):
+            yield number
+            await asyncio.sleep(0)
+
+    async def consume():
+        received = []
+        async with buffered(source(), BufferPolicy.CONFLATE) as updates:
+            async for update in updates:
+                received.append(update)
+                await asyncio.sleep(0.01)
+        return received, updates
+
+    received, updates = asyncio.run(consume())
+    assert received[-1] == 99
+    assert len(received) < 10
+    assert updates.received == 100
+    assert updates.delivered + updates.conflated == 100
+
+
+def test_buffered_cancels_pump_on_exit():
+    started = []
+
+    async def endless():
+        while True:
+            started.append(1)
+            yield len(started)
+            await asyncio.sleep(0)
+
+    async def consume():
+        async with buffered(endless(), maxsize=10) as updates:
+            first = await updates.get()
+        count = len(started)
+        await asyncio.sleep(0.01)
+        return first, count
+
+    first, count = asyncio.run(consume())
+    assert first == 1
+    assert len(started) == count
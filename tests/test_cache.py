@@ -0,0 +1,122 @@
+import threading
+
+import pytest
+
+from ephyr_control.instance import queries
+from ephyr_control.instance.cache import ResponseCache
+from ephyr_control.instance.remote import ClientsCollection
+
+
+class Clock:
+    def __init__(self, monkeypatch):
+        self.now = 0.0
+        monkeypatch.setattr("time.monotonic", lambda: self.now)
+
+
+class FakeClient:
+    def __init__(self, api_path):
+        self.api_path = api_path
+        self.calls = 0
+
+    def execute(self, method_call, variable_values=None):
+        self.calls += 1
+        return {"call": self.calls, "variables": variable_values}
+
+
+INFO = queries.api_get_info
+EXPORT = queries.api_export_all_restreams
+MUTATION = queries.api_remove_restream
+
+
+def test_ttl_and_counters(monkeypatch):
+    clock = Clock(monkeypatch)
+    cache = ResponseCache(ttl=5, ttls={INFO.operation_name: 10})
+    cache.put(INFO, None, {"info": 1})
+    cache.put(EXPORT, None, {"export": 1})
+    clock.now = 6
+    assert cache.get(INFO) == {"info": 1}
+    assert cache.get(EXPORT) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.hit_ratio == 0.5
+    # mutations are never cached or counted
+    cache.put(MUTATION, None, {"removed": True})
+    assert cache.get(MUTATION) is None
+    assert cache.misses == 1
+
+
+def test_variables_are_part_of_key():
+    cache = ResponseCache()
+    cache.put(EXPORT, {"a": 1, "b": 2}, "ab")
+    assert cache.get(EXPORT, {"b": 2, "a": 1}) == "ab"
+    assert cache.get(EXPORT, {"a": 1}) is None
+
+
+def test_lru_eviction_by_count():
+    cache = ResponseCache(maxsize=2)
+    cache.put(EXPORT, {"n": 1}, 1)
+    cache.put(EXPORT, {"n": 2}, 2)
+    cache.get(EXPORT, {"n": 1})
+    cache.put(EXPORT, {"n": 3}, 3)
+    assert cache.get(EXPORT, {"n": 2}) is None
+    assert cache.get(EXPORT, {"n": 1}) == 1
+    assert cache.evictions == 1
+
+
+def test_lru_eviction_by_size():
+    cache = ResponseCache(max_bytes=100)
+    small, large = {"x": "a" * 10}, {"x": "a" * 70}
+    cache.put(EXPORT, {"n": 1}, small)
+    cache.put(EXPORT, {"n": 2}, small)
+    assert cache.nbytes == 2 * len('{"x":"aaaaaaaaaa"}')
+    cache.put(EXPORT, {"n": 3}, large)
+    # the least recently used small response made room for the large one
+    assert cache.get(EXPORT, {"n": 1}) is None
+    assert cache.get(EXPORT, {"n": 2}) == small
+    assert cache.nbytes <= 100
+    cache.put(EXPORT, {"n": 4}, {"x": "a" * 200})
+    assert cache.get(EXPORT, {"n": 4}) is None
+    cache.invalidate()
+    assert cache.nbytes == 0
+
+
+def test_mutation_invalidates_cache():
+    client = FakeClient(INFO.api_path)
+    cache = ResponseCache()
+    clients = ClientsCollection((client,), cache=cache)
+    assert clients.execute(INFO) == clients.execute(INFO)
+    assert client.calls == 1
+    clients.execute(MUTATION, {"key": "r"})
+    assert clients.execute(INFO)["call"] == 3
+    assert cache.invalidations == 1
+
+
+def test_response_of_query_sent_before_invalidation_is_not_stored():
+    cache = ResponseCache()
+    generation = cache.generation
+    cache.invalidate()
+    cache.put(INFO, None, {"stale": True}, generation=generation)
+    assert cache.get(INFO) is None
+
+
+@pytest.mark.parametrize("max_bytes", [None, 2000])
+def test_concurrent_use(max_bytes):
+    cache = ResponseCache(ttl=0.001, maxsize=8, max_bytes=max_bytes)
+    errors = []
+
+    def work(seed):
+        try:
+            for i in range(2000):
+                cache.execute(EXPORT, {"n": (i * seed) % 50}, lambda: {"i": i})
+                if i % 97 == 0:
+                    cache.observe(MUTATION)
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=work, args=(seed,)) for seed in range(1, 9)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(cache) <= 8
+    assert cache.nbytes == sum(size for _, _, size in cache._entries.values())
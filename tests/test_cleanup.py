@@ -0,0 +1,82 @@
+import json
+import uuid
+
+import pytest
+
+from ephyr_control.state import (
+    HostAwareRestream,
+    Mixin,
+    State,
+    UuidMixin,
+    UuidOutputWithMixins,
+    UuidRestream,
+    Volume,
+    decode_state,
+)
+
+
+def build_state():
+    output = UuidOutputWithMixins(
+        dst="rtmp://host/live",
+        id=uuid.UUID(int=2),
+        volume=Volume(),
+        mixins=[
+            UuidMixin(src="ts://default", volume=Volume(), id=uuid.UUID(int=3)),
+            Mixin(src="ts://custom", volume=Volume(level=50), sidechain=True),
+        ],
+    )
+    silent = UuidOutputWithMixins(dst="rtmp://host/silent", volume=Volume(muted=True))
+    return State(
+        restreams=[UuidRestream(key="a", id=uuid.UUID(int=1), outputs=[output, silent])]
+    )
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_cleanup_omits_ids_nulls_and_defaults(compact):
+    spec = json.loads(build_state().to_json(cleanup=True, compact=compact))
+    [restream] = spec["restreams"]
+    assert "id" not in restream
+    assert "label" not in restream
+    output, silent = restream["outputs"]
+    assert output == {
+        "dst": "rtmp://host/live",
+        "enabled": False,
+        "mixins": [
+            {"src": "ts://default", "delay": "3s 500ms"},
+            {
+                "src": "ts://custom",
+                "volume": {"level": 50, "muted": False},
+                "delay": "3s 500ms",
+                "sidechain": True,
+            },
+        ],
+    }
+    assert silent["volume"] == {"level": 100, "muted": True}
+    assert "mixins" not in silent
+
+
+def test_cleanup_is_smaller_and_decodes_to_same_config():
+    state = build_state()
+    full = state.to_json(cleanup=False, compact=True)
+    clean = state.to_json(cleanup=True, compact=True)
+    assert len(clean) < len(full)
+
+    decoded = decode_state(json.loads(clean))
+    restream = decoded.restreams[0]
+    assert restream.id is None
+    assert restream.outputs[0].volume == Volume()
+    assert restream.outputs[0].mixins[1].volume == Volume(level=50)
+    assert restream.outputs[1].volume == Volume(muted=True)
+
+
+def test_prettified_cleanup_is_the_same_spec():
+    state = build_state()
+    assert json.loads(state.to_json(cleanup=True, prettify=True)) == json.loads(
+        state.to_json(cleanup=True)
+    )
+
+
+def test_host_is_omitted():
+    state = State(restreams=[HostAwareRestream(key="a", host="example.com")])
+    assert "host" not in json.loads(state.to_json(cleanup=True))["restreams"][0]
+    assert "host" in json.loads(state.to_json(cleanup=False))["restreams"][0]
@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ephyr_control.instance import queries
+from ephyr_control.instance.coalesce import RequestCoalescer, request_key
+
+
+def test_request_key_ignores_order_of_variables():
+    call = queries.api_remove_restream
+    assert request_key(call, {"a": 1, "b": 2}) == request_key(call, {"b": 2, "a": 1})
+    assert request_key(call, {"a": 1}) != request_key(call, {"a": 2})
+    assert request_key(call, None) == request_key(call, {})
+
+
+def test_threads_share_one_request():
+    coalescer = RequestCoalescer()
+    release = threading.Event()
+    sent = []
+
+    def execute():
+        sent.append(1)
+        release.wait(5)
+        return {"export": "data"}
+
+    def call():
+        return coalescer.execute(queries.api_export_all_restreams, None, execute)
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(call) for _ in range(8)]
+        while coalescer.coalesced < 7:
+            time.sleep(0.001)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(sent) == 1
+    assert all(result is results[0] for result in results)
+    assert (coalescer.executed, coalescer.coalesced) == (1, 7)
+    assert coalescer.in_flight == 0
+
+
+def test_threads_share_error():
+    coalescer = RequestCoalescer()
+    release = threading.Event()
+
+    def execute():
+        release.wait(5)
+        raise ConnectionError("down")
+
+    def call():
+        return coalescer.execute(queries.api_get_info, None, execute)
+
+    with ThreadPoolExecutor(3) as pool:
+        futures = [pool.submit(call) for _ in range(3)]
+        while coalescer.coalesced < 2:
+            time.sleep(0.001)
+        release.set()
+        for future in futures:
+            with pytest.raises(ConnectionError):
+                future.result()
+
+    # finished request is not reused
+    assert coalescer.execute(queries.api_get_info, None, lambda: {"ok": 1}) == {"ok": 1}
+
+
+def test_tasks_share_one_request():
+    async def test():
+        coalescer = RequestCoalescer()
+        sent = []
+
+        async def execute():
+            sent.append(1)
+            await asyncio.sleep(0.01)
+            return {"info": {}}
+
+        results = await asyncio.gather(
+            *(
+                coalescer.execute_async(queries.api_get_info, None, execute)
+                for _ in range(5)
+            ),
+            coalescer.execute_async(queries.api_remove_restream, {"id": "x"}, execute),
+        )
+        assert len(sent) == 2
+        assert all(result is results[0] for result in results[:5])
+        assert coalescer.in_flight == 0
+
+    asyncio.run(test())
+
+
+def test_cancelled_caller_does_not_cancel_others():
+    async def test():
+        coalescer = RequestCoalescer()
+
+        async def execute():
+            await asyncio.sleep(0.02)
+            return {"info": {}}
+
+        first = asyncio.ensure_future(
+            coalescer.execute_async(queries.api_get_info, None, execute)
+        )
+        second = asyncio.ensure_future(
+            coalescer.execute_async(queries.api_get_info, None, execute)
+        )
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == {"info": {}}
+        assert first.cancelled()
+
+    asyncio.run(test())
+
+
+def test_mutations_are_not_coalesced_and_reset_queries():
+    async def test():
+        coalescer = RequestCoalescer()
+        release = asyncio.Event()
+        exports = []
+
+        async def export():
+            exports.append(1)
+            await release.wait()
+            return {"export": len(exports)}
+
+        async def mutate():
+            return {"removeRestream": True}
+
+        before = asyncio.ensure_future(
+            coalescer.execute_async(queries.api_export_all_restreams, None, export)
+        )
+        await asyncio.sleep(0)
+        mutations = await asyncio.gather(
+            *(
+                coalescer.execute_async(
+                    queries.api_remove_restream, {"id": "r"}, mutate
+                )
+                for _ in range(2)
+            )
+        )
+        assert mutations == [{"removeRestream": True}] * 2
+        # request started before mutation is not joined after it
+        after = asyncio.ensure_future(
+            coalescer.execute_async(queries.api_export_all_restreams, None, export)
+        )
+        await asyncio.sleep(0)
+        release.set()
+        assert (await before, await after) == ({"export": 2}, {"export": 2})
+        assert len(exports) == 2
+        assert coalescer.coalesced == 0
+
+    asyncio.run(test())
@@ -0,0 +1,163 @@
+import json
+import uuid
+
+from ephyr_control.state import (
+    Endpoint,
+    InputSource,
+    PullSource,
+    Settings,
+    State,
+    UuidFailoverInput,
+    UuidInput,
+    UuidMixin,
+    UuidOutputWithMixins,
+    UuidRestream,
+    Volume,
+    decode_restream,
+    decode_restreams,
+    decode_state,
+)
+
+
+def uid(number):
+    return uuid.UUID(int=number)
+
+
+def build_state():
+    failover = InputSource(
+        failover_inputs=[
+            UuidFailoverInput(
+                key=key,
+                endpoints=[Endpoint(kind="rtmp")],
+                src=PullSource(remote_url=f"rtmp://origin/{key}"),
+                id=uid(10 + index),
+            )
+            for index, key in enumerate(("main", "backup"))
+        ]
+    )
+    return State(
+        restreams=[
+            UuidRestream(
+                key="failover",
+                label="Failover",
+                input=UuidInput(
+                    key="origin",
+                    endpoints=[Endpoint(kind="rtmp"), Endpoint(kind="hls")],
+                    src=failover,
+                    id=uid(2),
+                ),
+                outputs=[
+                    UuidOutputWithMixins(
+                        dst="rtmp://dst/1",
+                        label="One",
+                        enabled=True,
+                        volume=Volume(level=50, muted=True),
+                        mixins=[
+                            UuidMixin(
+                                src="ts://mixin",
+                                volume=Volume(level=80),
+                                delay="1s",
+                                id=uid(4),
+                            )
+                        ],
+                        id=uid(3),
+                    )
+                ],
+                id=uid(1),
+            ),
+            UuidRestream(
+                key="pull",
+                input=UuidInput(
+                    key="origin",
+                    src=PullSource(remote_url="rtmp://origin/pull"),
+                    id=uid(6),
+                ),
+                id=uid(5),
+            ),
+        ],
+        settings=Settings(title="Title", delete_confirmation=False),
+    )
+
+
+def test_export_roundtrip():
+    state = build_state()
+    assert decode_state(json.loads(state.to_json(cleanup=False))) == state
+
+
+def test_subscription_payload():
+    state = build_state()
+    restream = state.restreams[0]
+    output = restream.outputs[0]
+    payload = {
+        "allRestreams": [
+            {
+                "id": str(restream.id),
+                "key": restream.key,
+                "label": restream.label,
+                "input": {
+                    "id": str(restream.input.id),
+                    "key": "origin",
+                    "endpoints": [
+                        {"id": "e1", "kind": "RTMP", "status": "ONLINE"},
+                        {"id": "e2", "kind": "HLS", "status": "OFFLINE"},
+                    ],
+                    "src": {
+                        "inputs": [
+                            {
+                                "id": str(failover.id),
+                                "key": failover.key,
+                                "endpoints": [{"kind": "RTMP"}],
+                                "src": {"url": failover.src.remote_url},
+                                "enabled": True,
+                            }
+                            for failover in restream.input.src.failover_inputs
+                        ]
+                    },
+                    "enabled": True,
+                },
+                "outputs": [
+                    {
+                        "id": str(output.id),
+                        "dst": output.dst,
+                        "label": output.label,
+                        "previewUrl": None,
+                        "volume": {"level": 50, "muted": True},
+                        "mixins": [
+                            {
+                                "id": str(uid(4)),
+                                "src": "ts://mixin",
+                                "volume": {"level": 80, "muted": False},
+                                "delay": "1s",
+                                "sidechain": False,
+                            }
+                        ],
+                        "enabled": True,
+                        "status": "ONLINE",
+                    }
+                ],
+            }
+        ]
+    }
+    decoded = decode_state(payload)
+    assert decoded.restreams == [restream]
+    assert decoded.settings is None
+    assert decode_restreams(payload["allRestreams"]) == [restream]
+
+
+def test_missing_keys():
+    restream = decode_restream({"key": "bare", "input": {"key": "origin"}})
+    # scalars take class defaults, while omitted lists and sources are empty
+    assert restream.label is None
+    assert restream.input.enabled is True
+    assert restream.outputs == []
+    assert restream.input.endpoints == []
+    assert restream.input.src is None
+    # decoded lists are not shared between objects
+    assert restream.outputs is not decode_restream({"key": "other"}).outputs
+
+
+def test_pull_source_is_recognized_by_url():
+    restream = decode_restream({"key": "k", "input": {"src": {"url": "rtmp://x"}}})
+    assert restream.input.src == PullSource(remote_url="rtmp://x")
+    restream = decode_restream({"key": "k", "input": {"src": {"failover_inputs": []}}})
+    assert restream.input.src == InputSource(failover_inputs=[])
@@ -0,0 +1,118 @@
+import copy
+import json
+import uuid
+
+from ephyr_control.instance import queries
+from ephyr_control.instance.delta import (
+    build_restreams_spec,
+    normalize_spec,
+    plan_state_delta,
+)
+from ephyr_control.instance.remote import RemoteEphyrInstance
+from ephyr_control.state import Settings, State, UuidOutputWithMixins, UuidRestream
+
+
+def build_state(keys=("a", "b", "c")):
+    return State(
+        restreams=[
+            UuidRestream(
+                key=key,
+                label=f"Restream {key}",
+                outputs=[UuidOutputWithMixins(dst=f"rtmp://host/{key}")],
+            )
+            for key in keys
+        ],
+        settings=Settings(title="Title"),
+    )
+
+
+def export_of(state):
+    """Export as server returns it: with ids, and nulls for missing values."""
+    exported = json.loads(state.to_json(cleanup=True, compact=True))
+    for index, restream in enumerate(exported["restreams"]):
+        restream["id"] = f"id-{restream['key']}"
+        restream["preview_url"] = None
+        restream["input"]["id"] = str(uuid.UUID(int=index))
+    return exported
+
+
+def test_state_equal_to_exported_has_empty_delta():
+    state = build_state()
+    delta = plan_state_delta(state, export_of(state))
+    assert delta.is_empty
+
+
+def test_changed_restreams_are_keyed_by_server_id():
+    exported = export_of(build_state())
+    state = build_state()
+    state.restreams[1].label = "changed"
+    state.restreams[2].outputs[0].dst = "rtmp://other/c"
+    delta = plan_state_delta(state, exported)
+    assert list(delta.changed) == ["id-b", "id-c"]
+    assert delta.changed["id-b"] is state.restreams[1]
+    assert not (delta.added or delta.removed or delta.settings)
+
+
+def test_added_and_removed_restreams():
+    exported = export_of(build_state(("a", "b", "c")))
+    state = build_state(("a", "c", "d"))
+    delta = plan_state_delta(state, exported)
+    assert [restream.key for restream in delta.added] == ["d"]
+    assert delta.removed == []
+
+    delta = plan_state_delta(state, exported, replace=True)
+    assert delta.removed == ["id-b"]
+
+
+def test_settings():
+    exported = export_of(build_state())
+    state = build_state()
+    state.settings.delete_confirmation = False
+    assert plan_state_delta(state, exported).settings is state.settings
+
+    state.settings = None
+    assert plan_state_delta(state, exported).is_empty
+
+
+def test_normalize_spec():
+    assert normalize_spec(
+        {"id": 1, "a": None, "b": [{"id": 2, "c": 3, "d": None}], "e": "f"}
+    ) == {"b": [{"c": 3}], "e": "f"}
+
+
+def test_build_restreams_spec():
+    state = build_state()
+    spec = json.loads(build_restreams_spec(state.restreams[1:2]))
+    assert [restream["key"] for restream in spec["restreams"]] == ["b"]
+    assert "settings" not in spec
+
+
+def test_change_state_sends_only_delta():
+    exported = export_of(build_state(("a", "b", "c")))
+    state = build_state(("a", "b", "d"))
+    state.restreams[0].label = "changed"
+
+    sent = []
+    instance = RemoteEphyrInstance(ipv4="127.0.0.1")
+
+    def execute(method_call, variable_values=None):
+        sent.append((method_call, variable_values))
+        return {"import": True, "removeRestream": True}
+
+    instance.execute = execute
+    assert instance.change_state(state, replace=True, delta=True, exported=exported)
+
+    changed, added, removed = sent
+    assert changed[0] is queries.api_change_state
+    assert changed[1]["restream_id"] == "id-a"
+    assert changed[1]["replace"] is True
+    assert [r["key"] for r in json.loads(changed[1]["spec"])["restreams"]] == ["a"]
+    assert added[1]["restream_id"] is None
+    assert [r["key"] for r in json.loads(added[1]["spec"])["restreams"]] == ["d"]
+    assert removed == (queries.api_remove_restream, {"id": "id-c"})
+
+    sent.clear()
+    assert instance.change_state(
+        copy.deepcopy(state), delta=True, exported=export_of(state)
+    )
+    assert sent == []
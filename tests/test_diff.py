@@ -0,0 +1,133 @@
+import copy
+import uuid
+
+import pytest
+
+from ephyr_control.state import (
+    Mixin,
+    PatchOp,
+    State,
+    UuidOutputWithMixins,
+    UuidRestream,
+    Volume,
+    apply_patch,
+    diff_states,
+)
+
+
+def restream(key, id=None, outputs=(), label=None):
+    return UuidRestream(key=key, id=id, outputs=list(outputs), label=label)
+
+
+def output(dst, id=None, mixins=()):
+    return UuidOutputWithMixins(dst=dst, id=id, mixins=list(mixins))
+
+
+def roundtrip(old, new):
+    operations = diff_states(old, new)
+    patched = apply_patch(copy.deepcopy(old), operations)
+    assert patched == new
+    return operations
+
+
+def build():
+    return State(
+        restreams=[
+            restream(
+                f"r{r}",
+                id=uuid.UUID(int=r + 1),
+                outputs=[
+                    output(
+                        f"rtmp://host/{r}/{o}",
+                        id=uuid.UUID(int=1000 * (r + 1) + o),
+                        mixins=[Mixin(src=f"ts://mixin/{o}")],
+                    )
+                    for o in range(5)
+                ],
+            )
+            for r in range(5)
+        ]
+    )
+
+
+def test_equal_states_have_no_operations():
+    assert diff_states(build(), build()) == []
+
+
+def test_changes_are_local():
+    old = build()
+    new = copy.deepcopy(old)
+    new.restreams[1].outputs[2].volume = Volume(level=50)
+    new.restreams[2].outputs[0].mixins[0].delay = "1s"
+    new.restreams[3].outputs.pop(4)
+    new.restreams[4].outputs.append(output("rtmp://host/new"))
+    new.restreams[0].label = "changed"
+    operations = roundtrip(old, new)
+    assert sorted(op.op.value for op in operations) == [
+        "add",
+        "modify",
+        "modify",
+        "modify",
+        "remove",
+    ]
+    removed = next(op for op in operations if op.op is PatchOp.REMOVE)
+    assert removed.path[-1] == ("id", uuid.UUID(int=4004))
+
+
+def test_reorder_and_add_restreams():
+    old = build()
+    new = copy.deepcopy(old)
+    new.restreams.reverse()
+    new.restreams.insert(2, restream("added"))
+    operations = roundtrip(old, new)
+    assert [op.op for op in operations] == [PatchOp.ADD, PatchOp.REORDER]
+
+
+@pytest.mark.parametrize(
+    "old, new",
+    [
+        # elements without ids gain them and are reordered
+        (
+            [restream("a"), restream("b")],
+            [restream("b", id="2"), restream("a", id="1")],
+        ),
+        # elements lose ids while other attributes change
+        (
+            [restream("a", id="1"), restream("b", id="2")],
+            [restream("b", label="x"), restream("a")],
+        ),
+        (
+            [restream("a", id="1"), restream("b")],
+            [restream("c"), restream("b", id="9"), restream("a", id="1", label="y")],
+        ),
+    ],
+)
+def test_roundtrip_when_ids_change(old, new):
+    roundtrip(State(restreams=old), State(restreams=new))
+
+
+def test_values_with_equal_hashes_differ():
+    # hash(-1) == hash(-2) in CPython
+    roundtrip(
+        State(restreams=[restream("a", label=-1)]),
+        State(restreams=[restream("a", label=-2)]),
+    )
+
+
+def test_patch_of_missing_element_raises():
+    old = build()
+    new = copy.deepcopy(old)
+    new.restreams[0].label = "changed"
+    operations = diff_states(old, new)
+    with pytest.raises(KeyError):
+        apply_patch(State(), operations)
+
+
+def test_patched_state_is_reindexed():
+    old = build()
+    new = copy.deepcopy(old)
+    new.restreams.append(restream("added", id=uuid.UUID(int=99)))
+    patched = copy.deepcopy(old)
+    patched.get_restream_by_key("r0")
+    apply_patch(patched, diff_states(old, new))
+    assert patched.get_restream_by_id(uuid.UUID(int=99)).key == "added"
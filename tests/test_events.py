@@ -0,0 +1,212 @@
+import asyncio
+import copy
+import uuid
+
+from ephyr_control.instance.events import (
+    StateEvent,
+    StateEventKind,
+    StateEventsTracker,
+    iterate_state_events,
+)
+
+
+def uid(number):
+    return str(uuid.UUID(int=number))
+
+
+def mixin(number):
+    return {
+        "id": uid(number),
+        "src": "ts://mixin",
+        "volume": {"level": 100, "muted": False},
+        "delay": "3s",
+        "sidechain": False,
+    }
+
+
+def output(number, mixins=()):
+    return {
+        "id": uid(number),
+        "dst": f"rtmp://dst/{number}",
+        "label": None,
+        "previewUrl": None,
+        "volume": {"level": 100, "muted": False},
+        "mixins": [mixin(m) for m in mixins],
+        "enabled": True,
+        "status": "OFFLINE",
+    }
+
+
+def restream(number, outputs=()):
+    return {
+        "id": uid(number),
+        "key": f"r{number}",
+        "label": None,
+        "input": {
+            "id": uid(number + 500),
+            "key": "origin",
+            "endpoints": [
+                {"id": uid(number + 600), "kind": "RTMP", "status": "OFFLINE"}
+            ],
+            "src": {
+                "inputs": [
+                    {
+                        "id": uid(number + 700),
+                        "key": "main",
+                        "endpoints": [
+                            {
+                                "id": uid(number + 800),
+                                "kind": "RTMP",
+                                "status": "OFFLINE",
+                            }
+                        ],
+                        "src": None,
+                        "enabled": True,
+                    }
+                ]
+            },
+            "enabled": True,
+        },
+        "outputs": [output(o, mixins=(o + 50,)) for o in outputs],
+    }
+
+
+def payload(*restreams):
+    return {"allRestreams": list(restreams)}
+
+
+def baseline():
+    return payload(restream(1, outputs=(11, 12)), restream(2, outputs=(21,)))
+
+
+def tracked():
+    tracker = StateEventsTracker(emit_initial=False)
+    assert tracker.feed(baseline()) == []
+    return tracker
+
+
+def test_initial_payload_is_reported_as_added():
+    events = StateEventsTracker().feed(baseline())
+    assert [event.kind for event in events] == [StateEventKind.RESTREAM_ADDED] * 2
+    assert events[0].restream_id == uuid.UUID(uid(1))
+
+
+def test_equal_payload_has_no_events():
+    tracker = tracked()
+    assert tracker.feed(baseline()) == []
+
+
+def test_output_events():
+    tracker = tracked()
+    changed = baseline()
+    outputs = changed["allRestreams"][0]["outputs"]
+    outputs[0]["status"] = "ONLINE"
+    outputs[0]["volume"] = {"level": 50, "muted": False}
+    outputs[1]["label"] = "renamed"
+    changed["allRestreams"][1]["outputs"].append(output(22))
+
+    events = tracker.feed(changed)
+    restream_id = uuid.UUID(uid(1))
+    assert events == [
+        StateEvent(
+            StateEventKind.OUTPUT_STATUS_CHANGED,
+            restream_id=restream_id,
+            output_id=uuid.UUID(uid(11)),
+            old="OFFLINE",
+            new="ONLINE",
+        ),
+        StateEvent(
+            StateEventKind.OUTPUT_VOLUME_CHANGED,
+            restream_id=restream_id,
+            output_id=uuid.UUID(uid(11)),
+            old={"level": 100, "muted": False},
+            new={"level": 50, "muted": False},
+        ),
+        StateEvent(
+            StateEventKind.OUTPUT_CHANGED,
+            restream_id=restream_id,
+            output_id=uuid.UUID(uid(12)),
+            old=baseline()["allRestreams"][0]["outputs"][1],
+            new=outputs[1],
+        ),
+        StateEvent(
+            StateEventKind.OUTPUT_ADDED,
+            restream_id=uuid.UUID(uid(2)),
+            output_id=uuid.UUID(uid(22)),
+            new=output(22),
+        ),
+    ]
+
+
+def test_mixin_events():
+    tracker = tracked()
+    changed = baseline()
+    mixins = changed["allRestreams"][0]["outputs"][0]["mixins"]
+    mixins[0]["volume"] = {"level": 0, "muted": True}
+    mixins.append(mixin(99))
+    changed["allRestreams"][0]["outputs"][1]["mixins"] = []
+
+    kinds = {
+        (event.kind, event.output_id, event.mixin_id) for event in tracker.feed(changed)
+    }
+    assert kinds == {
+        (StateEventKind.MIXIN_VOLUME_CHANGED, uuid.UUID(uid(11)), uuid.UUID(uid(61))),
+        (StateEventKind.MIXIN_ADDED, uuid.UUID(uid(11)), uuid.UUID(uid(99))),
+        (StateEventKind.MIXIN_REMOVED, uuid.UUID(uid(12)), uuid.UUID(uid(62))),
+    }
+
+
+def test_endpoint_status_is_not_input_change():
+    tracker = tracked()
+    changed = baseline()
+    input_ = changed["allRestreams"][0]["input"]
+    input_["src"]["inputs"][0]["endpoints"][0]["status"] = "ONLINE"
+
+    [event] = tracker.feed(changed)
+    assert event.kind is StateEventKind.ENDPOINT_STATUS_CHANGED
+    assert event.endpoint_id == uuid.UUID(uid(801))
+    assert (event.old, event.new) == ("OFFLINE", "ONLINE")
+
+    changed = copy.deepcopy(changed)
+    changed["allRestreams"][0]["input"]["enabled"] = False
+    [event] = tracker.feed(changed)
+    assert event.kind is StateEventKind.INPUT_CHANGED
+
+
+def test_restreams_are_matched_by_id_not_position():
+    tracker = tracked()
+    changed = baseline()
+    changed["allRestreams"].reverse()
+    assert tracker.feed(changed) == []
+
+    changed = copy.deepcopy(changed)
+    del changed["allRestreams"][0]
+    changed["allRestreams"][0]["label"] = "renamed"
+    kinds = [(event.kind, event.restream_id) for event in tracker.feed(changed)]
+    assert kinds == [
+        (StateEventKind.RESTREAM_REMOVED, uuid.UUID(uid(2))),
+        (StateEventKind.RESTREAM_CHANGED, uuid.UUID(uid(1))),
+    ]
+
+
+def test_reset_makes_next_payload_baseline():
+    tracker = StateEventsTracker()
+    tracker.feed(baseline())
+    tracker.reset()
+    assert len(tracker.feed(payload(restream(3)))) == 1
+
+
+def test_iterate_state_events():
+    changed = baseline()
+    changed["allRestreams"].pop()
+
+    async def updates():
+        for item in (baseline(), changed):
+            yield item
+
+    async def collect():
+        tracker = StateEventsTracker(emit_initial=False)
+        return [event async for event in iterate_state_events(updates(), tracker)]
+
+    [event] = asyncio.run(collect())
+    assert event.kind is StateEventKind.RESTREAM_REMOVED
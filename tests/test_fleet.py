@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+from ephyr_control.instance import queries
+from ephyr_control.instance.fleet import FleetExecutor
+
+
+class Instance:
+    def __init__(self, host, delay=0.0, fail=False):
+        self.host = host
+        self.delay = delay
+        self.fail = fail
+
+    def export(self, suffix=""):
+        time.sleep(self.delay)
+        if self.fail:
+            raise OSError(self.host)
+        return self.host + suffix
+
+    def execute(self, method_call, variable_values=None):
+        return method_call.operation_name, self.host
+
+
+class AsyncInstance(Instance):
+    async def export(self, suffix=""):
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise OSError(self.host)
+        return self.host + suffix
+
+
+def values(report):
+    return sorted(result.value for result in report.succeeded)
+
+
+def test_kinds_of_calls():
+    instances = [Instance("a"), Instance("b")]
+    executor = FleetExecutor()
+    assert values(executor.run(instances, "export", suffix="!")) == ["a!", "b!"]
+    assert values(executor.run(instances, Instance.export)) == ["a", "b"]
+    # bound method is resolved on every instance
+    assert values(executor.run(instances, instances[0].export)) == ["a", "b"]
+    assert values(executor.run(instances, lambda inst: inst.host * 2)) == [
+        "aa",
+        "bb",
+    ]
+    report = executor.run(instances, queries.api_get_info)
+    assert values(report) == [("Info", "a"), ("Info", "b")]
+
+
+def test_coroutines_are_awaited():
+    instances = [AsyncInstance("a"), AsyncInstance("b")]
+    report = FleetExecutor().run(instances, instances[1].export)
+    assert values(report) == ["a", "b"]
+
+
+def test_failures_and_timeouts_are_isolated():
+    instances = [
+        AsyncInstance("ok"),
+        AsyncInstance("bad", fail=True),
+        AsyncInstance("slow", delay=5),
+    ]
+    report = FleetExecutor(timeout=0.1).run(instances, "export")
+    assert values(report) == ["ok"]
+    errors = {r.instance.host: type(r.error) for r in report.failed}
+    assert errors == {"bad": OSError, "slow": asyncio.TimeoutError}
+
+
+def test_busy_host_does_not_block_others():
+    instances = [AsyncInstance("busy", delay=0.1)] * 5 + [AsyncInstance("idle")]
+
+    async def first_host():
+        executor = FleetExecutor(concurrency=2, per_host_concurrency=1)
+        async for result in executor.stream(instances, "export"):
+            return result.instance.host
+
+    assert asyncio.run(first_host()) == "idle"
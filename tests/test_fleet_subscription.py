@@ -0,0 +1,123 @@
+import asyncio
+import contextlib
+import socket
+
+import pytest
+
+from ephyr_control.instance import fleet_subscription, queries
+from ephyr_control.instance.fleet_subscription import FleetSubscription
+from ephyr_control.instance.instance import EphyrInstance
+from ephyr_control.utils.backoff import Backoff
+from tests.ws_server import FakeWebsocketServer, LocalSubscription
+
+FAST = Backoff(initial=0.01, maximum=0.05, jitter=0)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def ports(monkeypatch):
+    """Port of every instance, by its title."""
+    ports = {}
+
+    def subscription(instance, **kwargs):
+        return LocalSubscription(instance, port=ports[instance.title], **kwargs)
+
+    monkeypatch.setattr(fleet_subscription, "Subscription", subscription)
+    return ports
+
+
+def instances_of(ports, *servers):
+    instances = []
+    for number, server in enumerate(servers):
+        instance = EphyrInstance(ipv4="127.0.0.1", title=str(number), https=False)
+        ports[instance.title] = server.port if server is not None else free_port()
+        instances.append(instance)
+    return instances
+
+
+def fleet(instances, **kwargs):
+    return FleetSubscription(
+        instances, queries.api_subscribe_to_server_info, backoff=FAST, **kwargs
+    )
+
+
+def test_chatty_instance_does_not_delay_others(ports):
+    async def test():
+        async with contextlib.AsyncExitStack() as stack:
+            chatty = await stack.enter_async_context(FakeWebsocketServer(0.001))
+            quiet = [
+                await stack.enter_async_context(FakeWebsocketServer(0.02))
+                for _ in range(2)
+            ]
+            instances = instances_of(ports, chatty, *quiet)
+            received = []
+            async with fleet(instances) as subscription:
+                async for update in subscription:
+                    received.append(update)
+                    await asyncio.sleep(0.005)
+                    if len(received) == 30:
+                        break
+                counts = [
+                    sum(update.instance is instance for update in received)
+                    for instance in instances
+                ]
+                assert all(counts)
+                # chatty instance is served in turns with others,
+                # its surplus updates are conflated
+                assert counts[0] < 20
+                statuses = [subscription.status(i) for i in instances]
+                assert statuses[0].updates > counts[0]
+                assert all(status.lag >= 0 for status in statuses)
+                assert all(status.staleness is not None for status in statuses)
+            assert chatty.open == 0
+            assert all(server.open == 0 for server in quiet)
+
+    asyncio.run(test())
+
+
+def test_failure_of_instance_does_not_affect_others(ports):
+    async def test():
+        async with FakeWebsocketServer() as server:
+            alive, dead = instances_of(ports, server, None)
+            async with fleet([alive, dead], max_attempts=1) as subscription:
+                received = []
+                async for update in subscription:
+                    received.append(update)
+                    if len(received) >= 5 and subscription.running == 1:
+                        break
+                assert all(update.instance is alive for update in received)
+                status = subscription.status(dead)
+                assert status.finished
+                assert status.error is not None
+                assert status.updates == 0
+                assert subscription.status(alive).error is None
+
+    asyncio.run(test())
+
+
+def test_iteration_stops_when_all_subscriptions_finish(ports):
+    async def test():
+        instances = instances_of(ports, None, None)
+        async with fleet(instances, max_attempts=0) as subscription:
+            assert [update async for update in subscription] == []
+            assert subscription.running == 0
+            assert all(status.error is not None for status in subscription.statuses)
+
+    asyncio.run(test())
+
+
+def test_usage_errors(ports):
+    [instance] = instances_of(ports, None)
+    with pytest.raises(ValueError):
+        fleet([instance], max_connecting=0)
+
+    subscription = fleet([instance])
+    with pytest.raises(RuntimeError):
+        asyncio.run(subscription.__anext__())
+    with pytest.raises(LookupError):
+        subscription.status(instance)
@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from ephyr_control.instance import queries
+from ephyr_control.instance.hub import SubscriptionHub
+from ephyr_control.instance.instance import EphyrInstance
+from tests.ws_server import FakeWebsocketServer, LocalSubscription
+
+
+def subscription(server, method_call=queries.api_subscribe_to_server_info):
+    instance = EphyrInstance(ipv4="127.0.0.1", https=False)
+    return LocalSubscription(instance, method_call, port=server.port)
+
+
+class CountingDecoder:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, data):
+        self.calls += 1
+        return {"decoded": data["tick"]}
+
+
+async def take(updates, count):
+    received = []
+    async for update in updates:
+        received.append(update)
+        if len(received) == count:
+            break
+    await updates.aclose()
+    return received
+
+
+def test_subscribers_share_upstream_and_decoding():
+    async def test():
+        decoder = CountingDecoder()
+        async with FakeWebsocketServer() as server:
+            async with SubscriptionHub(decoders={"ServerInfo": decoder}) as hub:
+                results = await asyncio.gather(
+                    *(take(hub.subscribe(subscription(server)), 5) for _ in range(4))
+                )
+                assert server.connections == 1
+                assert server.starts == 1
+                assert decoder.calls <= 5 + 3
+                first = [update.data for update in results[0]]
+                assert first[0] == {"decoded": 0}
+                # decoded values are shared, not copied
+                assert all(
+                    [update.data for update in result] == first for result in results
+                )
+                assert results[1][0].data is results[0][0].data
+                # the last subscriber stopped upstream
+                assert hub.topics == {}
+            await asyncio.sleep(0.05)
+            assert server.open == 0
+
+    asyncio.run(test())
+
+
+def test_late_subscriber_receives_last_update_first():
+    async def test():
+        async with FakeWebsocketServer(interval=0.05) as server:
+            async with SubscriptionHub() as hub:
+                early = hub.subscribe(subscription(server))
+                await early.__anext__()
+                second = await early.__anext__()
+                [late] = await take(hub.subscribe(subscription(server)), 1)
+                assert late is second
+                await early.aclose()
+
+            async with SubscriptionHub(replay_last=False) as hub:
+                early = hub.subscribe(subscription(server))
+                await early.__anext__()
+                [late] = await take(hub.subscribe(subscription(server)), 1)
+                assert late.data["tick"] == 1
+                await early.aclose()
+
+    asyncio.run(test())
+
+
+def test_operations_and_variables_have_own_upstreams():
+    async def test():
+        async with FakeWebsocketServer() as server:
+            async with SubscriptionHub() as hub:
+                await asyncio.gather(
+                    take(hub.subscribe(subscription(server)), 1),
+                    take(hub.subscribe(subscription(server), {"id": "a"}), 1),
+                    take(hub.subscribe(subscription(server), {"id": "b"}), 1),
+                    take(
+                        hub.subscribe(
+                            subscription(server, queries.api_subscribe_to_info)
+                        ),
+                        1,
+                    ),
+                )
+                assert server.starts == 4
+
+    asyncio.run(test())
+
+
+def test_slow_subscriber_does_not_delay_others():
+    async def test():
+        async with FakeWebsocketServer(interval=0.005) as server:
+            async with SubscriptionHub() as hub:
+
+                async def slow():
+                    received = []
+                    async for update in hub.subscribe(subscription(server), maxsize=1):
+                        received.append(update)
+                        await asyncio.sleep(0.1)
+                    return received
+
+                slow_task = asyncio.ensure_future(slow())
+                fast = await take(hub.subscribe(subscription(server)), 20)
+                ticks = [update.data["tick"] for update in fast]
+                assert ticks == list(range(ticks[0], ticks[0] + 20))
+                await hub.close()
+                assert len(await slow_task) < 5
+
+    asyncio.run(test())
+
+
+def test_upstream_error_is_raised_to_subscribers():
+    def decoder(data):
+        raise KeyError("broken payload")
+
+    async def test():
+        async with FakeWebsocketServer() as server:
+            async with SubscriptionHub(decoders={"ServerInfo": decoder}) as hub:
+                with pytest.raises(KeyError):
+                    await take(hub.subscribe(subscription(server)), 1)
+                assert hub.topics == {}
+
+    asyncio.run(test())
@@ -0,0 +1,137 @@
+import random
+
+import pytest
+
+from ephyr_control.state import State
+from ephyr_control.state._index import IndexedMixin, ListIndex
+from ephyr_control.state.restream.restream import UuidRestream
+
+
+class Item:
+    """Element counting reads of its indexed attribute."""
+
+    reads = 0
+
+    def __init__(self, key):
+        self._key = key
+
+    @property
+    def key(self):
+        Item.reads += 1
+        return self._key
+
+    @key.setter
+    def key(self, value):
+        self._key = value
+
+
+class Owner(IndexedMixin):
+    INDEXES = {"_by_key": ("items", "key")}
+
+    def __init__(self, items):
+        self.items = items
+
+    def get(self, key):
+        return self._lookup("_by_key", key)
+
+    def add(self, item):
+        if self.get(item.key) is not None:
+            raise ValueError(item.key)
+        self._append_to("items", item)
+
+    def remove(self, key):
+        item = self.get(key)
+        self._remove_from("items", item)
+        return item
+
+
+@pytest.fixture
+def owner():
+    owner = Owner([Item(f"k{i}") for i in range(1000)])
+    owner.get("k0")
+    Item.reads = 0
+    return owner
+
+
+def test_miss_does_not_scan(owner):
+    for i in range(100):
+        assert owner.get(f"missing{i}") is None
+    assert Item.reads == 0
+
+
+def test_hit_reads_one_element(owner):
+    assert owner.get("k500").key == "k500"
+    assert Item.reads == 2
+
+
+def test_add_and_remove_do_not_scan(owner):
+    for i in range(100):
+        owner.add(Item(f"new{i}"))
+    for i in range(0, 200, 2):
+        owner.remove(f"k{i}")
+    # a few reads per operation, never proportional to length of list
+    assert Item.reads < 10 * 200
+    assert len(owner.items) == 1000
+    assert owner.get("k2") is None
+    assert owner.get("k3").key == "k3"
+    assert owner.get("new99") is owner.items[-1]
+
+
+def test_direct_changes_need_reindex(owner):
+    owner.items[10].key = "renamed"
+    assert owner.get("k10") is None
+    assert owner.get("renamed") is None
+    owner.reindex()
+    assert owner.get("renamed") is owner.items[10]
+
+
+def test_replaced_or_resized_list_is_reindexed(owner):
+    owner.items.append(Item("appended"))
+    assert owner.get("appended") is owner.items[-1]
+    owner.items = [Item("only")]
+    assert owner.get("only") is owner.items[0]
+    assert owner.get("k0") is None
+
+
+def test_matches_list_after_random_operations():
+    rng = random.Random(7)
+    owner = Owner([])
+    keys = []
+    for step in range(5000):
+        if keys and rng.random() < 0.45:
+            key = keys.pop(rng.randrange(len(keys)))
+            assert owner.remove(key).key == key
+        else:
+            key = f"k{step}"
+            owner.add(Item(key))
+            keys.append(key)
+        if step % 50 == 0:
+            assert [item.key for item in owner.items] == keys
+            for key in rng.sample(keys, min(len(keys), 5)):
+                assert owner.get(key).key == key
+            assert owner.get(f"k{step + 1}") is None
+
+
+def test_duplicates_first_wins():
+    first, second = Item("same"), Item("same")
+    index = ListIndex("key")
+    items = [first, second]
+    assert not index.rebuild(items)
+    assert index.get(items, "same") is first
+    del items[0]
+    index.removed(items, first, 0)
+    assert index.get(items, "same") is second
+
+
+def test_state_add_remove_restreams():
+    state = State()
+    for i in range(100):
+        state.add_restream(UuidRestream(key=f"r{i}"))
+    with pytest.raises(ValueError):
+        state.add_restream(UuidRestream(key="r5"))
+    for i in range(0, 100, 3):
+        state.remove_restream(f"r{i}")
+    assert [r.key for r in state.restreams] == [f"r{i}" for i in range(100) if i % 3]
+    with pytest.raises(KeyError):
+        state.get_restream_by_key("r3")
+    assert state.get_restream_by_key("r4").key == "r4"
@@ -0,0 +1,185 @@
+import asyncio
+import json
+
+import pytest
+import requests
+from gql.transport.exceptions import (
+    TransportProtocolError,
+    TransportQueryError,
+    TransportServerError,
+)
+from graphql import ExecutionResult
+
+from ephyr_control.instance import queries
+from ephyr_control.instance.constants import EphyrApiPaths
+from ephyr_control.instance.instrumentation import (
+    CallInfo,
+    Instrumentation,
+    InstrumentationGroup,
+    LatencyHistogram,
+    MetricsCollector,
+    error_category,
+)
+from ephyr_control.instance.protocols import ServerConnectionDetails
+from ephyr_control.instance.remote import AssignedClient
+
+
+def call_info(host="h", operation_name="Info"):
+    return CallInfo(
+        host=host,
+        api_path=EphyrApiPaths.API,
+        operation_name=operation_name,
+        request_bytes=10,
+    )
+
+
+def ok(size=100):
+    return lambda: (ExecutionResult(data={"info": {}}), size)
+
+
+def failing(exc):
+    def send():
+        raise exc
+
+    return send
+
+
+class Recorder(Instrumentation):
+    def __init__(self, name, log):
+        self.name = name
+        self.log = log
+
+    def before_call(self, call):
+        self.log.append((self.name, "before", call.duration))
+
+    def after_call(self, call):
+        self.log.append((self.name, "after", call.error))
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = LatencyHistogram(bounds=(0.1, 1, 10))
+    assert histogram.quantile(0.5) is None
+    for seconds in (0.05, 0.1, 0.5, 0.5, 20):
+        histogram.observe(seconds)
+    # bounds are inclusive
+    assert histogram.counts == [2, 2, 0, 1]
+    assert histogram.quantile(0.4) == pytest.approx(0.1)
+    assert histogram.quantile(0.6) == pytest.approx(0.55)
+    assert histogram.quantile(1) == 20
+    summary = histogram.to_dict()
+    assert summary["count"] == 5
+    assert summary["mean"] == pytest.approx(21.15 / 5)
+    assert summary["buckets"] == {"0.1": 2, "1": 2, "10": 0, "+Inf": 1}
+
+
+def test_quantile_does_not_exceed_maximum():
+    histogram = LatencyHistogram(bounds=(1, 10))
+    histogram.observe(2)
+    assert histogram.quantile(0.99) <= 2
+
+
+@pytest.mark.parametrize(
+    "exc, category",
+    [
+        (TransportQueryError("bad"), "query"),
+        (TransportServerError("down", 502), "server"),
+        (TransportProtocolError("garbage"), "protocol"),
+        (asyncio.TimeoutError(), "timeout"),
+        (requests.Timeout(), "timeout"),
+        (ConnectionRefusedError(), "connection"),
+        (asyncio.CancelledError(), "cancelled"),
+        (ValueError(), "other"),
+    ],
+)
+def test_error_category(exc, category):
+    assert error_category(exc) == category
+
+
+def test_hooks_are_called_around_request():
+    log = []
+    group = InstrumentationGroup(Recorder("a", log), Recorder("b", log))
+    call = call_info()
+    assert group.run(call, ok(42)) == {"info": {}}
+    assert log == [
+        ("a", "before", None),
+        ("b", "before", None),
+        ("a", "after", None),
+        ("b", "after", None),
+    ]
+    assert call.response_bytes == 42
+    assert call.duration >= 0
+
+    log.clear()
+    call = call_info()
+    with pytest.raises(ConnectionError):
+        asyncio.run(group.run_async(call, failing_async(ConnectionError())))
+    assert [entry[1] for entry in log] == ["before", "before", "after", "after"]
+    assert isinstance(call.error, ConnectionError)
+
+
+def failing_async(exc):
+    async def send():
+        raise exc
+
+    return send
+
+
+def test_metrics_collector():
+    metrics = MetricsCollector()
+    metrics.run(call_info(), ok(100))
+    metrics.run(call_info(), ok(50))
+    with pytest.raises(TransportQueryError):
+        metrics.run(
+            call_info(),
+            lambda: (ExecutionResult(errors=[{"message": "bad"}], data=None), 30),
+        )
+    with pytest.raises(TransportServerError):
+        metrics.run(call_info(host="other"), failing(TransportServerError("x", 503)))
+
+    by_host = {item["host"]: item for item in metrics.snapshot()}
+    assert by_host["h"]["calls"] == 3
+    assert by_host["h"]["bytes_out"] == 30
+    assert by_host["h"]["bytes_in"] == 180
+    assert by_host["h"]["errors"] == {"query": 1}
+    assert by_host["h"]["in_flight"] == 0
+    assert by_host["h"]["latency"]["count"] == 3
+    assert by_host["other"]["errors"] == {"server": 1}
+    assert json.loads(metrics.to_json()) == metrics.snapshot()
+    lines = metrics.to_text().splitlines()
+    assert lines[0].startswith("h API Info calls=3 in_flight=0")
+    assert lines[1].endswith("errors=server=1")
+
+
+def test_reset_keeps_requests_in_flight():
+    metrics = MetricsCollector()
+    metrics.run(call_info(), ok())
+    pending = call_info(operation_name="Export")
+    metrics.before_call(pending)
+    metrics.reset()
+    [item] = metrics.snapshot()
+    assert (item["operation"], item["in_flight"], item["calls"]) == ("Export", 1, 0)
+
+
+def test_client_reports_its_requests():
+    metrics = MetricsCollector()
+    client = AssignedClient(EphyrApiPaths.API, instrumentation=metrics)
+    client.rebuild_client(ServerConnectionDetails("http", "example.com", 80))
+    sent = []
+
+    def execute_prepared_sized(body, timeout=None):
+        sent.append(body)
+        return ExecutionResult(data={"removeRestream": True}), 25
+
+    client.client.transport.execute_prepared_sized = execute_prepared_sized
+    assert client.execute(queries.api_remove_restream, {"id": "r"}) == {
+        "removeRestream": True
+    }
+    [item] = metrics.snapshot()
+    assert (item["host"], item["api_path"], item["operation"]) == (
+        "example.com",
+        "API",
+        "RemoveRestream",
+    )
+    assert item["bytes_out"] == len(sent[0])
+    assert item["bytes_in"] == 25
+    client.client.transport.close()
@@ -0,0 +1,65 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+import ephyr_control
+import ephyr_control.instance
+
+NETWORK_MODULES = ("gql", "graphql", "requests", "yarl", "aiohttp")
+
+
+def imported_after(code):
+    """Run code in fresh interpreter, return names of imported modules."""
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"{code}\nimport json, sys; print(json.dumps(sorted(sys.modules)))",
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return set(json.loads(output.splitlines()[-1]))
+
+
+def test_state_model_does_not_import_network_stack():
+    modules = imported_after(
+        "import ephyr_control; "
+        "ephyr_control.State().to_json(cleanup=True, compact=True)"
+    )
+    assert modules.isdisjoint(NETWORK_MODULES)
+    assert "ephyr_control.instance.remote" not in modules
+
+
+def test_remote_control_is_imported_on_access():
+    modules = imported_after("from ephyr_control import RemoteEphyrInstance")
+    assert "ephyr_control.instance.remote" in modules
+    assert "ephyr_control.instance.multiplex" not in modules
+    assert "aiohttp" not in modules
+
+
+def test_lazy_names():
+    for module in (ephyr_control, ephyr_control.instance):
+        for name in module._LAZY_ATTRIBUTES:
+            if name.startswith("Async"):
+                continue
+            assert name in dir(module)
+            assert getattr(module, name).__name__ == name
+    assert set(ephyr_control.instance.__all__) <= set(ephyr_control.__all__)
+    with pytest.raises(AttributeError):
+        ephyr_control.instance.NoSuchName
+
+
+def test_queries_are_parsed_once():
+    from ephyr_control.instance import queries
+
+    method_call = queries.mixin_tune_sidechain
+    assert vars(queries)["mixin_tune_sidechain"] is method_call
+    assert queries.mixin_tune_sidechain is method_call
+    for name in queries.__all__:
+        assert getattr(queries, name).api_path is not None
+    with pytest.raises(AttributeError):
+        queries.no_such_query
@@ -0,0 +1,134 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from gql.transport.exceptions import TransportQueryError, TransportServerError
+
+from ephyr_control.instance.limiter import AdaptiveLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Manual clock, starting at current time."""
+    now = [time.monotonic()]
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+    return now
+
+
+def taking(clock, seconds, result=None, error=None):
+    def execute():
+        clock[0] += seconds
+        if error is not None:
+            raise error
+        return result
+
+    return execute
+
+
+def test_limit_grows_by_one_per_window_of_fast_requests(clock):
+    limiter = AdaptiveLimiter(rate=None, initial_limit=4, max_limit=6)
+    for _ in range(4):
+        limiter.call(taking(clock, 0.1))
+    assert limiter.window == 5
+    for _ in range(100):
+        limiter.call(taking(clock, 0.1))
+    assert limiter.limit == 6
+    assert (limiter.admitted, limiter.in_flight, limiter.delayed) == (104, 0, 0)
+
+
+def test_slow_requests_cut_limit_once_per_burst(clock):
+    limiter = AdaptiveLimiter(rate=None, initial_limit=16, latency_target=1)
+
+    async def slow():
+        clock[0] += 2
+        await asyncio.sleep(0)
+        return {}
+
+    async def burst():
+        await asyncio.gather(*(limiter.call_async(slow) for _ in range(4)))
+
+    # requests sent together are slow together, limit is cut once
+    asyncio.run(burst())
+    assert limiter.window == 8
+    assert limiter.decreases == 1
+
+    for _ in range(10):
+        limiter.call(taking(clock, 2))
+    assert limiter.window == limiter.min_limit == 1
+    # limit at its minimum is not cut anymore
+    assert limiter.decreases == 4
+
+
+def test_only_transient_errors_cut_limit(clock):
+    limiter = AdaptiveLimiter(rate=None, initial_limit=8)
+    with pytest.raises(TransportQueryError):
+        limiter.call(taking(clock, 0, error=TransportQueryError("bad input")))
+    assert limiter.limit == 8
+    with pytest.raises(TransportServerError):
+        limiter.call(taking(clock, 0, error=TransportServerError("down", 503)))
+    assert limiter.limit == 4
+    assert limiter.in_flight == 0
+
+
+def test_concurrency_is_bounded():
+    limiter = AdaptiveLimiter(rate=None, initial_limit=2, max_limit=2)
+    observed = []
+
+    async def execute():
+        observed.append(limiter.in_flight)
+        await asyncio.sleep(0.01)
+        return {}
+
+    async def test():
+        await asyncio.gather(*(limiter.call_async(execute) for _ in range(10)))
+
+    asyncio.run(test())
+    assert max(observed) == 2
+    assert limiter.delayed == 8
+    assert limiter.in_flight == 0
+
+
+def test_threads_are_bounded():
+    limiter = AdaptiveLimiter(rate=None, initial_limit=3, max_limit=3)
+    observed = []
+
+    def execute():
+        observed.append(limiter.in_flight)
+        time.sleep(0.01)
+        return {}
+
+    with ThreadPoolExecutor(10) as pool:
+        list(pool.map(lambda _: limiter.call(execute), range(20)))
+    assert max(observed) == 3
+    assert limiter.in_flight == 0
+
+
+def test_rate_is_limited():
+    limiter = AdaptiveLimiter(rate=200, burst=2, initial_limit=10)
+
+    async def execute():
+        return {}
+
+    async def test():
+        started = time.monotonic()
+        await asyncio.gather(*(limiter.call_async(execute) for _ in range(12)))
+        return time.monotonic() - started
+
+    # 2 requests from burst, 10 others with 5 ms between them
+    assert asyncio.run(test()) >= 0.045
+    assert limiter.admitted == 12
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"min_limit": 0},
+        {"initial_limit": 100, "max_limit": 10},
+        {"rate": 0},
+        {"backoff_ratio": 1},
+    ],
+)
+def test_invalid_arguments(kwargs):
+    with pytest.raises(ValueError):
+        AdaptiveLimiter(**kwargs)
@@ -0,0 +1,102 @@
+import http.server
+import json
+import threading
+
+import pytest
+from gql.transport.exceptions import TransportQueryError, TransportServerError
+from graphql import print_ast
+
+from ephyr_control.instance import queries
+from ephyr_control.instance.transport import (
+    PreparedRequestsHTTPTransport,
+    unwrap_result,
+)
+
+
+class GraphQLHandler(http.server.BaseHTTPRequestHandler):
+    # (status, answer) returned for every request
+    answer = (200, {"data": {"info": {"title": "t"}}})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.received.append((self.headers["Content-Type"], body))
+        status, answer = self.answer
+        content = answer if isinstance(answer, bytes) else json.dumps(answer).encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), GraphQLHandler)
+    server.received = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def transport(server):
+    transport = PreparedRequestsHTTPTransport(
+        url=f"http://127.0.0.1:{server.server_port}/api"
+    )
+    transport.connect()
+    yield transport
+    transport.close()
+
+
+def test_query_string_is_printed_once():
+    method_call = queries.api_get_info
+    assert method_call.query_string == print_ast(method_call.query)
+    assert method_call.operation_name == "Info"
+
+
+def test_body_without_variables_is_reused():
+    method_call = queries.api_get_info
+    body = method_call.encode_body()
+    assert body is method_call.encode_body({})
+    assert json.loads(body) == {
+        "query": method_call.query_string,
+        "operationName": "Info",
+    }
+
+
+def test_body_with_variables():
+    method_call = queries.api_remove_restream
+    variables = {"id": 'ab"c', "nested": {"list": [1, None, "ü"]}}
+    assert json.loads(method_call.encode_body(variables)) == {
+        "query": method_call.query_string,
+        "operationName": "RemoveRestream",
+        "variables": variables,
+    }
+
+
+def test_transport_sends_body_as_is(server, transport):
+    body = queries.api_remove_restream.encode_body({"id": "r"})
+    result = transport.execute_prepared(body)
+    assert unwrap_result(result) == {"info": {"title": "t"}}
+    assert server.received == [("application/json", body)]
+
+    result, size = transport.execute_prepared_sized(body)
+    assert size == len(json.dumps(GraphQLHandler.answer[1]))
+
+
+def test_transport_errors(server, transport, monkeypatch):
+    body = queries.api_get_info.encode_body()
+    monkeypatch.setattr(
+        GraphQLHandler, "answer", (200, {"errors": [{"message": "bad"}], "data": None})
+    )
+    with pytest.raises(TransportQueryError):
+        unwrap_result(transport.execute_prepared(body))
+
+    monkeypatch.setattr(GraphQLHandler, "answer", (502, b"Bad Gateway"))
+    with pytest.raises(TransportServerError) as info:
+        transport.execute_prepared(body)
+    assert info.value.code == 502
@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+
+from ephyr_control.instance import queries
+from ephyr_control.instance.instance import EphyrInstance
+from ephyr_control.instance.multiplex import SubscriptionMultiplexer
+from ephyr_control.instance.subscribe import RECONNECTABLE_ERRORS
+from tests.ws_server import FakeWebsocketServer, LocalSubscription
+
+API_SUBSCRIPTIONS = (
+    queries.api_subscribe_to_info,
+    queries.api_subscribe_to_server_info,
+    queries.api_subscribe_to_state,
+)
+
+
+def subscription(server, method_call):
+    instance = EphyrInstance(ipv4="127.0.0.1", https=False)
+    return LocalSubscription(instance, method_call, port=server.port)
+
+
+async def take(updates, count):
+    received = []
+    async for data in updates:
+        received.append(data)
+        if len(received) == count:
+            break
+    return received
+
+
+def test_operations_share_one_connection():
+    async def test():
+        async with FakeWebsocketServer() as server:
+            async with SubscriptionMultiplexer() as multiplexer:
+                results = await asyncio.gather(
+                    *(
+                        take(multiplexer.subscribe(subscription(server, call)), 3)
+                        for call in API_SUBSCRIPTIONS
+                    )
+                )
+                assert [[data["op"] for data in result] for result in results] == [
+                    ["Info"] * 3,
+                    ["ServerInfo"] * 3,
+                    ["State"] * 3,
+                ]
+                assert server.connections == 1
+                assert server.starts == 3
+                # the last stopped operation closes connection
+                [connection] = multiplexer.connections.values()
+                assert connection.active == 0
+                assert not connection.is_connected
+
+    asyncio.run(test())
+
+
+def test_operations_start_and_stop_independently():
+    async def test():
+        async with FakeWebsocketServer() as server:
+            async with SubscriptionMultiplexer() as multiplexer:
+                info = multiplexer.subscribe(
+                    subscription(server, queries.api_subscribe_to_info)
+                )
+                await info.__anext__()
+                state = multiplexer.subscribe(
+                    subscription(server, queries.api_subscribe_to_state)
+                )
+                assert (await take(state, 2))[-1]["op"] == "State"
+                await state.aclose()
+                # info keeps running over the same connection
+                assert (await take(info, 2))[-1]["op"] == "Info"
+                assert server.connections == 1
+                [connection] = multiplexer.connections.values()
+                assert connection.active == 1
+                await info.aclose()
+            assert server.open == 0
+
+    asyncio.run(test())
+
+
+def test_api_paths_use_separate_connections():
+    async def test():
+        async with FakeWebsocketServer() as server:
+            async with SubscriptionMultiplexer() as multiplexer:
+                await asyncio.gather(
+                    take(
+                        multiplexer.subscribe(
+                            subscription(server, queries.api_subscribe_to_info)
+                        ),
+                        1,
+                    ),
+                    take(
+                        multiplexer.subscribe(
+                            subscription(server, queries.mixin_subscribe_to_output)
+                        ),
+                        1,
+                    ),
+                )
+                assert len(multiplexer.connections) == 2
+                assert server.connections == 2
+
+    asyncio.run(test())
+
+
+def test_connection_rejects_other_api_path():
+    async def test():
+        async with FakeWebsocketServer() as server:
+            multiplexer = SubscriptionMultiplexer()
+            connection = multiplexer.connection(
+                subscription(server, queries.api_subscribe_to_info)
+            )
+            with pytest.raises(ValueError):
+                await connection.subscribe(
+                    queries.mixin_subscribe_to_output
+                ).__anext__()
+
+    asyncio.run(test())
+
+
+def test_reconnects_after_connection_drop():
+    async def test():
+        async with FakeWebsocketServer() as server:
+            async with SubscriptionMultiplexer() as multiplexer:
+                info = subscription(server, queries.api_subscribe_to_info)
+                updates = multiplexer.subscribe(info)
+                await updates.__anext__()
+                await server.drop_all()
+                with pytest.raises(RECONNECTABLE_ERRORS):
+                    await take(updates, 10)
+                assert len(await take(multiplexer.subscribe(info), 2)) == 2
+                assert server.connections == 2
+
+    asyncio.run(test())
@@ -0,0 +1,58 @@
+import asyncio
+import uuid
+
+import pytest
+
+from ephyr_control.instance import queries
+from ephyr_control.instance.remote import RemoteEphyrInstance
+from ephyr_control.state import Volume
+
+RESTREAM_ID, OUTPUT_ID, MIXIN_ID = (uuid.UUID(int=i) for i in range(1, 4))
+
+
+def sync_instance(sent):
+    instance = RemoteEphyrInstance(ipv4="127.0.0.1")
+
+    def execute(method_call, variable_values=None):
+        sent.append((method_call, variable_values))
+        return {"tuneVolume": True}
+
+    instance.execute = execute
+    return instance
+
+
+def async_instance(sent):
+    remote_async = pytest.importorskip("ephyr_control.instance.remote_async")
+    instance = remote_async.AsyncRemoteEphyrInstance(ipv4="127.0.0.1")
+
+    async def execute(method_call, variable_values=None):
+        sent.append((method_call, variable_values))
+        return {"tuneVolume": True}
+
+    instance.execute = execute
+    return instance
+
+
+def tune_volume(instance, *args, **kwargs):
+    result = instance.tune_volume(*args, **kwargs)
+    if asyncio.iscoroutine(result):
+        result = asyncio.run(result)
+    return result
+
+
+@pytest.mark.parametrize("make_instance", [sync_instance, async_instance])
+@pytest.mark.parametrize("mixin_id", [None, MIXIN_ID])
+def test_tune_volume(make_instance, mixin_id):
+    sent = []
+    instance = make_instance(sent)
+    volume = Volume(level=50, muted=True)
+    assert tune_volume(instance, RESTREAM_ID, OUTPUT_ID, volume, mixin_id=mixin_id)
+    [(method_call, variables)] = sent
+    assert method_call is queries.mixin_tune_volume
+    assert variables == {
+        "restream_id": RESTREAM_ID.hex,
+        "output_id": OUTPUT_ID.hex,
+        "mixin_id": mixin_id.hex if mixin_id is not None else None,
+        "level": 50,
+        "muted": True,
+    }
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import socket
+
+import pytest
+from gql.transport.exceptions import TransportQueryError, TransportServerError
+
+from ephyr_control.instance import queries
+
+web = pytest.importorskip("aiohttp.web")
+remote_async = pytest.importorskip("ephyr_control.instance.remote_async")
+
+
+class FakeServer:
+    """Answers every GraphQL request with `answer`, remembering peers."""
+
+    def __init__(self):
+        self.answer = {"data": {"info": {"title": "t"}}}
+        self.status = 200
+        self.peers = set()
+        self.requests = []
+        self.runner = None
+        self.port = None
+
+    async def handle(self, request):
+        self.peers.add(request.transport.get_extra_info("peername"))
+        self.requests.append((request.path, await request.read()))
+        await asyncio.sleep(0.01)
+        return web.Response(status=self.status, text=json.dumps(self.answer))
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/{path:.*}", self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        self.port = sock.getsockname()[1]
+        await web.SockSite(self.runner, sock).start()
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+def run(test):
+    async def main():
+        server = FakeServer()
+        await server.start()
+        try:
+            await test(server)
+        finally:
+            await server.stop()
+
+    asyncio.run(main())
+
+
+def instance_of(server, **kwargs):
+    instance = remote_async.AsyncRemoteEphyrInstance(
+        ipv4="127.0.0.1", https=False, **kwargs
+    )
+    for client in instance.clients.clients:
+        client.url = client.url.with_port(server.port)
+    return instance
+
+
+def test_clients_share_connection_pool():
+    async def test(server):
+        async with instance_of(server, pool_limit=2) as instance:
+            await asyncio.gather(
+                *(instance.get_info() for _ in range(10)),
+                *(instance.execute(queries.dashboard_add_client) for _ in range(10)),
+            )
+            connector = instance.clients.pool.connector
+            assert all(
+                client.session.transport.session.connector is connector
+                for client in instance.clients.clients
+                if client.session is not None
+            )
+        assert len(server.requests) == 20
+        assert {path for path, _ in server.requests} == {"/api", "/api-dashboard"}
+        assert len(server.peers) <= 2
+        assert instance.clients.pool.connector is None
+
+    run(test)
+
+
+def test_request_body():
+    async def test(server):
+        async with instance_of(server) as instance:
+            await instance.execute(queries.api_remove_restream, {"id": "r"})
+        [(_, body)] = server.requests
+        assert body == queries.api_remove_restream.encode_body({"id": "r"})
+
+    run(test)
+
+
+def test_errors():
+    async def test(server):
+        async with instance_of(server) as instance:
+            server.answer = {"errors": [{"message": "bad"}], "data": None}
+            with pytest.raises(TransportQueryError):
+                await instance.get_info()
+            server.status, server.answer = 502, "Bad Gateway"
+            with pytest.raises(TransportServerError):
+                await instance.get_info()
+
+    run(test)
+
+
+def test_instance_can_be_used_again_after_close():
+    async def test(server):
+        instance = instance_of(server)
+        assert (await instance.get_info()) == {"title": "t"}
+        await instance.close()
+        assert (await instance.get_info()) == {"title": "t"}
+        await instance.close()
+
+    run(test)
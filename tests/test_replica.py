@@ -0,0 +1,100 @@
+import asyncio
+import copy
+import uuid
+
+import pytest
+
+from ephyr_control.instance.replica import StateReplica
+from ephyr_control.state import State, UuidOutputWithMixins, UuidRestream
+
+
+def new_id():
+    return str(uuid.uuid4())
+
+
+def restream_payload(key, outputs=2):
+    endpoint = {"id": new_id(), "kind": "RTMP", "status": "OFFLINE", "label": None}
+    return {
+        "id": new_id(),
+        "key": key,
+        "label": None,
+        "input": {
+            "id": new_id(),
+            "key": "origin",
+            "endpoints": [endpoint],
+            "src": None,
+            "enabled": True,
+        },
+        "outputs": [
+            {
+                "id": new_id(),
+                "dst": f"rtmp://host/{key}/{index}",
+                "label": None,
+                "previewUrl": None,
+                "volume": {"level": 100, "muted": False},
+                "mixins": [],
+                "enabled": True,
+                "status": "OFFLINE",
+            }
+            for index in range(outputs)
+        ],
+    }
+
+
+class Instance:
+    def __init__(self, state):
+        self.state = state
+
+    def export_state(self):
+        return self.state
+
+
+def bootstrapped(state):
+    replica = StateReplica(Instance(state))
+    asyncio.run(replica.bootstrap())
+    return replica
+
+
+def test_outputs_are_found_right_after_bootstrap():
+    output = UuidOutputWithMixins(dst="rtmp://host/a", id=uuid.uuid4())
+    restream = UuidRestream(key="a", id=uuid.uuid4(), outputs=[output])
+    replica = bootstrapped(State(restreams=[restream]))
+    assert replica.get_output_by_id(output.id) is output
+    assert replica.get_restream_by_key("a") is restream
+    assert replica.age < 1
+    with pytest.raises(KeyError):
+        replica.get_status(output.id)
+
+
+def test_payloads_update_state_and_statuses():
+    replica = bootstrapped(State())
+    payload = {"allRestreams": [restream_payload("a"), restream_payload("b")]}
+    replica.apply(payload)
+    assert [r.key for r in replica.restreams] == ["a", "b"]
+    unchanged = replica.get_restream_by_key("b")
+
+    changed = copy.deepcopy(payload)
+    output = changed["allRestreams"][0]["outputs"][1]
+    output["status"] = "ONLINE"
+    output_id = uuid.UUID(output["id"])
+    replica.apply(changed)
+    assert replica.get_status(output_id) == "ONLINE"
+    assert replica.get_output_by_id(output_id).dst == output["dst"]
+    # restreams that did not change are not decoded again
+    assert replica.get_restream_by_key("b") is unchanged
+
+    removed = {"allRestreams": changed["allRestreams"][1:]}
+    replica.apply(removed)
+    assert [r.key for r in replica.restreams] == ["b"]
+    with pytest.raises(KeyError):
+        replica.get_output_by_id(output_id)
+    with pytest.raises(KeyError):
+        replica.get_restream_by_key("a")
+    assert replica.updates == 3
+
+
+def test_reads_before_bootstrap_fail():
+    replica = StateReplica(Instance(State()))
+    assert replica.age is None
+    with pytest.raises(RuntimeError):
+        replica.restreams
@@ -0,0 +1,200 @@
+import asyncio
+
+import pytest
+from gql.transport.exceptions import TransportQueryError, TransportServerError
+
+from ephyr_control.instance import queries
+from ephyr_control.instance.remote import ClientsCollection
+from ephyr_control.instance.remote_async import AsyncClientsCollection
+from ephyr_control.instance.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitState,
+    RetryPolicy,
+    is_transient_error,
+)
+from ephyr_control.utils.backoff import Backoff
+
+
+class FakeClient:
+    """Client answering with queued results, exceptions are raised."""
+
+    def __init__(self, api_path, *results):
+        self.api_path = api_path
+        self.results = list(results)
+        self.calls = 0
+
+    def _next(self):
+        self.calls += 1
+        result = self.results.pop(0) if len(self.results) > 1 else self.results[0]
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    def execute(self, method_call, variable_values=None):
+        return self._next()
+
+
+class AsyncFakeClient(FakeClient):
+    async def execute(self, method_call, variable_values=None):
+        await asyncio.sleep(0)
+        return self._next()
+
+
+def no_delay_policy(attempts=3):
+    return RetryPolicy(attempts=attempts, backoff=Backoff(initial=0, maximum=0))
+
+
+def collection(client, **kwargs):
+    return ClientsCollection((client,), **kwargs)
+
+
+def test_transient_errors():
+    assert is_transient_error(OSError())
+    assert is_transient_error(TransportServerError("", code=502))
+    assert not is_transient_error(TransportServerError("", code=400))
+    assert not is_transient_error(TransportQueryError("bad query"))
+    assert not is_transient_error(CircuitOpenError("open", retry_after=1))
+    assert not is_transient_error(ValueError())
+
+
+def test_breaker_opens_rejects_and_closes_after_probe(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10)
+
+    def fail():
+        raise OSError("down")
+
+    for _ in range(2):
+        with pytest.raises(OSError):
+            breaker.call(fail)
+    assert breaker.state is CircuitState.OPEN
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.call(lambda: {})
+    assert error.value.retry_after == 10
+    assert breaker.rejected == 1
+
+    now[0] = 10.0
+    assert breaker.call(lambda: {"ok": 1}) == {"ok": 1}
+    assert breaker.state is CircuitState.CLOSED
+    assert breaker.failures == 0
+
+
+def test_failed_probe_reopens_circuit(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10)
+    with pytest.raises(OSError):
+        breaker.call(lambda: (_ for _ in ()).throw(OSError()))
+    now[0] = 11.0
+    with pytest.raises(OSError):
+        breaker.call(lambda: (_ for _ in ()).throw(OSError()))
+    assert breaker.state is CircuitState.OPEN
+    assert breaker.opened_at == 11.0
+
+
+def test_interrupted_probe_leaves_circuit_open():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+    with pytest.raises(OSError):
+        breaker.call(lambda: (_ for _ in ()).throw(OSError()))
+
+    def interrupt():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        breaker.call(interrupt)
+    assert breaker.state is CircuitState.OPEN
+    assert breaker.call(lambda: {}) == {}
+
+
+def test_query_errors_do_not_open_circuit():
+    breaker = CircuitBreaker(failure_threshold=1)
+    with pytest.raises(TransportQueryError):
+        breaker.call(lambda: (_ for _ in ()).throw(TransportQueryError("bad")))
+    assert breaker.state is CircuitState.CLOSED
+
+
+def test_retry_repeats_queries_only():
+    method = queries.api_get_info
+    client = FakeClient(method.api_path, OSError(), OSError(), {"info": 1})
+    policy = no_delay_policy()
+    assert collection(client, retry_policy=policy).execute(method) == {"info": 1}
+    assert client.calls == 3
+    assert policy.retries == 2
+
+    mutation = queries.api_remove_restream
+    client = FakeClient(mutation.api_path, OSError(), {"removed": True})
+    with pytest.raises(OSError):
+        collection(client, retry_policy=no_delay_policy()).execute(mutation)
+    assert client.calls == 1
+
+
+def test_retry_stops_at_deadline():
+    method = queries.api_get_info
+    client = FakeClient(method.api_path, OSError())
+    policy = RetryPolicy(
+        attempts=10, backoff=Backoff(initial=1, jitter=0), deadline=0.5
+    )
+    with pytest.raises(OSError):
+        collection(client, retry_policy=policy).execute(method)
+    assert client.calls == 1
+
+
+def test_breaker_outside_retries_surfaces_transport_error():
+    method = queries.api_get_info
+    client = FakeClient(method.api_path, OSError("connection refused"))
+    breaker = CircuitBreaker(failure_threshold=2)
+    clients = collection(
+        client, retry_policy=no_delay_policy(attempts=3), circuit_breaker=breaker
+    )
+    # all retries of a call are one failure of the breaker
+    with pytest.raises(OSError, match="connection refused"):
+        clients.execute(method)
+    assert client.calls == 3
+    assert breaker.failures == 1
+    assert breaker.state is CircuitState.CLOSED
+
+    with pytest.raises(OSError, match="connection refused"):
+        clients.execute(method)
+    assert breaker.state is CircuitState.OPEN
+
+    # only calls that never reach server fail with CircuitOpenError
+    with pytest.raises(CircuitOpenError):
+        clients.execute(method)
+    assert client.calls == 6
+
+
+def test_async_breaker_outside_retries():
+    method = queries.api_get_info
+    client = AsyncFakeClient(method.api_path, OSError("refused"), {"info": 1})
+    breaker = CircuitBreaker(failure_threshold=1)
+    clients = AsyncClientsCollection(
+        (client,), retry_policy=no_delay_policy(), circuit_breaker=breaker
+    )
+    assert asyncio.run(clients.execute(method)) == {"info": 1}
+    assert breaker.state is CircuitState.CLOSED
+    assert breaker.failures == 0
+
+
+def test_async_cancelled_probe_leaves_circuit_open():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+
+    async def fail():
+        raise OSError
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def main():
+        with pytest.raises(OSError):
+            await breaker.call_async(fail)
+        task = asyncio.ensure_future(breaker.call_async(hang))
+        await asyncio.sleep(0)
+        assert breaker.state is CircuitState.HALF_OPEN
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert breaker.state is CircuitState.OPEN
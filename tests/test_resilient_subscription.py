@@ -0,0 +1,118 @@
+import asyncio
+import socket
+
+import pytest
+
+from ephyr_control.instance import queries
+from ephyr_control.instance.instance import EphyrInstance
+from ephyr_control.instance.subscribe import RECONNECTABLE_ERRORS
+from ephyr_control.utils.backoff import Backoff
+from tests.ws_server import FakeWebsocketServer, LocalSubscription
+
+FAST = Backoff(initial=0.01, maximum=0.05, jitter=0)
+
+
+def subscription(port):
+    instance = EphyrInstance(ipv4="127.0.0.1", https=False)
+    return LocalSubscription(instance, queries.api_subscribe_to_info, port=port)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_backoff_delays():
+    delays = Backoff(initial=1, maximum=10, multiplier=3, jitter=0).delays()
+    assert [next(delays) for _ in range(5)] == [1, 3, 9, 10, 10]
+    assert Backoff(jitter=0).delay(10**6) == Backoff().maximum
+
+
+def test_backoff_jitter():
+    backoff = Backoff(initial=4, jitter=0.25)
+    delays = [backoff.delay(0) for _ in range(100)]
+    assert all(3 <= delay <= 4 for delay in delays)
+    assert len(set(delays)) > 1
+    with pytest.raises(ValueError):
+        Backoff(jitter=1.5)
+
+
+def test_reconnects_and_marks_resync():
+    async def test():
+        async with FakeWebsocketServer() as server:
+            updates = subscription(server.port).resilient(backoff=FAST)
+            received = []
+            async with updates:
+                async for update in updates:
+                    received.append(update)
+                    if len(received) == 2:
+                        await server.drop_all()
+                    elif len(received) == 5:
+                        break
+            assert [update.resync for update in received] == [
+                False,
+                False,
+                True,
+                False,
+                False,
+            ]
+            assert received[2].data["tick"] == 0
+            assert updates.reconnects == 1
+            assert updates.downtime > 0
+            assert updates.is_connected is False
+            assert server.connections == 2
+            await asyncio.sleep(0.05)
+            assert server.open == 0
+
+    asyncio.run(test())
+
+
+def test_gives_up_after_max_attempts():
+    async def test():
+        updates = subscription(free_port()).resilient(backoff=FAST, max_attempts=2)
+        with pytest.raises(RECONNECTABLE_ERRORS):
+            async for _ in updates:
+                pass
+        assert isinstance(updates.last_error, RECONNECTABLE_ERRORS)
+        assert updates.total_downtime > 0
+
+    asyncio.run(test())
+
+
+def test_waits_for_server_to_come_back():
+    async def test():
+        port = free_port()
+        updates = subscription(port).resilient(backoff=FAST)
+        async with updates:
+            first = asyncio.ensure_future(updates.__aiter__().__anext__())
+            await asyncio.sleep(0.1)
+            # server is not listening, iterator keeps retrying
+            assert not first.done()
+            assert updates.last_error is not None
+            async with FakeWebsocketServer(port=port):
+                update = await asyncio.wait_for(first, timeout=5)
+        assert update.data["tick"] == 0
+        assert updates.reconnects == 1
+
+    asyncio.run(test())
+
+
+def test_iterate_resilient_reuses_session():
+    async def test():
+        async with FakeWebsocketServer() as server:
+            async with subscription(server.port).session() as session:
+                updates = session.iterate_resilient(backoff=FAST)
+                received = []
+                async for update in updates:
+                    received.append(update)
+                    if len(received) == 1:
+                        await server.drop_all()
+                    elif len(received) == 3:
+                        break
+                assert received[1].resync
+                assert updates.session is session.session
+                await updates.close()
+            assert server.connections == 2
+
+    asyncio.run(test())
@@ -0,0 +1,65 @@
+import dataclasses
+import json
+import math
+import uuid
+
+import pytest
+
+from ephyr_control.state import State, UuidOutputWithMixins, UuidRestream, Volume
+from ephyr_control.utils import serialization
+from ephyr_control.utils.serialization import compact_dtcls_to_json, dtcls_to_json
+
+orjson = pytest.importorskip("orjson")
+
+
+@dataclasses.dataclass
+class Sample:
+    value: float
+    name: str = "sample"
+
+
+def without_orjson(monkeypatch, *args, **kwargs):
+    with monkeypatch.context() as patch:
+        patch.setattr(serialization, "orjson", None)
+        return compact_dtcls_to_json(*args, **kwargs)
+
+
+def build_state():
+    output = UuidOutputWithMixins(
+        dst="rtmp://host/live/ключ", id=uuid.UUID(int=2), volume=Volume(level=50)
+    )
+    restream = UuidRestream(key="a", id=uuid.UUID(int=1), outputs=[output])
+    return State(restreams=[restream])
+
+
+@pytest.mark.parametrize("cleanup", [False, True])
+def test_state_is_encoded_the_same_without_orjson(monkeypatch, cleanup):
+    state = build_state()
+    encoded = compact_dtcls_to_json(state, cleanup=cleanup)
+    assert encoded == without_orjson(monkeypatch, state, cleanup=cleanup)
+    assert json.loads(encoded) == json.loads(state.to_json(cleanup=cleanup))
+
+
+@pytest.mark.parametrize("value", [0.0, 0.5, 1e-4, 123.456, -7.25, 1e15, 9.99e15])
+def test_floats_are_encoded_the_same(monkeypatch, value):
+    sample = [Sample(value)]
+    assert compact_dtcls_to_json(sample) == without_orjson(monkeypatch, sample)
+
+
+@pytest.mark.parametrize("value", [1e-5, 1e-7, 2.5e-8, 1e16, 1e22, -3.5e-9])
+def test_floats_differ_in_text_only(monkeypatch, value):
+    sample = [Sample(value)]
+    encoded = compact_dtcls_to_json(sample)
+    assert encoded != without_orjson(monkeypatch, sample)
+    assert json.loads(encoded) == json.loads(without_orjson(monkeypatch, sample))
+
+
+def test_nan_is_null_with_orjson(monkeypatch):
+    sample = Sample(math.nan)
+    assert json.loads(compact_dtcls_to_json(sample))["value"] is None
+    assert math.isnan(json.loads(without_orjson(monkeypatch, sample))["value"])
+
+
+def test_compact_and_default_encoders_agree():
+    state = build_state()
+    assert json.loads(compact_dtcls_to_json(state)) == json.loads(dtcls_to_json(state))
@@ -0,0 +1,88 @@
+import copy
+import dataclasses
+import inspect
+import pickle
+import uuid
+
+import pytest
+
+import ephyr_control.state
+from ephyr_control.state import HostAwareRestream, State, UuidRestream
+from ephyr_control.state._slots import add_slots
+
+MODEL_CLASSES = [
+    cls
+    for cls in vars(ephyr_control.state).values()
+    if inspect.isclass(cls) and dataclasses.is_dataclass(cls)
+]
+
+
+def required_kwargs(cls):
+    return {
+        field.name: "value"
+        for field in dataclasses.fields(cls)
+        if field.default is dataclasses.MISSING
+        and field.default_factory is dataclasses.MISSING
+    }
+
+
+@pytest.mark.parametrize("cls", MODEL_CLASSES, ids=lambda cls: cls.__name__)
+def test_model_instances_have_no_dict(cls):
+    instance = cls(**required_kwargs(cls))
+    assert not hasattr(instance, "__dict__")
+    with pytest.raises(AttributeError):
+        instance.not_a_field = 1
+
+
+def test_defaults_are_kept():
+    restream = UuidRestream(key="a")
+    assert restream.id is None
+    assert restream.outputs == []
+    assert restream.outputs is not UuidRestream(key="b").outputs
+    assert restream.input.key == "origin"
+
+
+def test_copy_and_pickle():
+    state = State(restreams=[UuidRestream(key="a", id=uuid.UUID(int=1))])
+    state.get_restream_by_key("a")
+    for copied in (copy.deepcopy(state), pickle.loads(pickle.dumps(state))):
+        assert copied == state
+        assert copied.get_restream_by_id(uuid.UUID(int=1)) is copied.restreams[0]
+
+
+def test_super_works_in_recreated_class():
+    restream = HostAwareRestream(key="live", host="example.com")
+    assert "example.com" in restream.pull_from_uri()
+
+
+def test_add_slots():
+    @add_slots
+    @dataclasses.dataclass
+    class Base:
+        value: int = 1
+
+        @property
+        def doubled(self):
+            return self.value * 2
+
+        @classmethod
+        def build(cls):
+            return cls()
+
+        def describe(self):
+            return "base"
+
+    @add_slots(reserve=("extra",))
+    @dataclasses.dataclass
+    class Child(Base):
+        other: str = "x"
+
+        def describe(self):
+            return f"{super().describe()} {self.other}"
+
+    child = Child.build()
+    child.extra = "reserved"
+    assert Child.__slots__ == ("other", "extra")
+    assert child.doubled == 2
+    assert child.describe() == "base x"
+    assert not hasattr(child, "__dict__")
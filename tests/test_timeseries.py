@@ -0,0 +1,106 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ephyr_control.instance.timeseries import MAX_OFFSET, TimeSeriesStore  # noqa: E402
+
+NOW = 1_700_000_000.0
+
+
+def fill(store, key, count, start=NOW, step=1.0, **values):
+    for i in range(count):
+        sample = {name: value(i) for name, value in values.items()}
+        store.append(key, sample, timestamp=start + i * step)
+
+
+def test_series_keeps_millisecond_timestamps():
+    store = TimeSeriesStore(capacity=4)
+    fill(store, "a", 6, step=0.001, cpu_usage=float)
+    timestamps, values = store.series("a", "cpu_usage")
+    assert np.allclose(timestamps - NOW, [0.002, 0.003, 0.004, 0.005], atol=1e-6)
+    assert values.tolist() == [2, 3, 4, 5]
+    assert len(store) == 4
+
+
+def test_window_queries():
+    store = TimeSeriesStore(capacity=100)
+    fill(store, "a", 10, cpu_usage=float, ram_free=lambda i: 100.0 + 10 * i)
+    fill(store, "b", 10, cpu_usage=lambda i: 50.0)
+    end = NOW + 9
+    assert store.mean("cpu_usage", 4, now=end) == {"a": 7.0, "b": 50.0}
+    assert store.percentile("cpu_usage", 100, 4, now=end)["a"] == 9.0
+    rates = store.rate("ram_free", 4, now=end)
+    assert rates["a"] == pytest.approx(10.0)
+    assert math.isnan(rates["b"])
+    assert math.isnan(store.mean("cpu_usage", 4, now=NOW - 100)["a"])
+
+
+def test_metrics_take_memory_only_after_first_value():
+    store = TimeSeriesStore(capacity=10)
+    store.append_server_info("a", {"cpuUsage": 1.0}, timestamp=NOW)
+    # base and timestamps, cpu_usage of 16 preallocated rows
+    assert store.nbytes == 16 * 8 + 16 * 10 * (4 + 4)
+    assert math.isnan(store.mean("tx_delta", 10, now=NOW)["a"])
+    assert store.mean("outputs_online", 10, now=NOW)["a"] == 0
+
+
+def test_statistics_counts():
+    store = TimeSeriesStore(capacity=10)
+    client = {
+        "id": "c1",
+        "statistics": {
+            "data": {
+                "inputs": [{"status": "ONLINE", "count": 3}],
+                "outputs": [{"status": "OFFLINE", "count": 2}],
+                "serverInfo": {"cpuUsage": 5.0},
+            }
+        },
+    }
+    store.append_statistics({"statistics": [client]}, timestamp=NOW)
+    assert store.mean("inputs_online", 1, now=NOW) == {"c1": 3.0}
+    assert store.mean("outputs_offline", 1, now=NOW) == {"c1": 2.0}
+    assert store.mean("cpu_usage", 1, now=NOW) == {"c1": 5.0}
+
+
+def test_base_is_moved_when_offsets_overflow():
+    store = TimeSeriesStore(capacity=3)
+    span = MAX_OFFSET / 1000
+    for i, timestamp in enumerate([NOW, NOW + span / 2, NOW + span, NOW + span * 1.2]):
+        store.append("a", {"cpu_usage": float(i)}, timestamp=timestamp)
+    timestamps, values = store.series("a", "cpu_usage")
+    assert values.tolist() == [1, 2, 3]
+    assert np.allclose(timestamps - NOW, [span / 2, span, span * 1.2], atol=1e-3)
+    # older sample moves base back
+    store.append("a", {"cpu_usage": 4.0}, timestamp=NOW + span / 3)
+    assert np.allclose(
+        store.series("a", "cpu_usage")[0] - NOW, [span, span * 1.2, span / 3], atol=1e-3
+    )
+    with pytest.raises(ValueError):
+        store.append("a", {"cpu_usage": 5.0}, timestamp=NOW + span * 3)
+
+
+def test_downsample():
+    store = TimeSeriesStore(capacity=200)
+    fill(store, "a", 120, tx_delta=float)
+    starts, means = store.downsample("a", "tx_delta", step=60)
+    assert (starts - NOW).tolist() == [0, 60]
+    assert means.tolist() == [29.5, 89.5]
+    assert store.downsample("a", "tx_delta", step=60, how="last")[1].tolist() == [
+        59,
+        119,
+    ]
+
+
+def test_remove_reuses_rows():
+    store = TimeSeriesStore(capacity=10)
+    fill(store, "a", 3, cpu_usage=float)
+    fill(store, "b", 3, start=NOW + 100, cpu_usage=lambda i: 10.0 + i)
+    store.remove(["a"])
+    assert list(store.keys) == ["b"]
+    timestamps, values = store.series("b", "cpu_usage")
+    assert (timestamps - NOW).tolist() == [100, 101, 102]
+    assert values.tolist() == [10, 11, 12]
+    fill(store, "c", 1, cpu_usage=float)
+    assert store.series("c", "cpu_usage")[1].tolist() == [0]
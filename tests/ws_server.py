@@ -0,0 +1,121 @@
+"""
+Fake Ephyr server speaking graphql-ws protocol, for subscription tests.
+
+Every started operation receives `payload(operation_name, number)`
+every `interval` seconds, until it is stopped or connection is dropped.
+"""
+
+import asyncio
+import dataclasses
+import json
+import re
+import socket
+
+import pytest
+import yarl
+
+from ephyr_control.instance.subscribe import Subscription
+
+web = pytest.importorskip("aiohttp.web")
+
+
+def default_payload(operation_name, number):
+    return {"tick": number, "op": operation_name}
+
+
+class FakeWebsocketServer:
+    def __init__(self, interval=0.01, payload=default_payload, port=0):
+        self.interval = interval
+        self.payload = payload
+        self.connections = 0
+        self.starts = 0
+        self.stops = 0
+        self.sockets = set()
+        self.port = port
+        self._runner = None
+
+    @property
+    def open(self):
+        return len(self.sockets)
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_get("/{path:.*}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        sock = socket.socket()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(("127.0.0.1", self.port))
+        self.port = sock.getsockname()[1]
+        await web.SockSite(self._runner, sock).start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.drop_all()
+        await self._runner.cleanup()
+
+    async def drop_all(self):
+        """Close all connections, as restarted server would."""
+        await asyncio.gather(*(ws.close() for ws in list(self.sockets)))
+
+    async def _handle(self, request):
+        ws = web.WebSocketResponse(protocols=("graphql-ws",))
+        await ws.prepare(request)
+        self.connections += 1
+        self.sockets.add(ws)
+        operations = {}
+        try:
+            async for message in ws:
+                if message.type != web.WSMsgType.TEXT:
+                    continue
+                await self._dispatch(ws, operations, json.loads(message.data))
+        finally:
+            for task in operations.values():
+                task.cancel()
+            self.sockets.discard(ws)
+        return ws
+
+    async def _dispatch(self, ws, operations, message):
+        kind = message.get("type")
+        if kind == "connection_init":
+            await ws.send_str(json.dumps({"type": "connection_ack"}))
+        elif kind == "start":
+            self.starts += 1
+            name = re.search(r"subscription\s+(\w+)", message["payload"]["query"])
+            operations[message["id"]] = asyncio.ensure_future(
+                self._run(ws, message["id"], name.group(1) if name else None)
+            )
+        elif kind == "stop":
+            self.stops += 1
+            task = operations.pop(message["id"], None)
+            if task is not None:
+                task.cancel()
+            await ws.send_str(json.dumps({"type": "complete", "id": message["id"]}))
+        elif kind == "connection_terminate":
+            await ws.close()
+
+    async def _run(self, ws, operation_id, operation_name):
+        number = 0
+        try:
+            while not ws.closed:
+                data = self.payload(operation_name, number)
+                message = {
+                    "type": "data",
+                    "id": operation_id,
+                    "payload": {"data": data},
+                }
+                await ws.send_str(json.dumps(message))
+                number += 1
+                await asyncio.sleep(self.interval)
+        except (ConnectionResetError, RuntimeError):
+            pass
+
+
+@dataclasses.dataclass(frozen=True)
+class LocalSubscription(Subscription):
+    """Subscription to server listening on non-standard port."""
+
+    port: int = 0
+
+    def build_ws_url(self) -> yarl.URL:
+        return super().build_ws_url().with_port(self.port)